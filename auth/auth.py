@@ -3,9 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from motor.motor_asyncio import AsyncIOMotorDatabase
-
-from database import get_db_mongo
+from database import RepositorioUsuarios, get_repositorio_usuarios
 
 # Configuración
 SECRET_KEY = "miClaveSecreta" 
@@ -30,7 +28,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 # 3. Obtener usuario desde el token
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotorDatabase = Depends(get_db_mongo)):
+async def get_current_user(token: str = Depends(oauth2_scheme), usuarios: RepositorioUsuarios = Depends(get_repositorio_usuarios)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar el token.",
@@ -51,7 +49,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotor
     except:
         raise credentials_exception # ID no válido
 
-    user = await db.usuarios.find_one({"_id": object_id})
+    user = await usuarios.por_id(object_id)
     if user is None:
         raise credentials_exception
     return user
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Mide cuánto tarda en importarse la app (main.py) y qué subsistemas pesados carga.
+
+Importa main en un proceso nuevo (así no hay módulos en caché) y muestra el
+tiempo de importación y cuáles de cv2, onvif, zeep y pyproj quedaron cargados.
+Importar la app no debe tocar Mongo ni las cámaras: con --uri apuntando a un
+Mongo inexistente el tiempo debe ser el mismo. Con --lifespan ejecuta además el
+arranque completo (carga de configuración y registro) y muestra su reporte.
+
+Uso:
+    python benchmarks/arranque.py
+    python benchmarks/arranque.py --uri mongodb://10.255.255.1:27017 --lifespan
+    python benchmarks/arranque.py --repeticiones 5 --umbral-ms 3000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+SUBSISTEMAS = ("cv2", "onvif", "zeep", "pyproj")
+
+# Se ejecuta en el proceso hijo: imprime una línea JSON con el resultado
+_HIJO = """
+import json, sys, time
+inicio = time.perf_counter()
+import main
+importacion = time.perf_counter() - inicio
+reporte = None
+if {lifespan!r}:
+    import asyncio
+    async def arrancar():
+        async with main.lifespan(main.app):
+            pass
+    asyncio.run(arrancar())
+    reporte = main.tiempos_arranque.reporte(time.perf_counter() - inicio)
+print(json.dumps({{
+    "importacion_s": importacion,
+    "cargados": [m for m in {subsistemas!r} if m in sys.modules],
+    "reporte": reporte,
+}}))
+"""
+
+
+def medir(args) -> dict:
+    entorno = dict(os.environ)
+    if args.uri:
+        entorno["BDMONGO_URI"] = args.uri
+    codigo = _HIJO.format(lifespan=args.lifespan, subsistemas=SUBSISTEMAS)
+    proceso = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, env=entorno, capture_output=True, text=True, timeout=args.timeout
+    )
+    if proceso.returncode != 0:
+        sys.exit(f"La importación falló:\n{proceso.stderr}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="URI de Mongo (por defecto BDMONGO_URI del .env)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--umbral-ms", type=float, help="Termina con error si la mediana supera este tiempo")
+    parser.add_argument("--lifespan", action="store_true", help="Ejecuta también el arranque del lifespan")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Límite por proceso en segundos")
+    args = parser.parse_args()
+
+    resultados = [medir(args) for _ in range(args.repeticiones)]
+    tiempos = [r["importacion_s"] * 1000 for r in resultados]
+    mediana = statistics.median(tiempos)
+    print(f"importación de main: mediana {mediana:.0f} ms (min {min(tiempos):.0f}, max {max(tiempos):.0f}, {len(tiempos)} procesos)")
+    print(f"subsistemas cargados: {', '.join(resultados[-1]['cargados']) or 'ninguno'}")
+    if resultados[-1]["reporte"]:
+        print(resultados[-1]["reporte"])
+    if args.umbral_ms is not None and mediana > args.umbral_ms:
+        sys.exit(f"La importación tardó más de {args.umbral_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Simula el seguimiento PTZ de varios botes en alerta, antes y con el planificador.
+
+Botes en línea recta alrededor del radar, cada uno en una zona de prioridad
+fija; dos radares envían tramas alternadas (cada uno ve la mitad de los botes).
+
+    anterior      cada trama manda el objetivo de la zona más prioritaria a
+                  "camara_principal" (lo que hacía services/pipeline.py)
+    planificador  services/asignacion.PlanificadorCamaras con --camaras cámaras
+                  (la principal en el radar y las demás alrededor del puerto)
+
+Reporta cambios de objetivo por minuto de cada cámara, la fracción de tramas
+en que las cámaras siguen a botes de las prioridades más altas (las N mayores,
+con N las cámaras en uso; a igual prioridad cualquiera sirve) y el costo de
+planificar cada trama.
+
+Uso:
+    python benchmarks/asignacion.py
+    python benchmarks/asignacion.py --botes 12 --camaras 4 --duracion 300 --permanencia 5
+"""
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.asignacion import CamaraPTZ, PlanificadorCamaras, camara_desde_documento  # noqa: E402
+from services.camara import ModeloCamara  # noqa: E402
+from services.sensores import SENSOR_PRINCIPAL  # noqa: E402
+
+RADAR_LAT = -41.462296967669154
+RADAR_LON = -72.98740792932408
+METROS_POR_GRADO_LATITUD = 111320
+PERIODO_TRAMA_S = 0.1
+SENSORES = (SENSOR_PRINCIPAL, "muelle")
+
+
+def a_geografico(este: float, norte: float) -> tuple:
+    metros_por_grado_lon = METROS_POR_GRADO_LATITUD * math.cos(math.radians(RADAR_LAT))
+    return RADAR_LAT + norte / METROS_POR_GRADO_LATITUD, RADAR_LON + este / metros_por_grado_lon
+
+
+def crear_camaras(n: int, alcance_m: float) -> dict:
+    camaras = {"camara_principal": CamaraPTZ("camara_principal", ModeloCamara(RADAR_LAT, RADAR_LON), sensor=SENSOR_PRINCIPAL)}
+    for k in range(1, n):
+        # Repartidas en un anillo de 1 km alrededor del radar
+        angulo = 2 * math.pi * k / max(1, n - 1)
+        latitud, longitud = a_geografico(1000 * math.sin(angulo), 1000 * math.cos(angulo))
+        camara_id = f"camara_{k}"
+        camaras[camara_id] = camara_desde_documento(camara_id, {
+            "latitud": latitud, "longitud": longitud, "altitud_m": 30, "alcance_m": alcance_m,
+        })
+    return camaras
+
+
+def crear_botes(n: int, rng: random.Random) -> list:
+    botes = []
+    for i in range(n):
+        angulo, radio = rng.uniform(0, 2 * math.pi), rng.uniform(200, 1500)
+        rumbo, velocidad = rng.uniform(0, 2 * math.pi), rng.uniform(1, 8)
+        botes.append({
+            "id": i, "sensor": SENSORES[i % len(SENSORES)], "prioridad": rng.randint(1, 4),
+            "este": radio * math.sin(angulo), "norte": radio * math.cos(angulo),
+            "ve": velocidad * math.sin(rumbo), "vn": velocidad * math.cos(rumbo),
+        })
+    return botes
+
+
+def candidatos(botes: list, sensor_id: str, t: float) -> list:
+    lista = []
+    for bote in botes:
+        if bote["sensor"] != sensor_id:
+            continue
+        latitud, longitud = a_geografico(bote["este"] + bote["ve"] * t, bote["norte"] + bote["vn"] * t)
+        punto = {"id": bote["id"], "sensor": sensor_id, "latitud": latitud, "longitud": longitud, "azimut": None, "distancia": None}
+        lista.append((bote["prioridad"], punto))
+    return lista
+
+
+def simular(botes: list, tramas: int, asignar) -> tuple:
+    """asignar(sensor_id, candidatos, t) -> {camara: punto}; devuelve (cambios por cámara, tramas cubiertas, tiempos)."""
+    prioridades = {(b["sensor"], b["id"]): b["prioridad"] for b in botes}
+    mayores = sorted(prioridades.values(), reverse=True)
+    objetivo_de = {}
+    cambios = {}
+    cubiertas = 0
+    tiempos = []
+    for n in range(tramas):
+        t = n * PERIODO_TRAMA_S
+        sensor_id = SENSORES[n % len(SENSORES)]
+        lista = candidatos(botes, sensor_id, t)
+        inicio = time.perf_counter_ns()
+        destinos = asignar(sensor_id, lista, t)
+        tiempos.append(time.perf_counter_ns() - inicio)
+        for camara_id, punto in destinos.items():
+            clave = (punto["sensor"], punto["id"])
+            if objetivo_de.get(camara_id) != clave:
+                cambios[camara_id] = cambios.get(camara_id, 0) + 1
+                objetivo_de[camara_id] = clave
+        # Las cámaras en uso siguen a botes distintos con las N prioridades más altas
+        seguidos = set(objetivo_de.values())
+        cubiertas += sorted((prioridades[clave] for clave in seguidos), reverse=True) == mayores[:max(1, len(seguidos))]
+    return cambios, cubiertas, tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--botes", type=int, default=8)
+    parser.add_argument("--camaras", type=int, default=3)
+    parser.add_argument("--alcance", type=float, default=1500.0, help="alcance de las cámaras adicionales (m)")
+    parser.add_argument("--permanencia", type=float, default=3.0, help="PTZ_PERMANENCIA_MIN_S")
+    parser.add_argument("--duracion", type=float, default=120.0, help="segundos simulados")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    botes = crear_botes(args.botes, rng)
+    tramas = int(args.duracion / PERIODO_TRAMA_S)
+    minutos = args.duracion / 60
+
+    def anterior(sensor_id, lista, t):
+        return {"camara_principal": max(lista, key=lambda c: c[0])[1]} if lista else {}
+
+    camaras = crear_camaras(args.camaras, args.alcance)
+    planificador = PlanificadorCamaras(lambda: camaras, permanencia_min_s=args.permanencia, vigencia_s=2.0)
+
+    print(f"{args.botes} botes, {len(SENSORES)} radares, {args.duracion:.0f} s ({tramas} tramas)")
+    print(f"{'política':<14}{'cámaras':>8}{'cambios/min':>13}{'top cubierto':>14}{'p50 us':>9}{'p99 us':>9}")
+    for nombre, asignar in (("anterior", anterior), ("planificador", planificador.actualizar)):
+        cambios, cubiertas, tiempos = simular(botes, tramas, asignar)
+        tiempos.sort()
+        usadas = max(1, len(cambios))
+        print(
+            f"{nombre:<14}{usadas:>8}{sum(cambios.values()) / usadas / minutos:>13.1f}"
+            f"{cubiertas / tramas:>14.0%}{statistics.median(tiempos) / 1000:>9.1f}"
+            f"{tiempos[int(0.99 * (len(tiempos) - 1))] / 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
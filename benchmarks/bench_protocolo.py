@@ -0,0 +1,93 @@
+"""
+Compara el tamaño por trama del protocolo completo con el protocolo delta
+(services/protocolo.py), verificando primero que un cliente que aplica el
+keyframe y los deltas reconstruye exactamente cada trama.
+
+Uso:
+    python benchmarks/bench_protocolo.py
+    python benchmarks/bench_protocolo.py --objetivos 300 --moviles 0.2 --tramas 1000
+"""
+import argparse
+import random
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.difusion import MensajeCodificado, msgpack  # noqa: E402
+from services.protocolo import CodificadorDelta, aplicar, _fila  # noqa: E402
+
+RADAR_LAT = -41.462296967669154
+RADAR_LON = -72.98740792932408
+ZONA = {"id": 7, "name": "Zona 7", "category": "Zona Restringida", "color": "#ff0000"}
+
+
+def tramas_sinteticas(n_objetivos: int, fraccion_moviles: float, n_tramas: int, rng: random.Random):
+    """Objetivos fijos (boyas, clutter) y móviles; algunos aparecen y desaparecen."""
+    objetivos = {}
+    siguiente_id = 0
+    for _ in range(n_objetivos):
+        objetivos[siguiente_id] = [RADAR_LAT + rng.uniform(-0.01, 0.01), RADAR_LON + rng.uniform(-0.03, 0.03), rng.random() < fraccion_moviles]
+        siguiente_id += 1
+
+    for _ in range(n_tramas):
+        if rng.random() < 0.1:
+            objetivos.pop(rng.choice(list(objetivos)), None)
+            objetivos[siguiente_id] = [RADAR_LAT, RADAR_LON, True]
+            siguiente_id += 1
+        puntos = []
+        for objetivo_id, (lat, lon, movil) in objetivos.items():
+            if movil:
+                objetivos[objetivo_id][0] = lat = lat + rng.uniform(-2e-5, 2e-5)
+                objetivos[objetivo_id][1] = lon = lon + rng.uniform(-2e-5, 2e-5)
+            puntos.append({
+                "id": objetivo_id,
+                "type": 1,
+                "latitud": lat,
+                "longitud": lon,
+                "azimut": round(rng.uniform(0, 360), 1) if movil else 90.0,
+                "distancia": round(rng.uniform(0, 2000), 1) if movil else 1000.0,
+                "zona_alerta": ZONA if objetivo_id % 10 == 0 else None,
+            })
+        yield {"puntos": puntos, "alertas": []}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objetivos", type=int, default=100)
+    parser.add_argument("--moviles", type=float, default=0.3, help="fracción de objetivos en movimiento")
+    parser.add_argument("--tramas", type=int, default=500)
+    parser.add_argument("--intervalo-clave", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    codificador = CodificadorDelta(args.intervalo_clave)
+    estado = None
+    completo, delta, delta_msgpack, clave = [], [], [], []
+
+    for mensaje in tramas_sinteticas(args.objetivos, args.moviles, args.tramas, rng):
+        trama = codificador.procesar(mensaje)
+        estado = aplicar(estado, trama.mensaje)
+        esperado = {(fila[0], fila[7]): fila for fila in map(_fila, mensaje["puntos"])}
+        if estado["objetivos"] != esperado:
+            sys.exit(f"La trama {trama.seq} no se reconstruye igual con el delta")
+
+        completo.append(len(MensajeCodificado(mensaje).bytes))
+        delta.append(len(MensajeCodificado(trama.mensaje).bytes))
+        clave.append(len(MensajeCodificado(trama.clave()).bytes))
+        if msgpack is not None:
+            delta_msgpack.append(len(MensajeCodificado(trama.mensaje).msgpack))
+
+    print(f"{'protocolo':<22}{'bytes/trama (mediana)':>24}{'x':>8}")
+    base = statistics.median(completo)
+    filas = [("completo (json)", completo), ("keyframe (json)", clave), ("delta (json)", delta)]
+    if delta_msgpack:
+        filas.append(("delta (msgpack)", delta_msgpack))
+    for nombre, tamanos in filas:
+        mediana = statistics.median(tamanos)
+        print(f"{nombre:<22}{mediana:>24.0f}{base / mediana:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
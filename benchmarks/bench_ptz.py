@@ -0,0 +1,65 @@
+"""
+Compara services/camara.ModeloCamara con el cálculo escalar de PTZ anterior.
+
+ptz_escalar es calculate_ptz_for_gps_target tal como estaba en
+routes/TrackPTZ.py (un Geod nuevo y la trigonometría de la calibración en cada
+llamada, un objetivo a la vez). Mide cuánto cuesta resolver N candidatos por
+trama de las dos formas, y un solo objetivo con resolver_punto. Que ambos dan
+el mismo pan/tilt/zoom lo verifica tests/test_camara.py; ptz_escalar, los
+objetivos y las calibraciones están en tests/_referencias.py.
+
+Uso:
+    python benchmarks/bench_ptz.py
+    python benchmarks/bench_ptz.py --objetivos 1 10 100 1000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.camara import ModeloCamara  # noqa: E402
+from tests._referencias import CALIBRACIONES, CAM_LAT, CAM_LON, columnas, objetivos_al_azar, parametros, ptz_escalar  # noqa: E402
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Mediana en microsegundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter_ns()
+        funcion()
+        tiempos.append(time.perf_counter_ns() - inicio)
+    return statistics.median(tiempos) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objetivos", type=int, nargs="+", default=[1, 10, 100, 1000], help="candidatos por trama")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.semilla)
+
+    calibracion = CALIBRACIONES[1][1]
+    modelo = ModeloCamara(CAM_LAT, CAM_LON, **calibracion)
+    c = parametros(modelo, calibracion)
+    print(f"{'objetivos':>10}{'escalar us':>13}{'vectorizado us':>16}{'us/objetivo':>13}{'aceleración':>13}")
+    for n in args.objetivos:
+        objetivos = objetivos_al_azar(n, rng)
+        entrada = columnas(objetivos)
+        escalar = medir(lambda: [ptz_escalar(c, *o) for o in objetivos], max(3, args.repeticiones // max(1, n // 100)))
+        vectorizado = medir(lambda: modelo.resolver(*entrada), args.repeticiones)
+        print(f"{n:>10}{escalar:>13.1f}{vectorizado:>16.1f}{vectorizado / n:>13.3f}{escalar / vectorizado:>12.1f}x")
+
+    # Un solo objetivo (comando manual, seguimiento de un punto): camino sin NumPy
+    objetivo = objetivos_al_azar(1, rng)[0]
+    escalar = medir(lambda: ptz_escalar(c, *objetivo), args.repeticiones)
+    punto = medir(lambda: modelo.resolver_punto(*objetivo), args.repeticiones)
+    print(f"\nresolver_punto: {punto:.1f} us (escalar {escalar:.1f} us, {escalar / punto:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
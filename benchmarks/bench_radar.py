@@ -0,0 +1,366 @@
+"""
+Suite de benchmarks del camino caliente del radar con cargas sintéticas:
+
+    punto_en_poligono    una llamada: un punto contra un polígono
+    zona_prioritaria     una llamada: un punto contra el índice de zonas
+    geo_escalar          una trama: rotate_point + convertir_cartesiano_a_geografico punto a punto
+    geo_vectorizada      una trama: services/geo.py (lo que usa el pipeline)
+    geo_aeqd             una trama: services/geo.py con RADAR_PROYECCION=aeqd (pyproj)
+    decodificar          una trama: services/trama.py
+    procesar             una trama: PipelineRadar.procesar (process_radar_logic sin Mongo ni PTZ)
+    broadcast            una trama: ConnectionManager.broadcast (serializar y encolar)
+    difusion             una trama: broadcast hasta que todos los clientes la enviaron
+
+Cada caso reporta latencia por llamada (media, p50, p90, p99), llamadas/s y
+memoria pico por llamada (tracemalloc, en una pasada aparte para no
+distorsionar los tiempos). Semilla fija, calentamiento y recolector de basura
+desactivado durante la medición, para que el reporte sea comparable entre commits.
+
+Uso:
+    python benchmarks/bench_radar.py
+    python benchmarks/bench_radar.py --objetivos 300 --zonas 200 --vertices 16 --clientes 50
+    python benchmarks/bench_radar.py --json base.json                       # guardar
+    python benchmarks/bench_radar.py --json nuevo.json --comparar base.json  # comparar
+"""
+import argparse
+import asyncio
+import gc
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from bench_trama import trama_sintetica  # noqa: E402
+from services.difusion import ConnectionManager  # noqa: E402
+from services.eventos import crear_motor_eventos  # noqa: E402
+from services.geo import PROYECCION_AEQD, PROYECCION_PLANA, obtener_marco_local, obtener_transformacion  # noqa: E402
+from services.pipeline import PipelineRadar  # noqa: E402
+from services.registro import RegistroRadar  # noqa: E402
+from services.seguimiento import TablaTracks  # noqa: E402
+from services.sensores import SENSOR_PRINCIPAL, ConfiguracionSensor, VistaSensores  # noqa: E402
+from services.trama import Objetivo, decodificar_trama  # noqa: E402
+from services.zonas import punto_en_poligono  # noqa: E402
+from tests._referencias import zonas_sinteticas  # noqa: E402
+
+RADAR_LAT = -41.462296967669154
+RADAR_LON = -72.98740792932408
+METROS_POR_GRADO_LATITUD = 111320
+ANGULO_ROTACION = 10.0
+GRADO_INCLINACION = 40.0
+PERIODO_TRAMA_S = 0.1
+
+
+def geo_escalar(objetivos, angulo_grados: float) -> list:
+    """El camino anterior a services/geo.py: rotate_point + convertir_cartesiano_a_geografico."""
+    resultado = []
+    for objetivo in objetivos:
+        rad = math.radians(angulo_grados)
+        x = objetivo.x * math.cos(rad) + objetivo.y * math.sin(rad)
+        y = -objetivo.x * math.sin(rad) + objetivo.y * math.cos(rad)
+        delta_lat = y / METROS_POR_GRADO_LATITUD
+        delta_lon = x / (METROS_POR_GRADO_LATITUD * math.cos(math.radians(RADAR_LAT)))
+        resultado.append((RADAR_LAT + delta_lat, RADAR_LON + delta_lon))
+    return resultado
+
+
+def geo_vectorizada(objetivos, angulo_grados: float, proyeccion: str = PROYECCION_PLANA):
+    transformacion = obtener_transformacion(RADAR_LAT, RADAR_LON, angulo_grados, METROS_POR_GRADO_LATITUD, proyeccion)
+    este, norte = transformacion.a_local([o.x for o in objetivos], [o.y for o in objetivos])
+    return transformacion.marco.a_geografico(este, norte)
+
+
+def tramas_sinteticas(n_objetivos: int, n_tramas: int, rng: random.Random) -> list:
+    """
+    Objetivos con id estable que se mueven entre tramas (el Kalman actualiza en
+    vez de crear tracks), repartidos sobre la misma "costa" que las zonas.
+    """
+    estado = [
+        [i, rng.randint(0, 3), rng.uniform(-2500, 2500), rng.uniform(-600, 600), rng.uniform(-5, 5), rng.uniform(-5, 5)]
+        for i in range(n_objetivos)
+    ]
+    tramas = []
+    for _ in range(n_tramas):
+        objetivos = []
+        for fila in estado:
+            fila[2] += fila[4] * PERIODO_TRAMA_S
+            fila[3] += fila[5] * PERIODO_TRAMA_S
+            objetivos.append(Objetivo(fila[0], fila[1], fila[2], fila[3], math.degrees(math.atan2(fila[2], fila[3])), math.hypot(fila[2], fila[3])))
+        tramas.append(objetivos)
+    return tramas
+
+
+class WebSocketFalso:
+    """Cliente que acepta todo sin red (mide lo que cuesta el servidor)."""
+
+    client = None
+
+    def __init__(self):
+        self.enviados = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, texto: str):
+        self.enviados += 1
+
+    async def send_bytes(self, datos: bytes):
+        self.enviados += 1
+
+
+def percentil(ordenados: list, p: float) -> float:
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def medir(nombre: str, unidad: str, funcion, entradas: list, calentamiento: int) -> dict:
+    """
+    Llama a 'funcion' con cada entrada y devuelve las estadísticas en
+    microsegundos. Las entradas se recorren en orden (el estado del pipeline
+    depende de la trama anterior).
+    """
+    for entrada in entradas[:calentamiento]:
+        funcion(entrada)
+    medidas = entradas[calentamiento:]
+
+    gc.collect()
+    gc.disable()
+    try:
+        tiempos = []
+        reloj = time.perf_counter_ns
+        for entrada in medidas:
+            inicio = reloj()
+            funcion(entrada)
+            tiempos.append(reloj() - inicio)
+    finally:
+        gc.enable()
+
+    return resumir(nombre, unidad, tiempos)
+
+
+def resumir(nombre: str, unidad: str, tiempos_ns: list) -> dict:
+    ordenados = sorted(t / 1000 for t in tiempos_ns)
+    media = statistics.fmean(ordenados)
+    return {
+        "caso": nombre,
+        "unidad": unidad,
+        "n": len(ordenados),
+        "media_us": media,
+        "p50_us": percentil(ordenados, 0.5),
+        "p90_us": percentil(ordenados, 0.9),
+        "p99_us": percentil(ordenados, 0.99),
+        "por_segundo": 1e6 / media if media else 0.0,
+    }
+
+
+def memoria_pico(funcion, entradas: list) -> float:
+    """KiB de memoria pico por llamada (mediana), con tracemalloc."""
+    picos = []
+    tracemalloc.start()
+    try:
+        for entrada in entradas:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            funcion(entrada)
+            picos.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(picos) / 1024
+
+
+def commit_actual() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "?"
+
+
+def crear_pipeline(zonas: list, proyeccion: str = PROYECCION_PLANA):
+    sensor = ConfiguracionSensor(SENSOR_PRINCIPAL, None, RADAR_LAT, RADAR_LON, ANGULO_ROTACION, GRADO_INCLINACION, None)
+    registro = RegistroRadar()
+    registro.cargar(zonas, {sensor.id: sensor}, obtener_marco_local(RADAR_LAT, RADAR_LON, METROS_POR_GRADO_LATITUD, proyeccion))
+    pipeline = PipelineRadar(METROS_POR_GRADO_LATITUD, TablaTracks(), crear_motor_eventos(), VistaSensores(2.0))
+    return pipeline, sensor, registro.actual
+
+
+async def medir_difusion(n_clientes: int, protocolo: str, mensajes: list, calentamiento: int) -> tuple:
+    """(broadcast, difusion): encolar solo, y encolar hasta que todos enviaron."""
+    manager = ConnectionManager(max_cola=len(mensajes) + 1)
+    sockets = [WebSocketFalso() for _ in range(n_clientes)]
+    for ws in sockets:
+        await manager.connect(ws, protocolo=protocolo)
+
+    async def vaciar():
+        while any(cliente.cola or cliente.control for cliente in manager.clientes.values()):
+            await asyncio.sleep(0)
+
+    await vaciar()
+    for mensaje in mensajes[:calentamiento]:
+        manager.broadcast(mensaje)
+        await vaciar()
+
+    tiempos_broadcast, tiempos_difusion = [], []
+    reloj = time.perf_counter_ns
+    gc.collect()
+    gc.disable()
+    try:
+        for mensaje in mensajes[calentamiento:]:
+            inicio = reloj()
+            manager.broadcast(mensaje)
+            encolado = reloj()
+            await vaciar()
+            fin = reloj()
+            tiempos_broadcast.append(encolado - inicio)
+            tiempos_difusion.append(fin - inicio)
+    finally:
+        gc.enable()
+
+    esperados = len(mensajes) * n_clientes
+    enviados = sum(ws.enviados for ws in sockets) - (n_clientes if protocolo == "delta" else 0)
+    if enviados != esperados:
+        sys.exit(f"Se enviaron {enviados} tramas de {esperados}")
+
+    for ws in sockets:
+        manager.disconnect(ws)
+    await asyncio.sleep(0)
+    return (
+        resumir("broadcast", "trama", tiempos_broadcast),
+        resumir("difusion", "trama", tiempos_difusion),
+    )
+
+
+def imprimir(resultados: list, base: dict):
+    encabezado = f"{'caso':<20}{'unidad':>8}{'media us':>11}{'p50 us':>11}{'p90 us':>11}{'p99 us':>11}{'por s':>11}{'KiB pico':>10}"
+    if base:
+        encabezado += f"{'p50 vs base':>13}"
+    print(encabezado)
+    for r in resultados:
+        linea = (
+            f"{r['caso']:<20}{r['unidad']:>8}{r['media_us']:>11.2f}{r['p50_us']:>11.2f}"
+            f"{r['p90_us']:>11.2f}{r['p99_us']:>11.2f}{r['por_segundo']:>11.0f}"
+        )
+        linea += f"{r['kib_pico']:>10.1f}" if r["kib_pico"] is not None else f"{'-':>10}"
+        anterior = base.get(r["caso"])
+        if anterior:
+            linea += f"{(r['p50_us'] / anterior['p50_us'] - 1) * 100:>+12.1f}%"
+        print(linea)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objetivos", type=int, default=100, help="objetivos por trama")
+    parser.add_argument("--zonas", type=int, default=100)
+    parser.add_argument("--vertices", type=int, default=8, help="vértices por zona")
+    parser.add_argument("--clientes", type=int, default=20, help="clientes websocket")
+    parser.add_argument("--protocolo", choices=("completo", "delta"), default="completo")
+    parser.add_argument("--proyeccion", choices=(PROYECCION_PLANA, PROYECCION_AEQD), default=PROYECCION_PLANA,
+                        help="marco local del caso procesar")
+    parser.add_argument("--tramas", type=int, default=300)
+    parser.add_argument("--llamadas", type=int, default=20000, help="llamadas de los casos por punto")
+    parser.add_argument("--calentamiento", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", help="guarda el reporte en este archivo")
+    parser.add_argument("--comparar", help="reporte JSON anterior para comparar la p50")
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    zonas = zonas_sinteticas(args.zonas, args.vertices, rng)
+    tramas = tramas_sinteticas(args.objetivos, args.tramas + args.calentamiento, rng)
+    crudas = [trama_sintetica(args.objetivos, True, rng) for _ in range(args.tramas + args.calentamiento)]
+    angulo = ANGULO_ROTACION + GRADO_INCLINACION - 30
+
+    # Casos por punto: puntos al azar del área de las zonas
+    marco = obtener_marco_local(RADAR_LAT, RADAR_LON, METROS_POR_GRADO_LATITUD)
+    puntos_geo = [
+        (RADAR_LAT + rng.uniform(-0.006, 0.006), RADAR_LON + rng.uniform(-0.032, 0.032))
+        for _ in range(args.llamadas + args.calentamiento)
+    ]
+    este, norte = marco.a_local([p[0] for p in puntos_geo], [p[1] for p in puntos_geo])
+    puntos_locales = list(zip(este.tolist(), norte.tolist()))
+    poligonos = [zona["coordinates"] for zona in zonas]
+    pares_poligono = [(punto, rng.choice(poligonos)) for punto in puntos_geo]
+
+    pipeline, sensor, estado = crear_pipeline(zonas, args.proyeccion)
+    indice = estado.indice
+    reloj_trama = iter(range(10**9))
+
+    def procesar(objetivos):
+        return pipeline.procesar(objetivos, sensor, estado, ahora=next(reloj_trama) * PERIODO_TRAMA_S)
+
+    # Verificación: la transformación vectorizada coincide con la escalar
+    latitudes, longitudes = geo_vectorizada(tramas[0], angulo)
+    referencia = np.array(geo_escalar(tramas[0], angulo))
+    if not (np.allclose(latitudes, referencia[:, 0], atol=1e-9) and np.allclose(longitudes, referencia[:, 1], atol=1e-9)):
+        sys.exit("geo_vectorizada no coincide con geo_escalar")
+
+    casos = [
+        ("punto_en_poligono", "llamada", lambda par: punto_en_poligono(*par), pares_poligono),
+        ("zona_prioritaria", "llamada", lambda punto: indice.zona_prioritaria(*punto), puntos_locales),
+        ("geo_escalar", "trama", lambda objetivos: geo_escalar(objetivos, angulo), tramas),
+        ("geo_vectorizada", "trama", lambda objetivos: geo_vectorizada(objetivos, angulo), tramas),
+        ("geo_aeqd", "trama", lambda objetivos: geo_vectorizada(objetivos, angulo, PROYECCION_AEQD), tramas),
+        ("decodificar", "trama", decodificar_trama, crudas),
+        ("procesar", "trama", procesar, tramas),
+    ]
+    resultados = []
+    for nombre, unidad, funcion, entradas in casos:
+        resultado = medir(nombre, unidad, funcion, entradas, args.calentamiento)
+        # La memoria se mide aparte, con una muestra de las entradas
+        resultado["kib_pico"] = memoria_pico(funcion, entradas[:200])
+        resultados.append(resultado)
+
+    # Mensajes reales del pipeline para la difusión
+    pipeline, sensor, estado = crear_pipeline(zonas, args.proyeccion)
+    reloj_trama = iter(range(10**9))
+    mensajes = [procesar(objetivos) for objetivos in tramas]
+    en_zona = sum(1 for m in mensajes for p in m["puntos"] if "zona_alerta" in p) / (len(mensajes) * args.objetivos)
+    for resultado in asyncio.run(medir_difusion(args.clientes, args.protocolo, mensajes, args.calentamiento)):
+        resultado["kib_pico"] = None
+        resultados.append(resultado)
+
+    reporte = {
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "parametros": {
+            "objetivos": args.objetivos, "zonas": args.zonas, "vertices": args.vertices,
+            "clientes": args.clientes, "protocolo": args.protocolo, "proyeccion": args.proyeccion, "tramas": args.tramas,
+            "llamadas": args.llamadas, "semilla": args.semilla,
+        },
+        "resultados": resultados,
+    }
+
+    base = {}
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if anterior["parametros"] != reporte["parametros"]:
+            print(f"Aviso: {args.comparar} se midió con otros parámetros: {anterior['parametros']}")
+        base = {r["caso"]: r for r in anterior["resultados"]}
+
+    p = reporte["parametros"]
+    print(
+        f"commit {reporte['commit']}  python {reporte['python']}  numpy {reporte['numpy']}\n"
+        f"{p['objetivos']} objetivos/trama ({en_zona:.0%} en zona), {p['zonas']} zonas x {p['vertices']} vértices, "
+        f"{p['clientes']} clientes ({p['protocolo']}), proyección {p['proyeccion']}\n"
+    )
+    imprimir(resultados, base)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Compara el decodificador de tramas (services/trama.py) con el camino antiguo
+re.sub + json.loads de radar_listener_task.
+
+Antes de medir verifica que los dos den los mismos objetivos en las tramas
+sintéticas y que el decodificador resuelva bien los casos de CASOS_BORDE
+(objetos o listas anidadas, claves que terminan en 'data'); si algo no
+coincide, termina con error.
+
+Uso:
+    python benchmarks/bench_trama.py                      # tramas sintéticas
+    python benchmarks/bench_trama.py grabacion.jsonl      # tramas grabadas
+
+El archivo de grabación tiene una trama por línea: texto crudo o un objeto JSON
+con la trama cruda en la clave "raw".
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.trama import TramaInvalida, decodificar_trama  # noqa: E402
+
+
+def camino_antiguo(raw: str):
+    processed_str = re.sub(r'(\w+):', r'"\1":', raw)
+    radar_data_json = json.loads(processed_str)
+    return [
+        (point_data.get("id"), float(point_data.get("x", 0)), float(point_data.get("y", 0)))
+        for point_data in radar_data_json["data"]
+    ]
+
+
+def camino_nuevo(raw: str):
+    trama = decodificar_trama(raw)
+    return [(o.id, o.x, o.y) for o in trama.objetivos]
+
+
+# (nombre, trama, objetivos esperados como (id, x, y) o TramaInvalida)
+CASOS_BORDE = (
+    ("objeto anidado", "{cmd:1,data:[{id:3,extra:{q:1},x:1,y:2}]}", TramaInvalida),
+    ("lista en un campo", "{cmd:1,data:[{id:3,p:[1,2],x:1,y:2},{id:4,x:5,y:6}]}", TramaInvalida),
+    ("clave metadata", "{metadata:[1,2],data:[{id:4,type:0,x:1,y:2,a:0,d:1}]}", [(4, 1.0, 2.0)]),
+)
+
+
+def verificar(conjuntos: dict) -> bool:
+    correcto = True
+    for nombre, raw, esperado in CASOS_BORDE:
+        try:
+            obtenido = camino_nuevo(raw)
+        except TramaInvalida:
+            obtenido = TramaInvalida
+        if obtenido != esperado:
+            print(f"  ! {nombre}: se esperaba {esperado}, se obtuvo {obtenido}")
+            correcto = False
+    for nombre, tramas in conjuntos.items():
+        distintas = 0
+        for raw in tramas:
+            try:
+                antiguo = camino_antiguo(raw)
+            except Exception:
+                continue  # el camino antiguo no la entiende: no hay con qué comparar
+            try:
+                distintas += camino_nuevo(raw) != antiguo
+            except TramaInvalida:
+                distintas += 1
+        if distintas:
+            print(f"  ! '{nombre}': {distintas} tramas con objetivos distintos al camino antiguo")
+            correcto = False
+    return correcto
+
+
+def trama_sintetica(n_objetivos: int, con_timestamp: bool, rng: random.Random) -> str:
+    objetivos = ",".join(
+        "{id:%d,type:%d,x:%.3f,y:%.3f,a:%.2f,d:%.2f,v:%.2f}" % (
+            i,
+            rng.randint(0, 3),
+            rng.uniform(-200, 200),
+            rng.uniform(0, 300),
+            rng.uniform(-60, 60),
+            rng.uniform(0, 300),
+            rng.uniform(-5, 5),
+        )
+        for i in range(n_objetivos)
+    )
+    trama = "{cmd:1,data:[" + objetivos + "]}"
+    if con_timestamp:
+        trama += "20215:04:33.123"
+    return trama
+
+
+def cargar_tramas(ruta: Path) -> list:
+    tramas = []
+    with ruta.open(encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.rstrip("\n")
+            if not linea:
+                continue
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                tramas.append(linea)
+                continue
+            if isinstance(registro, dict) and "raw" in registro:
+                tramas.append(registro["raw"])
+    return tramas
+
+
+def medir(funcion, tramas: list, repeticiones: int) -> tuple:
+    """Devuelve (microsegundos por trama, tramas fallidas)."""
+    fallidas = 0
+    validas = []
+    for raw in tramas:
+        try:
+            funcion(raw)
+            validas.append(raw)
+        except Exception:
+            fallidas += 1
+    if not validas:
+        return float("nan"), fallidas
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for raw in validas:
+            funcion(raw)
+        tiempos.append((time.perf_counter() - inicio) / len(validas))
+    return statistics.median(tiempos) * 1e6, fallidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("grabacion", nargs="?", type=Path, help="archivo con tramas grabadas")
+    parser.add_argument("--objetivos", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--tramas", type=int, default=200, help="tramas sintéticas por tamaño")
+    parser.add_argument("--repeticiones", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.grabacion:
+        conjuntos = {args.grabacion.name: cargar_tramas(args.grabacion)}
+    else:
+        rng = random.Random(0)
+        conjuntos = {
+            f"{n} objetivos": [trama_sintetica(n, False, rng) for _ in range(args.tramas)]
+            for n in args.objetivos
+        }
+        conjuntos["100 objetivos + timestamp"] = [
+            trama_sintetica(100, True, rng) for _ in range(args.tramas)
+        ]
+
+    if not verificar(conjuntos):
+        sys.exit("El decodificador no coincide con lo esperado")
+
+    print(f"{'conjunto':<28}{'regex+json (us)':>18}{'decodificador (us)':>21}{'x':>7}{'fallos antiguo':>16}")
+    for nombre, tramas in conjuntos.items():
+        antiguo, fallos_antiguo = medir(camino_antiguo, tramas, args.repeticiones)
+        nuevo, fallos_nuevo = medir(camino_nuevo, tramas, args.repeticiones)
+        if fallos_nuevo:
+            print(f"  ! el decodificador rechazó {fallos_nuevo} tramas de '{nombre}'")
+        mejora = antiguo / nuevo if nuevo == nuevo and antiguo == antiguo else float("nan")
+        print(f"{nombre:<28}{antiguo:>18.1f}{nuevo:>21.1f}{mejora:>7.2f}{fallos_antiguo:>16}")
+
+
+if __name__ == "__main__":
+    main()
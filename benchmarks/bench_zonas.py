@@ -0,0 +1,68 @@
+"""
+Compara el tiempo del índice espacial de zonas compiladas (services/zonas.py)
+con el del recorrido completo original. Que ambos eligen la misma zona lo
+verifica tests/test_zonas.py.
+
+Uso:
+    python benchmarks/bench_zonas.py
+    python benchmarks/bench_zonas.py --zonas 50 200 800 --vertices 12
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.geo import obtener_marco_local  # noqa: E402
+from services.zonas import IndiceZonas, compilar_zonas, zona_prioritaria_fuerza_bruta  # noqa: E402
+from tests._referencias import (  # noqa: E402
+    METROS_POR_GRADO_LATITUD,
+    RADAR_LAT,
+    RADAR_LON,
+    puntos_sinteticos,
+    zonas_sinteticas,
+)
+
+
+def medir(funcion, puntos: list, repeticiones: int) -> float:
+    """Microsegundos por punto (mediana de las repeticiones)."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for a, b in puntos:
+            funcion(a, b)
+        tiempos.append((time.perf_counter() - inicio) / len(puntos))
+    return statistics.median(tiempos) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zonas", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--vertices", type=int, default=8)
+    parser.add_argument("--puntos", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    puntos = puntos_sinteticos(args.puntos, rng)
+    marco = obtener_marco_local(RADAR_LAT, RADAR_LON, METROS_POR_GRADO_LATITUD)
+    este, norte = marco.a_local([p[0] for p in puntos], [p[1] for p in puntos])
+    puntos_locales = list(zip(este.tolist(), norte.tolist()))
+
+    print(f"{'zonas':>7}{'fuerza bruta (us)':>20}{'índice (us)':>14}{'x':>8}{'compilar (ms)':>15}")
+    for n_zonas in args.zonas:
+        zonas = zonas_sinteticas(n_zonas, args.vertices, rng)
+        inicio = time.perf_counter()
+        indice = IndiceZonas(compilar_zonas(zonas, marco))
+        compilar_ms = (time.perf_counter() - inicio) * 1e3
+
+        bruta = medir(lambda la, lo: zona_prioritaria_fuerza_bruta(la, lo, zonas), puntos, args.repeticiones)
+        rapida = medir(indice.zona_prioritaria, puntos_locales, args.repeticiones)
+        print(f"{n_zonas:>7}{bruta:>20.2f}{rapida:>14.2f}{bruta / rapida:>8.1f}{compilar_ms:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
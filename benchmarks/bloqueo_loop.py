@@ -0,0 +1,128 @@
+"""
+Verifica que las consultas a Mongo de database.py no bloquean el loop de asyncio.
+
+Ejecuta cada consulta (solo lecturas) de los repositorios mientras una sonda
+mide el retraso del loop; si alguna lo retrasa más que --umbral-ms, termina con
+error. Con --referencia-sync hace además la misma lectura con pymongo síncrono
+para ver cuánto bloquearía.
+
+Si Mongo no responde, avisa y termina sin error (no hay nada que medir);
+con --mongo-caido mide igual: las consultas fallan por timeout, pero el loop
+debe seguir libre mientras tanto. tests/test_bloqueo_loop.py verifica lo mismo
+(lecturas y escrituras) sin Mongo, contra servidores locales caídos o colgados.
+
+Uso:
+    python benchmarks/bloqueo_loop.py
+    python benchmarks/bloqueo_loop.py --uri mongodb://localhost:27017 --referencia-sync
+    python benchmarks/bloqueo_loop.py --mongo-caido
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+async def medir(nombre: str, corrutina, umbral_s: float, sonda) -> bool:
+    sonda.maximo_s = 0.0
+    inicio = time.perf_counter()
+    try:
+        await corrutina
+        resultado = "ok"
+    except Exception as e:
+        resultado = f"error: {type(e).__name__}"
+    duracion = time.perf_counter() - inicio
+    # Un ciclo más de la sonda para registrar un bloqueo al final de la llamada
+    await asyncio.sleep(sonda.intervalo_s * 2)
+    bloqueo = sonda.maximo_s
+    correcto = bloqueo <= umbral_s
+    print(f"{nombre:<34}{duracion * 1000:>12.1f}{bloqueo * 1000:>16.1f}  {'' if correcto else 'BLOQUEA  '}{resultado}")
+    return correcto
+
+
+async def mongo_disponible(client, espera_s: float = 2.0) -> bool:
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), espera_s)
+        return True
+    except Exception:
+        return False
+
+
+async def verificar_consultas(umbral_s: float, sonda) -> bool:
+    """Corre cada lectura de los repositorios con la sonda andando; True si ninguna bloqueó."""
+    from database import (
+        repositorio_alertas,
+        repositorio_configuracion,
+        repositorio_usuarios,
+        repositorio_zonas,
+    )
+
+    consultas = [
+        ("configuracion.sensores", repositorio_configuracion.sensores()),
+        ("configuracion.principal", repositorio_configuracion.principal()),
+        ("zonas.documentos", repositorio_zonas.documentos()),
+        ("zonas.listar", repositorio_zonas.listar()),
+        ("zonas.siguiente_id", repositorio_zonas.siguiente_id()),
+        ("alertas.listar", repositorio_alertas.listar(100)),
+        ("usuarios.listar", repositorio_usuarios.listar(100)),
+        ("usuarios.por_email", repositorio_usuarios.por_email("no-existe@ejemplo.cl")),
+    ]
+    print(f"{'consulta':<34}{'duración ms':>12}{'retraso loop ms':>16}")
+    correctas = [await medir(nombre, corrutina, umbral_s, sonda) for nombre, corrutina in consultas]
+    return all(correctas)
+
+
+async def principal(args):
+    from database import client
+    from services.metricas import SondaLoop
+
+    if not args.mongo_caido and not await mongo_disponible(client):
+        print("Mongo no responde: se omite la verificación (con --mongo-caido se mide igual)")
+        client.close()
+        return
+
+    sonda = SondaLoop(intervalo_s=0.005)
+    tarea_sonda = asyncio.create_task(sonda.ejecutar())
+    await asyncio.sleep(0.02)
+
+    umbral_s = args.umbral_ms / 1000
+    correcto = await verificar_consultas(umbral_s, sonda)
+
+    if args.referencia_sync:
+        from pymongo import MongoClient
+
+        sincrono = MongoClient(os.getenv("BDMONGO_URI"), serverSelectionTimeoutMS=int(os.getenv("MONGO_SELECCION_MS", 5000)))
+
+        async def lectura_sincrona():
+            # Así estaban las rutas antes: pymongo dentro de un 'async def'
+            sincrono.astradar.configuracion_radar.find_one({}, {"_id": 0})
+
+        print("referencia (no cuenta para el resultado):")
+        await medir("pymongo síncrono (find_one)", lectura_sincrona(), umbral_s, sonda)
+        sincrono.close()
+
+    tarea_sonda.cancel()
+    client.close()
+    if not correcto:
+        sys.exit(f"Alguna consulta retrasó el loop más de {args.umbral_ms} ms")
+    print(f"Ninguna consulta retrasó el loop más de {args.umbral_ms} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="URI de Mongo (por defecto BDMONGO_URI del .env)")
+    parser.add_argument("--umbral-ms", type=float, default=20.0)
+    parser.add_argument("--referencia-sync", action="store_true")
+    parser.add_argument("--mongo-caido", action="store_true", help="medir aunque Mongo no responda")
+    args = parser.parse_args()
+    if args.uri:
+        # database.py lee la URI al importarse; load_dotenv no pisa lo ya definido
+        os.environ["BDMONGO_URI"] = args.uri
+    asyncio.run(principal(args))
+
+
+if __name__ == "__main__":
+    main()
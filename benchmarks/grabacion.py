@@ -0,0 +1,284 @@
+"""
+Graba las tramas crudas de un radar y las vuelve a pasar por el sistema.
+
+    grabar    se conecta al radar y guarda cada trama con su hora de recepción
+    servir    levanta un websocket local que reemplaza a RADAR_WEBSOCKET_URL y
+              reproduce la grabación a 1x, Nx o a máxima velocidad
+    procesar  decodifica y procesa la grabación en este mismo proceso, sin red
+              ni base de datos (services/pipeline.py, el mismo procesamiento de
+              process_radar_logic) y mide tramas por segundo
+
+Uso:
+    python benchmarks/grabacion.py grabar grabaciones/incidente.jsonl --url ws://192.168.254.24:1883/
+    python benchmarks/grabacion.py servir grabaciones/incidente.jsonl --puerto 8765 --velocidad 4
+    python benchmarks/grabacion.py procesar grabaciones/incidente.jsonl --configuracion radar.json
+
+La grabación tiene un objeto JSON por línea: {"t": epoch de recepción,
+"sensor": id del radar, "raw": trama cruda} (bench_trama.py la lee tal cual).
+Para servir la grabación, RADAR_WEBSOCKET_URL (o la url del radar en
+configuracion_radar) apunta a ws://127.0.0.1:8765/.
+
+--configuracion es un JSON con uno o varios documentos de configuracion_radar
+(como los exporta mongoexport); sin él se usan --latitud, --longitud y
+--angulo para el radar principal.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import websockets  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+
+from services.eventos import crear_motor_eventos  # noqa: E402
+from services.geo import PROYECCION_PLANA, PROYECCIONES, obtener_marco_local  # noqa: E402
+from services.pipeline import PipelineRadar  # noqa: E402
+from services.registro import RegistroRadar  # noqa: E402
+from services.seguimiento import crear_tabla_tracks  # noqa: E402
+from services.sensores import SENSOR_PRINCIPAL, VistaSensores, sensores_desde_documentos  # noqa: E402
+from services.trama import TramaInvalida, decodificar_trama  # noqa: E402
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def cargar_grabacion(ruta: Path) -> list:
+    """Lista de (t, sensor, raw) en el orden de la grabación."""
+    tramas = []
+    with ruta.open(encoding="utf-8") as f:
+        for linea in f:
+            if not linea.strip():
+                continue
+            registro = json.loads(linea)
+            tramas.append((float(registro["t"]), str(registro.get("sensor") or SENSOR_PRINCIPAL), registro["raw"]))
+    if not tramas:
+        sys.exit(f"{ruta} no tiene tramas")
+    return tramas
+
+
+async def reproducir(tramas: list, velocidad: float):
+    """
+    Recorre la grabación respetando el tiempo entre tramas dividido por
+    'velocidad' (0 = sin esperas). Entrega (t, sensor, raw).
+    """
+    inicio_grabacion = tramas[0][0]
+    inicio = time.monotonic()
+    for t, sensor, raw in tramas:
+        if velocidad > 0:
+            espera = (t - inicio_grabacion) / velocidad - (time.monotonic() - inicio)
+            if espera > 0:
+                await asyncio.sleep(espera)
+        yield t, sensor, raw
+
+
+# --- grabar -----------------------------------------------------------------
+
+async def grabar(args):
+    salida = Path(args.archivo)
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    limite = time.monotonic() + args.duracion if args.duracion else None
+    grabadas = 0
+    with salida.open("a", encoding="utf-8") as f:
+        async with websockets.connect(args.url, ping_interval=30, ping_timeout=60) as radar_ws:
+            print(f"Grabando {args.url} en {salida} (Ctrl+C para terminar)")
+            while limite is None or time.monotonic() < limite:
+                try:
+                    if limite is None:
+                        raw = await radar_ws.recv()
+                    else:
+                        raw = await asyncio.wait_for(radar_ws.recv(), max(limite - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    break
+                except websockets.ConnectionClosed:
+                    print("El radar cerró la conexión")
+                    break
+                recibido = time.time()
+                if isinstance(raw, bytes):
+                    raw = raw.decode("utf-8", errors="replace")
+                f.write(json.dumps({"t": recibido, "sensor": args.sensor, "raw": raw}, ensure_ascii=False) + "\n")
+                grabadas += 1
+                if args.max_tramas and grabadas >= args.max_tramas:
+                    break
+                if grabadas % 100 == 0:
+                    f.flush()
+    print(f"{grabadas} tramas grabadas")
+
+
+# --- servir -----------------------------------------------------------------
+
+async def servir(args):
+    tramas = [trama for trama in cargar_grabacion(Path(args.archivo)) if args.sensor is None or trama[1] == args.sensor]
+    if not tramas:
+        sys.exit(f"La grabación no tiene tramas del radar '{args.sensor}'")
+
+    async def atender(websocket):
+        # Cada cliente recibe la grabación desde el principio
+        print(f"Cliente conectado: {websocket.remote_address}")
+        inicio = time.monotonic()
+        enviadas = 0
+        try:
+            while True:
+                async for _, _, raw in reproducir(tramas, args.velocidad):
+                    await websocket.send(raw)
+                    enviadas += 1
+                if not args.bucle:
+                    break
+        except websockets.ConnectionClosed:
+            pass
+        duracion = time.monotonic() - inicio
+        print(f"Cliente {websocket.remote_address}: {enviadas} tramas en {duracion:.1f}s")
+
+    async with websockets.serve(atender, args.host, args.puerto):
+        ritmo = "máxima velocidad" if args.velocidad <= 0 else f"{args.velocidad:g}x"
+        print(f"Sirviendo {len(tramas)} tramas en ws://{args.host}:{args.puerto}/ a {ritmo}")
+        await asyncio.Future()
+
+
+# --- procesar ---------------------------------------------------------------
+
+def cargar_sensores(args) -> dict:
+    if args.configuracion:
+        with open(args.configuracion, encoding="utf-8") as f:
+            documentos = json.load(f)
+        if isinstance(documentos, dict):
+            documentos = [documentos]
+    elif args.latitud is not None and args.longitud is not None:
+        documentos = [{
+            "sensor_id": SENSOR_PRINCIPAL,
+            "radar": {"latitud": args.latitud, "longitud": args.longitud, "angulo_rotacion": args.angulo},
+        }]
+    else:
+        sys.exit("Falta --configuracion o --latitud/--longitud del radar")
+    sensores = sensores_desde_documentos(documentos)
+    if not sensores:
+        sys.exit("La configuración no tiene ningún radar con posición")
+    return sensores
+
+
+def percentil(valores: list, p: float) -> float:
+    return valores[min(int(len(valores) * p), len(valores) - 1)]
+
+
+async def procesar(args):
+    tramas = cargar_grabacion(Path(args.archivo))
+    sensores = cargar_sensores(args)
+    with open(args.zonas, encoding="utf-8") as f:
+        zonas = json.load(f)
+
+    metros_por_grado = float(os.getenv("METROS_POR_GRADO_LATITUD", 111320))
+    origen = sensores.get(SENSOR_PRINCIPAL) or next(iter(sensores.values()))
+    registro = RegistroRadar()
+    marco = obtener_marco_local(origen.latitud, origen.longitud, metros_por_grado, args.proyeccion)
+    registro.cargar(zonas, sensores, marco)
+
+    # Sin escritores ni actor PTZ: nada sale del proceso
+    pipeline = PipelineRadar(
+        metros_por_grado,
+        crear_tabla_tracks(),
+        crear_motor_eventos(),
+        VistaSensores(float(os.getenv("RADAR_SENSOR_VIGENCIA_S", 2.0))),
+        horizonte_prediccion_s=float(os.getenv("SEGUIMIENTO_HORIZONTE_S", 1.0)),
+    )
+
+    salida_alertas = open(args.alertas, "w", encoding="utf-8") if args.alertas else None
+    tiempos_decodificar, tiempos_procesar = [], []
+    objetivos = alertas = invalidas = sin_sensor = 0
+    inicio = time.perf_counter()
+    try:
+        async for t, sensor_id, raw in reproducir(tramas, args.velocidad):
+            estado = registro.actual
+            sensor = estado.sensores.get(sensor_id)
+            if sensor is None:
+                sin_sensor += 1
+                continue
+            t0 = time.perf_counter()
+            try:
+                trama = decodificar_trama(raw)
+            except TramaInvalida:
+                invalidas += 1
+                continue
+            t1 = time.perf_counter()
+            if trama is None:
+                continue
+            # Los tiempos de la grabación (dt del Kalman, permanencia en zona)
+            # se conservan aunque se reproduzca más rápido
+            resultado = pipeline.procesar(trama.objetivos, sensor, estado, ahora=t)
+            t2 = time.perf_counter()
+
+            tiempos_decodificar.append(t1 - t0)
+            tiempos_procesar.append(t2 - t1)
+            objetivos += len(trama.objetivos)
+            alertas += len(resultado["alertas"])
+            if salida_alertas is not None:
+                for alerta in resultado["alertas"]:
+                    salida_alertas.write(json.dumps(alerta, ensure_ascii=False, default=str) + "\n")
+    finally:
+        if salida_alertas is not None:
+            salida_alertas.close()
+    duracion = time.perf_counter() - inicio
+
+    procesadas = len(tiempos_procesar)
+    if not procesadas:
+        sys.exit("No se procesó ninguna trama")
+    print(f"tramas procesadas     {procesadas} ({invalidas} inválidas, {sin_sensor} de radares sin configuración)")
+    print(f"objetivos / trama     {objetivos / procesadas:.1f}")
+    print(f"alertas               {alertas}")
+    print(f"tramas/s              {procesadas / duracion:.0f}")
+    print(f"grabación             {tramas[-1][0] - tramas[0][0]:.1f}s reproducidos en {duracion:.1f}s")
+    print(f"{'etapa':<14}{'media ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for nombre, tiempos in (("decodificar", tiempos_decodificar), ("procesar", tiempos_procesar)):
+        ordenados = sorted(tiempos)
+        print(
+            f"{nombre:<14}{statistics.fmean(ordenados) * 1000:>10.3f}"
+            f"{percentil(ordenados, 0.5) * 1000:>10.3f}{percentil(ordenados, 0.99) * 1000:>10.3f}"
+        )
+
+
+def main():
+    load_dotenv(RAIZ / ".env")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p = comandos.add_parser("grabar", help="graba las tramas crudas de un radar")
+    p.add_argument("archivo")
+    p.add_argument("--url", default=os.getenv("RADAR_WEBSOCKET_URL"))
+    p.add_argument("--sensor", default=SENSOR_PRINCIPAL, help="id del radar que se graba")
+    p.add_argument("--duracion", type=float, default=0, help="segundos (0 = hasta Ctrl+C)")
+    p.add_argument("--max-tramas", type=int, default=0)
+
+    p = comandos.add_parser("servir", help="reproduce la grabación en un websocket local")
+    p.add_argument("archivo")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--puerto", type=int, default=8765)
+    p.add_argument("--velocidad", type=float, default=1.0, help="1 = tiempo real, N = N veces más rápido, 0 = máxima")
+    p.add_argument("--sensor", help="solo las tramas de este radar")
+    p.add_argument("--bucle", action="store_true", help="repetir la grabación indefinidamente")
+
+    p = comandos.add_parser("procesar", help="procesa la grabación en este proceso y mide tramas/s")
+    p.add_argument("archivo")
+    p.add_argument("--velocidad", type=float, default=0.0, help="1 = tiempo real, N = N veces más rápido, 0 = máxima")
+    p.add_argument("--configuracion", help="JSON con los documentos de configuracion_radar")
+    p.add_argument("--latitud", type=float)
+    p.add_argument("--longitud", type=float)
+    p.add_argument("--angulo", type=float, default=0.0, help="angulo_rotacion del radar principal")
+    p.add_argument("--zonas", default=str(RAIZ / "zonas.json"))
+    p.add_argument("--alertas", help="guarda las alertas generadas en este JSONL")
+    p.add_argument("--proyeccion", choices=PROYECCIONES, default=os.getenv("RADAR_PROYECCION", PROYECCION_PLANA),
+                   help="marco local: plana o aeqd (geodésica)")
+
+    args = parser.parse_args()
+    if args.comando == "grabar" and not args.url:
+        sys.exit("Falta --url (o RADAR_WEBSOCKET_URL en el .env)")
+    try:
+        asyncio.run({"grabar": grabar, "servir": servir, "procesar": procesar}[args.comando](args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Error de posición de las proyecciones de services/geo.py contra la geodésica.
+
+El radar mide distancia y azimut; la posición verdadera de un objetivo es la
+geodésica (WGS84) desde el radar con ese azimut y esa distancia. Para cada
+distancia se prueban todos los azimuts y se reporta el error (en metros) de la
+proyección plana (METROS_POR_GRADO_LATITUD fijo) y de la azimutal equidistante
+(RADAR_PROYECCION=aeqd). También cuenta cuántos puntos cambian de zona entre
+una y otra con las zonas del archivo.
+
+Uso:
+    python benchmarks/precision_geo.py
+    python benchmarks/precision_geo.py --latitud -41.46 --longitud -72.98 --distancias 500 1000 2000 3000
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from pyproj import Geod  # noqa: E402
+
+from services.geo import PROYECCION_AEQD, PROYECCION_PLANA, obtener_marco_local  # noqa: E402
+from services.zonas import IndiceZonas, compilar_zonas  # noqa: E402
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def errores(marco, geod: Geod, distancia: float, azimuts: np.ndarray) -> np.ndarray:
+    """Metros entre la posición verdadera y la que da el marco, por azimut."""
+    n = len(azimuts)
+    lon_real, lat_real, _ = geod.fwd(
+        np.full(n, marco.radar_lon), np.full(n, marco.radar_lat), azimuts, np.full(n, distancia)
+    )
+    rad = np.radians(azimuts)
+    latitudes, longitudes = marco.a_geografico(distancia * np.sin(rad), distancia * np.cos(rad))
+    _, _, error = geod.inv(lon_real, lat_real, longitudes, latitudes)
+    return np.abs(error), lat_real, lon_real
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latitud", type=float, default=-41.462296967669154)
+    parser.add_argument("--longitud", type=float, default=-72.98740792932408)
+    parser.add_argument("--metros-por-grado", type=float, default=float(os.getenv("METROS_POR_GRADO_LATITUD", 111320)))
+    parser.add_argument("--distancias", type=float, nargs="+", default=[250, 500, 1000, 1500, 2000, 3000])
+    parser.add_argument("--azimuts", type=int, default=360, help="azimuts por distancia")
+    parser.add_argument("--zonas", default=str(RAIZ / "zonas.json"))
+    args = parser.parse_args()
+
+    geod = Geod(ellps="WGS84")
+    azimuts = np.linspace(0.0, 360.0, args.azimuts, endpoint=False)
+    plana = obtener_marco_local(args.latitud, args.longitud, args.metros_por_grado, PROYECCION_PLANA)
+    aeqd = obtener_marco_local(args.latitud, args.longitud, args.metros_por_grado, PROYECCION_AEQD)
+
+    indice = None
+    if Path(args.zonas).exists():
+        with open(args.zonas, encoding="utf-8") as f:
+            zonas = json.load(f)
+        # Las zonas se compilan en el marco verdadero (aeqd) y se compara qué zona
+        # toca a cada punto según cada proyección
+        indice = IndiceZonas(compilar_zonas(zonas, aeqd))
+
+    print(f"radar ({args.latitud}, {args.longitud}), {args.metros_por_grado:.0f} m/grado, {args.azimuts} azimuts por distancia")
+    print(f"{'distancia m':>12}{'plana máx m':>14}{'plana media m':>15}{'aeqd máx m':>13}{'cambian zona':>14}")
+    for distancia in args.distancias:
+        error_plana, lat_real, lon_real = errores(plana, geod, distancia, azimuts)
+        error_aeqd, _, _ = errores(aeqd, geod, distancia, azimuts)
+        cambios = "-"
+        if indice is not None:
+            rad = np.radians(azimuts)
+            lat_plana, lon_plana = plana.a_geografico(distancia * np.sin(rad), distancia * np.cos(rad))
+            este_real, norte_real = aeqd.a_local(lat_real, lon_real)
+            este_plana, norte_plana = aeqd.a_local(lat_plana, lon_plana)
+            cambios = sum(
+                indice.zona_prioritaria(er, nr) is not indice.zona_prioritaria(ep, np_)
+                for er, nr, ep, np_ in zip(este_real.tolist(), norte_real.tolist(), este_plana.tolist(), norte_plana.tolist())
+            )
+        print(
+            f"{distancia:>12.0f}{error_plana.max():>14.2f}{error_plana.mean():>15.2f}"
+            f"{error_aeqd.max():>13.4f}{cambios:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,166 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import DESCENDING, ReturnDocument
+from typing import Optional
+from bson import ObjectId
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from services.configuracion import ServicioConfiguracion
+from services.sensores import SENSOR_PRINCIPAL
 
 # Cargar variables de entorno
-env_path = Path(__file__).parent.parent / ".env"
+env_path = Path(__file__).parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
 # URL de conexión a MongoDB desde .env
 MONGODB_URI = os.getenv("BDMONGO_URI")  # Asegúrate de que esta variable existe en tu .env
 
-# Cliente de MongoDB
-client = AsyncIOMotorClient(MONGODB_URI)
+# Cliente de MongoDB: uno solo para toda la app (rutas, tarea del radar y escritores).
+# Motor hace la E/S fuera del loop, así ninguna consulta detiene la difusión del radar.
+# El pool alcanza para los change streams (1 conexión cada uno), los escritores en
+# lotes y las consultas de la API; los timeouts cortos hacen que un Mongo caído se
+# note como error en segundos en vez de dejar peticiones colgadas.
+client = AsyncIOMotorClient(
+    MONGODB_URI,
+    maxPoolSize=int(os.getenv("MONGO_MAX_POOL", 20)),
+    minPoolSize=int(os.getenv("MONGO_MIN_POOL", 2)),
+    maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_MS", 60000)),
+    waitQueueTimeoutMS=int(os.getenv("MONGO_ESPERA_POOL_MS", 5000)),
+    serverSelectionTimeoutMS=int(os.getenv("MONGO_SELECCION_MS", 5000)),
+    connectTimeoutMS=int(os.getenv("MONGO_CONEXION_MS", 5000)),
+    socketTimeoutMS=int(os.getenv("MONGO_SOCKET_MS", 20000)),
+)
 
 # Accede a la base de datos "astradar"
 db = client.astradar
 
+
+def _id_a_texto(documento: Optional[dict]) -> Optional[dict]:
+    """ObjectId -> str para que FastAPI lo pueda serializar."""
+    if documento and "_id" in documento:
+        documento["_id"] = str(documento["_id"])
+    return documento
+
+
+# El documento original del radar principal no tiene 'sensor_id' (así lo
+# escribe /configurar_radar); services/sensores.py también acepta "principal"
+FILTRO_PRINCIPAL = {"$or": [{"sensor_id": {"$exists": False}}, {"sensor_id": SENSOR_PRINCIPAL}]}
+
+
+class RepositorioConfiguracion:
+    """Colección 'configuracion_radar': un documento por radar."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.coleccion = db.configuracion_radar
+
+    async def sensores(self) -> list:
+        """Todos los documentos de radares (con _id, para el registro)."""
+        return await self.coleccion.find({}).to_list(None)
+
+    async def principal(self) -> Optional[dict]:
+        """El documento del radar principal, sin _id (no el de un radar secundario)."""
+        return await self.coleccion.find_one(FILTRO_PRINCIPAL, {"_id": 0})
+
+    async def actualizar(self, filtro: dict, campos: dict) -> Optional[dict]:
+        """$set de 'campos' (con upsert) y devuelve el documento ya actualizado."""
+        return await self.coleccion.find_one_and_update(
+            filtro, {"$set": campos}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+
+
+class RepositorioZonas:
+    """Colección 'zonas' de detección."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.coleccion = db.zonas
+
+    async def documentos(self) -> list:
+        """Todas las zonas con su _id (el registro las identifica por _id)."""
+        return await self.coleccion.find({}).to_list(None)
+
+    async def listar(self) -> list:
+        """Todas las zonas, sin _id (para la API)."""
+        return await self.coleccion.find({}, {"_id": 0}).to_list(None)
+
+    async def siguiente_id(self) -> int:
+        """El 'id' que le corresponde a una zona nueva (el de la última + 1)."""
+        ultima = await self.coleccion.find_one({}, {"id": 1}, sort=[("_id", DESCENDING)])
+        if ultima and "id" in ultima:
+            return int(ultima["id"]) + 1
+        return 1
+
+    async def crear(self, zona: dict) -> dict:
+        """Inserta la zona; el diccionario queda con su _id, como lo verá el change stream."""
+        await self.coleccion.insert_one(zona)
+        return zona
+
+    async def eliminar(self, zona_id: int) -> bool:
+        resultado = await self.coleccion.delete_one({"id": zona_id})
+        return resultado.deleted_count > 0
+
+
+class RepositorioAlertas:
+    """Colección 'alertas' (se escribe en lotes con services/alertas.py)."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.coleccion = db.alertas
+
+    async def listar(self, limite: int = 1000) -> list:
+        """Las alertas más recientes primero."""
+        cursor = self.coleccion.find({}).sort("_id", DESCENDING).limit(limite)
+        return [_id_a_texto(alerta) async for alerta in cursor]
+
+
+class RepositorioUsuarios:
+    """Colección 'usuarios'."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.coleccion = db.usuarios
+
+    async def listar(self, limite: int = 1000) -> list:
+        return await self.coleccion.find().to_list(limite)
+
+    async def por_email(self, email: str) -> Optional[dict]:
+        return await self.coleccion.find_one({"email": email})
+
+    async def por_id(self, object_id: ObjectId) -> Optional[dict]:
+        return await self.coleccion.find_one({"_id": object_id})
+
+    async def crear(self, usuario: dict) -> dict:
+        resultado = await self.coleccion.insert_one(usuario)
+        return await self.coleccion.find_one({"_id": resultado.inserted_id})
+
+    async def actualizar(self, object_id: ObjectId, campos: dict) -> Optional[dict]:
+        """Devuelve el usuario actualizado, o None si no existe."""
+        return await self.coleccion.find_one_and_update(
+            {"_id": object_id}, {"$set": campos}, return_document=ReturnDocument.AFTER
+        )
+
+    async def eliminar(self, object_id: ObjectId) -> bool:
+        resultado = await self.coleccion.delete_one({"_id": object_id})
+        return resultado.deleted_count > 0
+
+
+repositorio_configuracion = RepositorioConfiguracion(db)
+repositorio_zonas = RepositorioZonas(db)
+repositorio_alertas = RepositorioAlertas(db)
+repositorio_usuarios = RepositorioUsuarios(db)
+
+# Posición y ángulo del radar principal: se carga en el lifespan (main.py), no al importar
+# RADAR_PROYECCION: "plana" (metros por grado fijos) o "aeqd" (geodésica, pyproj)
+configuracion_radar = ServicioConfiguracion(
+    repositorio_configuracion.principal,
+    float(os.getenv("METROS_POR_GRADO_LATITUD")),
+    os.getenv("RADAR_PROYECCION", "plana"),
+)
+
+
 async def get_db_mongo() -> AsyncIOMotorDatabase:
     """
     Provee una conexión asíncrona a la base de datos de MongoDB.
     """
-    return db
\ No newline at end of file
+    return db
+
+async def get_repositorio_usuarios() -> RepositorioUsuarios:
+    """Dependencia de FastAPI para las rutas de usuarios y autenticación."""
+    return repositorio_usuarios
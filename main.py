@@ -1,23 +1,64 @@
+import time
+_inicio_importacion = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from routes.Radar import radar_listener_task
+from database import configuracion_radar
+from routes.Radar import (
+    radar_listener_task, vigilar_cambios_radar, recargar_registro, escritor_alertas,
+    historial_tracks, sonda_loop, actor_ptz, tiempos_arranque,
+)
 import asyncio
+import importlib
+import os
+
+# Espera máxima de cada carga del arranque; si Mongo no responde, el servidor
+# arranca igual y la tarea del radar reintenta la carga cada 5 s
+ARRANQUE_TIMEOUT_S = float(os.getenv("ARRANQUE_TIMEOUT_S", 10))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Iniciando servidor: Conectando con la tarea del radar...")
     
+    # La configuración se lee aquí una sola vez (importar la app no toca Mongo)
+    cargas = [
+        tiempos_arranque.medir("configuracion", configuracion_radar.cargar(), ARRANQUE_TIMEOUT_S),
+        tiempos_arranque.medir("registro", recargar_registro(), ARRANQUE_TIMEOUT_S),
+    ]
+    if actor_ptz is not None:
+        # El modelo de la cámara usa pyproj: se importa aquí y no con el primer objetivo
+        cargas.append(tiempos_arranque.medir("pyproj", asyncio.to_thread(importlib.import_module, "pyproj")))
+    await asyncio.gather(*cargas)
+    print(tiempos_arranque.reporte(time.perf_counter() - _inicio_importacion))
+    
     radar_task = asyncio.create_task(radar_listener_task())
+    cambios_task = asyncio.create_task(vigilar_cambios_radar())
+    alertas_task = asyncio.create_task(escritor_alertas.ejecutar())
+    historial_task = asyncio.create_task(historial_tracks.ejecutar())
+    sonda_task = asyncio.create_task(sonda_loop.ejecutar())
     
     yield
     
     print("Apagando servidor: Cancelando tarea del radar...")
+    sonda_task.cancel()
+    cambios_task.cancel()
     radar_task.cancel()
     try:
         await radar_task
     except asyncio.CancelledError:
         print("Tarea del radar cancelada correctamente.")
+    
+    # Guardar las alertas y el historial que quedaron en cola antes de salir
+    for escritor, tarea in ((escritor_alertas, alertas_task), (historial_tracks, historial_task)):
+        tarea.cancel()
+        try:
+            await tarea
+        except asyncio.CancelledError:
+            pass
+        await escritor.vaciar()
+    if actor_ptz is not None:
+        await actor_ptz.detener()
         
 app = FastAPI(lifespan=lifespan)
 
@@ -31,4 +72,6 @@ app.add_middleware(
 
 # Cargar rutas a app
 from routes import api_router
-app.include_router(api_router)
\ No newline at end of file
+app.include_router(api_router)
+
+tiempos_arranque.registrar("importacion", time.perf_counter() - _inicio_importacion)
\ No newline at end of file
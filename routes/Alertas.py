@@ -1,20 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from database import get_db_mongo
-from pymongo import MongoClient
-import os
+from fastapi import APIRouter
+from database import repositorio_alertas
 
 router = APIRouter()
 
-DBMONGO_URI = MongoClient(os.getenv("BDMONGO_URI"))
-ASTRADAR_BD = DBMONGO_URI["astradar"]
-ALERTAS_COLLECTION = ASTRADAR_BD["alertas"]
-
 @router.get("/alertas")
-async def obtener_alertas():
-    #mostrar todas las alertas
+async def obtener_alertas(limite: int = 1000):
+    #mostrar las alertas, las más recientes primero
     return {
-        "alertas": ALERTAS_COLLECTION.find()
+        "alertas": await repositorio_alertas.listar(limite)
     }
-    
\ No newline at end of file
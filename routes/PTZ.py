@@ -1,9 +1,9 @@
 from fastapi import HTTPException, APIRouter
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from onvif import ONVIFCamera
 from typing import Optional
 from . import Estado as state
+import json
 import os
 import sys
 import time
@@ -28,6 +28,25 @@ CAMERAS = {
     },
 }
 
+# Cámaras adicionales (PTZ_CAMARAS_ARCHIVO): lista JSON con la conexión ONVIF y
+# la ubicación de cada una, p.ej.
+#   [{"id": "camara_muelle", "name": "Camara Muelle", "ip": "...", "port": 80,
+#     "user": "...", "password": "...", "latitud": -41.46, "longitud": -72.98,
+#     "altitud_m": 40, "rumbo_grados": 90, "alcance_m": 800}]
+# El seguimiento automático reparte los objetivos entre todas
+# (routes/TrackPTZ.py y services/asignacion.py). El "id" es la clave de la cámara
+# en CAMERAS (y en /ptz/{camera_id}); no puede repetirse ni ser "camara_principal".
+CAMARAS_ARCHIVO = os.getenv("PTZ_CAMARAS_ARCHIVO")
+if CAMARAS_ARCHIVO:
+    with open(CAMARAS_ARCHIVO, encoding="utf-8") as f:
+        for camara in json.load(f):
+            camara_id = camara.get("id")
+            if not isinstance(camara_id, str) or not camara_id:
+                sys.exit(f"Error crítico: cámara sin 'id' en {CAMARAS_ARCHIVO}: {camara.get('name', camara)}")
+            if camara_id in CAMERAS:
+                sys.exit(f"Error crítico: id de cámara repetido en {CAMARAS_ARCHIVO}: '{camara_id}'")
+            CAMERAS[camara_id] = camara
+
 # --- Objeto global para la cámara ---
 # Se inicializará en None y se conectará al iniciar la app.
 camera_services = {
@@ -39,6 +58,9 @@ CONNECTED_CAMERAS = {}
 
 @router.on_event("startup")
 def startup_event():
+    # onvif (y zeep) solo se importan si se van a conectar las cámaras
+    from onvif import ONVIFCamera
+
     print("🚀 Iniciando conexión con todas las cámaras configuradas...")
     for cam_id, config in CAMERAS.items():
         try:
@@ -193,6 +215,13 @@ class AbsoluteMoveRequest(BaseModel):
 @router.post("/cameras/absolute_move")
 def absolute_move_camera(camera_id, move: AbsoluteMoveRequest):
     state.set_manual_override()
+    return enviar_absolute_move(camera_id, move)
+
+def enviar_absolute_move(camera_id, move: AbsoluteMoveRequest):
+    """
+    Envía el AbsoluteMove a la cámara sin tocar el control manual.
+    Es la llamada que usa el seguimiento automático del radar.
+    """
     ptz, token = get_camera_services(camera_id)
 
     # Create the request object from the WSDL
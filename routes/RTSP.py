@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
-import cv2
+from functools import lru_cache
 import asyncio
 
 
@@ -15,14 +15,32 @@ CAMERA_URLS = {
     # Puedes añadir más cámaras aquí: "3": "rtsp://..."
 }
 
-# Diccionario para mantener los objetos de captura de video
-cameras = {id: cv2.VideoCapture(url) for id, url in CAMERA_URLS.items()}
+# Diccionario para mantener los objetos de captura de video. Cada cámara se abre
+# con su primer cliente (no al importar: abrir un RTSP puede tardar segundos)
+cameras = {}
+
+
+@lru_cache(maxsize=1)
+def obtener_cv2():
+    """OpenCV se importa con el primer video pedido, no con el módulo."""
+    import cv2
+
+    return cv2
+
+
+async def abrir_camara(camera_id: str):
+    camera = cameras.get(camera_id)
+    if camera is None:
+        cv2 = await asyncio.to_thread(obtener_cv2)
+        camera = cameras[camera_id] = await asyncio.to_thread(cv2.VideoCapture, CAMERA_URLS[camera_id])
+    return camera
 
 
 # --- Lógica de Streaming ---
 async def generate_frames(camera_id: str):
-    camera = cameras.get(camera_id)
+    camera = await abrir_camara(camera_id)
     url = CAMERA_URLS.get(camera_id)
+    cv2 = obtener_cv2()
 
     if not camera or not camera.isOpened():
         print(f"Error: No se pudo abrir la cámara {camera_id}.")
@@ -35,7 +53,7 @@ async def generate_frames(camera_id: str):
                 f"Cámara {camera_id}: No se pudo leer el frame, reintentando conexión..."
             )
             camera.release()
-            camera.open(url)
+            await asyncio.to_thread(camera.open, url)
             await asyncio.sleep(2)  # Espera un poco más antes de reintentar
             continue
         else:
@@ -56,7 +74,7 @@ async def generate_frames(camera_id: str):
 # --- Rutas de la API (Endpoints) ---
 @router.get("/video_feed/{camera_id}")
 async def video_feed(camera_id: str):
-    if camera_id not in cameras:
+    if camera_id not in CAMERA_URLS:
         raise HTTPException(status_code=404, detail="Cámara no encontrada")
 
     return StreamingResponse(
@@ -67,7 +85,7 @@ async def video_feed(camera_id: str):
 
 @router.get("/")
 def read_root():
-    available_feeds = [f"/video_feed/{id}" for id in cameras.keys()]
+    available_feeds = [f"/video_feed/{id}" for id in CAMERA_URLS.keys()]
     return {
         "message": "Servidor de streaming funcionando.",
         "feeds_disponibles": available_feeds,
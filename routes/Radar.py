@@ -1,83 +1,118 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv, set_key, find_dotenv
-from pymongo import MongoClient
 from pydantic import BaseModel
 from typing import List, Optional
-from .TrackPTZ import radar_websocket_client
+from services.trama import decodificar_trama, TramaInvalida
+from services.geo import obtener_marco_local, vertices_cobertura
+from services.zonas import (
+    PRIORIDAD_ZONAS,
+    punto_en_poligono,
+    calcular_centroide_zona,
+    detectar_severidad_por_nombre,
+)
+from services.registro import RegistroRadar
+from services.sensores import APERTURA_COBERTURA_GRADOS, SENSOR_PRINCIPAL, VistaSensores, sensor_desde_documento, sensores_desde_documentos
+from services.alertas import crear_escritor_alertas
+from services.eventos import crear_motor_eventos
+from services.seguimiento import crear_tabla_tracks
+from services.historial import crear_historial_tracks
+from services.pipeline import PipelineRadar
+from services.metricas import MetricasIngesta, SondaLoop, TextoPrometheus, TiemposArranque, texto_metricas
+from services.difusion import crear_connection_manager
+from services.suscripciones import Suscripcion, SuscripcionInvalida
+from database import db, configuracion_radar, repositorio_configuracion, repositorio_zonas
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import websockets
 import asyncio
 import os
 import json
-import re
 import math
+import time
 
 router = APIRouter()
 load_dotenv() 
 
-# URL del endpoint del radar
+# URL del endpoint del radar principal (los demás radares la traen en su configuración)
 RADAR_WEBSOCKET_URL = os.getenv("RADAR_WEBSOCKET_URL")
 
-DBMONGO_URI = MongoClient(os.getenv("BDMONGO_URI"))
-ASTRADAR_BD = DBMONGO_URI["astradar"]
-DATA_COLLECTION = ASTRADAR_BD["data"]
-CONFIGURACION_DATA_COLLECTION = ASTRADAR_BD["configuracion_radar"]
-ZONAS_COLLECTION = ASTRADAR_BD["zonas"]
-ALERTAS_COLLECTION = ASTRADAR_BD["alertas"]
-
-# Posición del radar
-RADAR_LAT = CONFIGURACION_DATA_COLLECTION.find_one({}, {"_id": 0})["radar"].get("latitud") #float(os.getenv("RADAR_LAT"))
-RADAR_LON = CONFIGURACION_DATA_COLLECTION.find_one({}, {"_id": 0})["radar"].get("longitud")#float(os.getenv("RADAR_LON"))
-RADAR_RADIO_M = CONFIGURACION_DATA_COLLECTION.find_one({}, {"_id": 0})["radar"].get("radar_radio_m")#float(os.getenv("RADAR_RADIO_M")) 
-METROS_POR_GRADO_LATITUD = float(os.getenv("METROS_POR_GRADO_LATITUD"))
-ANGULO_ROTACION = CONFIGURACION_DATA_COLLECTION.find_one({}, {"_id": 0})["radar"].get("angulo_rotacion") #float(os.getenv("ANGULO_ROTACION"))
-GRADO_INCLINACION = 40
-
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                # Si falla, el cliente probablemente se desconectó
-                pass
-
-manager = ConnectionManager()
+# Decodificar las tramas de cada radar en un proceso propio (RADAR_DECODIFICAR_EN_PROCESO=1)
+DECODIFICAR_EN_PROCESO = os.getenv("RADAR_DECODIFICAR_EN_PROCESO", "0") == "1"
+
+# La posición del radar principal ya no se lee al importar: 'configuracion_radar'
+# (database.py) se carga en el lifespan y sigue los cambios del registro
+METROS_POR_GRADO_LATITUD = configuracion_radar.metros_por_grado_latitud
+# Proyección del marco local de las zonas y de la conversión de cada trama (RADAR_PROYECCION)
+PROYECCION = configuracion_radar.proyeccion
+
+# Seguimiento con la cámara PTZ (PTZ_HABILITADO=0 lo desactiva: no se importa
+# routes/TrackPTZ.py, y con él pyproj y onvif/zeep)
+PTZ_HABILITADO = os.getenv("PTZ_HABILITADO", "1") == "1"
+if PTZ_HABILITADO:
+    from .TrackPTZ import actor_ptz, planificador_camaras
+else:
+    actor_ptz = planificador_camaras = None
+
+# Duración de cada paso del arranque (main.py), también en /api/metrics
+tiempos_arranque = TiemposArranque()
+
+# Cada cliente de /api/radar tiene su propia cola y tarea de envío
+manager = crear_connection_manager()
+
+# Las alertas se guardan en lotes desde una tarea aparte (cliente Motor, no bloqueante)
+escritor_alertas = crear_escritor_alertas(db.alertas)
+
+# Estado de cada par (objetivo, zona): las alertas son eventos de entrada/permanencia/salida
+motor_eventos = crear_motor_eventos()
+
+# Track por objetivo (Kalman de velocidad constante): posición suavizada, velocidad,
+# rumbo y posición prevista a SEGUIMIENTO_HORIZONTE_S. Con PTZ_ANTICIPAR=1 la cámara
+# apunta a la posición prevista (se adelanta a los botes en movimiento); por
+# defecto apunta a la posición medida, como antes.
+tabla_tracks = crear_tabla_tracks()
+HORIZONTE_PREDICCION_S = float(os.getenv("SEGUIMIENTO_HORIZONTE_S", 1.0))
+PTZ_ANTICIPAR = os.getenv("PTZ_ANTICIPAR", "0") == "1"
+
+# Recorrido de cada track en la colección 'data' (time-series, submuestreado, con TTL)
+historial_tracks = crear_historial_tracks(db.data)
+
+# Vista combinada de todos los radares que se difunde a los clientes
+vista_sensores = VistaSensores(float(os.getenv("RADAR_SENSOR_VIGENCIA_S", 2.0)))
+
+# Latencias por etapa y contadores de la ingesta, expuestos en /api/metrics
+metricas_ingesta = MetricasIngesta()
+# Retraso del loop: cualquier llamada bloqueante (p.ej. a la base de datos) se ve aquí
+sonda_loop = SondaLoop()
+
+# Procesamiento de cada trama (services/pipeline.py) con los destinos del servidor
+pipeline_radar = PipelineRadar(
+    METROS_POR_GRADO_LATITUD,
+    tabla_tracks,
+    motor_eventos,
+    vista_sensores,
+    escritor_alertas=escritor_alertas,
+    historial_tracks=historial_tracks,
+    actor_ptz=actor_ptz,
+    planificador_camaras=planificador_camaras,
+    horizonte_prediccion_s=HORIZONTE_PREDICCION_S,
+    ptz_anticipar=PTZ_ANTICIPAR,
+    etapas=metricas_ingesta.etapas,
+)
+
+# /solo_punto: primer objetivo de cada trama del radar principal, con historial acotado
+manager_solo_punto = crear_connection_manager()
+historial_primer_punto = deque(maxlen=int(os.getenv("SOLO_PUNTO_HISTORIAL", 100)))
 
 # Funcion encargada de convertir los puntos cardinales en latitud y longitud
 # Los datos transformados dependen totalmente de la latidud y longitud del radar
+# (la instantánea vigente de configuracion_radar, con los metros por grado ya calculados)
 def convertir_cartesiano_a_geografico(x_meters: float, y_meters: float) -> tuple:
-    delta_lat = y_meters / METROS_POR_GRADO_LATITUD
-    
-    lat_rad = math.radians(RADAR_LAT)
-    meters_per_lon_degree = METROS_POR_GRADO_LATITUD * math.cos(lat_rad)
-    delta_lon = x_meters / meters_per_lon_degree
-    
-    new_lat = RADAR_LAT + delta_lat
-    new_lon = RADAR_LON + delta_lon
-    
-    return (new_lat, new_lon)
+    return configuracion_radar.actual.transformacion.marco.a_geografico_punto(x_meters, y_meters)
 
 def convertir_cartesiano_a_geografico_configuracion(x_meters: float, y_meters: float, posiciones: dict) -> tuple:
-    delta_lat = y_meters / METROS_POR_GRADO_LATITUD
-    
-    lat_rad = math.radians(posiciones["radar_lat"])
-    meters_per_lon_degree = METROS_POR_GRADO_LATITUD * math.cos(lat_rad)
-    delta_lon = x_meters / meters_per_lon_degree
-    
-    new_lat = posiciones["radar_lat"] + delta_lat
-    new_lon = posiciones["radar_lon"] + delta_lon
-    
-    return (new_lat, new_lon)
+    marco = obtener_marco_local(posiciones["radar_lat"], posiciones["radar_lon"], METROS_POR_GRADO_LATITUD, PROYECCION)
+    return marco.a_geografico_punto(x_meters, y_meters)
 
 # Mueve la función de rotación a un lugar reutilizable
 def rotate_point(x, y, angle_degrees):
@@ -103,247 +138,205 @@ def calcular_vertices_poligono(
 ) -> list:
     """
     Calcula los tres vértices del polígono de detección del radar en forma de cono.
+    Sin 'posiciones' usa la posición de la configuración vigente.
     """
-    # Convierte el alcance del radar a un nombre más claro
-    alcance_radar = RADAR_RADIO_M
-    
-    # El primer vértice es el centro del radar (0,0) en coordenadas cartesianas
-    vertices = [(0, 0)]
-
-    # Calcula los ángulos de inicio y fin del cono.
-    # El ángulo de rotación se aplica al centro del cono.
-    angulo_inicio = ANGULO_ROTACION - ANGULO_APERTURA / 2
-    angulo_fin = ANGULO_ROTACION + ANGULO_APERTURA / 2
-
-    # Calcula las coordenadas cartesianas del segundo y tercer vértice.
-    # Vértice 2: punto en el límite del alcance con el ángulo de inicio.
-    x2 = alcance_radar * math.cos(math.radians(90 - angulo_inicio))
-    y2 = alcance_radar * math.sin(math.radians(90 - angulo_inicio))
-    vertices.append((x2, y2))
-    
-    # Vértice 3: punto en el límite del alcance con el ángulo de fin.
-    x3 = alcance_radar * math.cos(math.radians(90 - angulo_fin))
-    y3 = alcance_radar * math.sin(math.radians(90 - angulo_fin))
-    vertices.append((x3, y3))
-    
-    rotated_vertices_geographic = []
-    
-    for x, y in vertices:
-        # Convierte el vértice cartesiano a coordenadas geográficas
-        if posiciones:
-            lat, lon = convertir_cartesiano_a_geografico_configuracion(x, y, posiciones)
-        else:
-            lat, lon = convertir_cartesiano_a_geografico(x, y)
-        
-        rotated_vertices_geographic.append([lat, lon])
+    if posiciones:
+        marco = obtener_marco_local(posiciones["radar_lat"], posiciones["radar_lon"], METROS_POR_GRADO_LATITUD, PROYECCION)
+    else:
+        marco = configuracion_radar.actual.transformacion.marco
+    return [list(vertice) for vertice in vertices_cobertura(marco, RADAR_RADIO_M, ANGULO_ROTACION, ANGULO_APERTURA)]
 
-    return rotated_vertices_geographic
 
 
+def publicar_estado(estado):
+    """Con cada estado nuevo del registro: configuración del radar principal y categorías de zonas para las suscripciones."""
+    configuracion_radar.desde_estado(estado)
+    manager.usar_zonas(estado.indice.zonas)
 
-def punto_en_poligono(point: tuple, polygon: list) -> bool:
-    """
-    Verifica si un punto (lat, lon) está dentro de un polígono.
-    Implementa el algoritmo de cruce de rayos (Ray Casting).
-    """
-    x, y = point
-    n = len(polygon)
-    inside = False
-    
-    p1x, p1y = polygon[0]
-    for i in range(n + 1):
-        p2x, p2y = polygon[i % n]
-        
-        # Verifica si el punto está en el borde del polígono
-        if (x == p1x and y == p1y) or (x == p2x and y == p2y):
-            return True
-            
-        if y > min(p1y, p2y):
-            if y <= max(p1y, p2y):
-                if x <= max(p1x, p2x):
-                    if p1y != p2y:
-                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                    if p1x == p2x or x <= xinters:
-                        inside = not inside
-        p1x, p1y = p2x, p2y
-        
-    return inside
-
-PRIORIDAD_ZONAS = {
-    "exterior": 1,
-    "atencion": 2,
-    "interior": 3,
-    "modulo": 4, 
-}
+# Zonas y configuración de cada radar; se actualizan en caliente (REST + change streams)
+registro_radar = RegistroRadar(RADAR_WEBSOCKET_URL, al_publicar=publicar_estado)
 
-def calcular_centroide_zona(coordinates: list) -> tuple:
+async def recargar_registro():
     """
-    Calcula el centroide (centro geométrico) de un polígono.
+    Carga completa de zonas y sensores desde Mongo al registro.
+    Las zonas se compilan en el marco del radar principal (o del primero configurado).
     """
-    if not coordinates:
-        return (0, 0)
-    
-    lat_sum = sum(coord[0] for coord in coordinates)
-    lon_sum = sum(coord[1] for coord in coordinates)
-    n = len(coordinates)
-    
-    return (lat_sum / n, lon_sum / n)
-
-def detectar_severidad_por_nombre(nombre_zona: str) -> str:
+    documentos_sensores, documentos_zonas = await asyncio.gather(
+        repositorio_configuracion.sensores(),
+        repositorio_zonas.documentos(),
+    )
+    sensores = sensores_desde_documentos(documentos_sensores, RADAR_WEBSOCKET_URL)
+    origen = sensores.get(SENSOR_PRINCIPAL) or next(iter(sensores.values()), None)
+    if origen is None:
+        raise RuntimeError("No hay radares en configuracion_radar")
+    marco = obtener_marco_local(origen.latitud, origen.longitud, METROS_POR_GRADO_LATITUD, PROYECCION)
+    registro_radar.cargar(documentos_zonas, sensores, marco)
+
+async def vigilar_cambios_radar():
     """
-    Determina la severidad de la alerta basándose en el nombre de la zona.
-    El cliente define el nombre, por lo que buscamos palabras clave.
+    Recoge los cambios de zonas y configuración hechos por otros procesos.
     """
-    nombre_lower = nombre_zona.lower()
-    
-    # Palabras clave para severidad crítica
-    if any(palabra in nombre_lower for palabra in ["critica", "crítica", "peligro", "emergencia", "prohibido"]):
-        return "critica"
-    
-    # Palabras clave para severidad alta
-    if any(palabra in nombre_lower for palabra in ["alerta", "restriccion", "restricción", "interior", "control"]):
-        return "alta"
-    
-    # Palabras clave para severidad media
-    if any(palabra in nombre_lower for palabra in ["atencion", "atención", "precaucion", "precaución", "zona"]):
-        return "media"
-    
-    # Por defecto, severidad baja
-    return "baja"
+    await asyncio.gather(
+        registro_radar.vigilar_zonas(db.zonas, recargar_registro),
+        registro_radar.vigilar_configuracion(db.configuracion_radar, recargar_registro),
+    )
 
 async def radar_listener_task():
-    while True:
-        try:
-            # Tip: Mueve la carga de config fuera del 'while True' interno 
-            # para no saturar la base de datos en cada punto recibido.
-            radar_config = CONFIGURACION_DATA_COLLECTION.find_one({}, {"_id": 0})["radar"]
-            ANGULO_ROTACION = float(radar_config.get("angulo_rotacion", 0))
-            ZONAS_DE_DETECCION = list(ZONAS_COLLECTION.find({}, {"_id": 0}))
-
-            async with websockets.connect(RADAR_WEBSOCKET_URL, ping_interval=30, ping_timeout=60) as radar_ws:
-                print("Conectado al radar (Conexión Única)")
-                while True:
-                    radar_data_raw = await radar_ws.recv()
-                    
-                    # --- CRÍTICO: Limpiar el string antes de convertir a JSON ---
-                    processed_str = re.sub(r'(\w+):', r'"\1":', radar_data_raw)
-                    try:
-                        radar_data_json = json.loads(processed_str)
-                        # Pasar el JSON ya convertido a la lógica
-                        processed_data = await process_radar_logic(radar_data_json, ANGULO_ROTACION, ZONAS_DE_DETECCION)
-                        
-                        if processed_data:
-                            await manager.broadcast(processed_data)
-                    except websockets.ConnectionClosed:
-                        print("Conexión con el radar cerrada. Reintentando...")
-                        break
-                    
-        except Exception as e:
-            print(f"Error en conexión radar: {e}. Reintentando en 5s...")
+    """
+    Supervisa una tarea de ingesta por radar configurado; los radares que se
+    agregan en configuracion_radar se conectan sin reiniciar el servidor.
+    """
+    tareas = {}
+    try:
+        while True:
+            try:
+                if not registro_radar.actual.sensores:
+                    await recargar_registro()
+                for sensor_id, sensor in registro_radar.actual.sensores.items():
+                    tarea = tareas.get(sensor_id)
+                    if sensor.url and (tarea is None or tarea.done()):
+                        tareas[sensor_id] = asyncio.create_task(escuchar_sensor(sensor_id))
+                # Salidas de los objetivos de radares caídos o quitados (sin tramas no se cierran solas)
+                if registro_radar.actual.version > 0:
+                    pipeline_radar.barrer(registro_radar.actual.sensores)
+            except Exception as e:
+                print(f"Error al cargar la configuración de los radares: {e}. Reintentando en 5s...")
             await asyncio.sleep(5)
+    finally:
+        for tarea in tareas.values():
+            tarea.cancel()
+        await asyncio.gather(*tareas.values(), return_exceptions=True)
+
+async def escuchar_sensor(sensor_id: str):
+    """Ingesta de un radar: decodifica, procesa y difunde cada trama."""
+    loop = asyncio.get_running_loop()
+    decodificador = ProcessPoolExecutor(max_workers=1) if DECODIFICAR_EN_PROCESO else None
+    try:
+        while True:
+            if registro_radar.actual.version == 0:
+                # Solo si el registro nunca se cargó; después lo mantienen al día
+                # la carga del arranque y los change streams (que recargan al
+                # reabrirse), no cada reconexión con el radar
+                try:
+                    await recargar_registro()
+                except Exception as e:
+                    print(f"No se pudo cargar el registro para el radar '{sensor_id}': {e}")
+            sensor = registro_radar.actual.sensores.get(sensor_id)
+            if sensor is None or not sensor.url:
+                print(f"Radar '{sensor_id}' ya no está configurado; se detiene su ingesta")
+                vista_sensores.quitar(sensor_id)
+                return
+            url = sensor.url
+            try:
+                async with websockets.connect(url, ping_interval=30, ping_timeout=60) as radar_ws:
+                    print(f"Conectado al radar '{sensor_id}'")
+                    while True:
+                        radar_data_raw = await radar_ws.recv()
+                        recibida = time.perf_counter()
+                        
+                        try:
+                            # Decodifica la trama cruda (claves sin comillas + sufijo de tiempo)
+                            if decodificador is None:
+                                trama = decodificar_trama(radar_data_raw)
+                            else:
+                                trama = await loop.run_in_executor(decodificador, decodificar_trama, radar_data_raw)
+                            decodificada = time.perf_counter()
+                            metricas_ingesta.etapas.observar("decodificar", decodificada - recibida)
+                            if trama is None:
+                                continue
+                            # Una sola lectura del registro por trama: cambio atómico entre tramas
+                            estado = registro_radar.actual
+                            sensor = estado.sensores.get(sensor_id)
+                            if sensor is None or sensor.url != url:
+                                # Se quitó el radar o cambió su dirección: reconectar
+                                metricas_ingesta.contar(metricas_ingesta.descartadas, sensor_id)
+                                break
+                            processed_data = await process_radar_logic(trama.objetivos, sensor, estado)
+                            
+                            if processed_data:
+                                procesada = time.perf_counter()
+                                # Solo encola para cada cliente; no espera los envíos
+                                manager.broadcast(processed_data)
+                                if sensor_id == SENSOR_PRINCIPAL:
+                                    publicar_primer_punto(trama.objetivos, processed_data)
+                                difundida = time.perf_counter()
+                                metricas_ingesta.etapas.observar("difundir", difundida - procesada)
+                                metricas_ingesta.trama(sensor_id, difundida - recibida)
+                        except TramaInvalida as e:
+                            metricas_ingesta.contar(metricas_ingesta.invalidas, sensor_id)
+                            print(f"Trama inválida del radar '{sensor_id}': {e}")
+                        except websockets.ConnectionClosed:
+                            metricas_ingesta.contar(metricas_ingesta.reconexiones, sensor_id)
+                            print(f"Conexión con el radar '{sensor_id}' cerrada. Reintentando...")
+                            break
+                        
+            except Exception as e:
+                metricas_ingesta.contar(metricas_ingesta.reconexiones, sensor_id)
+                print(f"Error en conexión con el radar '{sensor_id}': {e}. Reintentando en 5s...")
+                await asyncio.sleep(5)
+    finally:
+        if decodificador is not None:
+            decodificador.shutdown(wait=False, cancel_futures=True)
+
+def publicar_primer_punto(objetivos, processed_data):
+    """
+    Agrega el primer objetivo de la trama (ya procesado) al historial de
+    /solo_punto y lo difunde a sus clientes.
+    """
+    if not objetivos:
+        return
+    primero = objetivos[0].id
+    for punto in processed_data["puntos"]:
+        if punto["id"] == primero and punto.get("sensor") == SENSOR_PRINCIPAL:
+            historial_primer_punto.append(punto)
+            break
+    if manager_solo_punto.clientes:
+        manager_solo_punto.broadcast({"puntos": list(historial_primer_punto)})
 
-async def process_radar_logic(radar_data_json, ANGULO_ROTACION, ZONAS_DE_DETECCION):
-        if "data" not in radar_data_json or not isinstance(radar_data_json["data"], list):
-            return None
-        
-        processed_points = []
-        alertas_detectadas = []
-        
-        for point_data in radar_data_json["data"]:
-            x_meters = float(point_data.get("x", 0))
-            y_meters = float(point_data.get("y", 0))
-            
-            x_adjusted = -x_meters
-            y_adjusted = -y_meters
-            anguloTotalRotacion = (ANGULO_ROTACION + GRADO_INCLINACION) - 30
-            x_rotated, y_rotated = rotate_point(x_meters, y_meters, anguloTotalRotacion)
-            latitud, longitud = convertir_cartesiano_a_geografico(x_rotated, y_rotated)
-            
-            zona_detectada = None
-            prioridad_actual = 0
-            
-            for zona in ZONAS_DE_DETECCION:
-                zona_poligono = [tuple(c) for c in zona.get("coordinates", [])]
-                
-                if punto_en_poligono((latitud, longitud), zona_poligono):
-                    categoria_zona = zona.get("category")
-                    prioridad_zona = PRIORIDAD_ZONAS.get(categoria_zona, 0)
-                    
-                    if prioridad_zona > prioridad_actual:
-                        prioridad_actual = prioridad_zona
-                        zona_detectada = zona
-            
-            puntos_a_enviar = {
-                "id": point_data.get("id"),
-                "type": point_data.get("type"),
-                "latitud": latitud,
-                "longitud": longitud,
-                "azimut": float(point_data.get("a")),
-                "distancia": float(point_data.get("d"))
-            }
-            
-            if zona_detectada:
-                puntos_a_enviar["zona_alerta"] = {
-                    "id": zona_detectada.get("id"),
-                    "name": zona_detectada.get("name"),
-                    "color": zona_detectada.get("color"),
-                    "category": zona_detectada.get("category")
-                }
-                
-                # Crear alerta basada en el nombre de la zona
-                nombre_zona = zona_detectada.get("name", "")
-                centroide = calcular_centroide_zona(zona_detectada.get("coordinates", []))
-                severidad = detectar_severidad_por_nombre(nombre_zona)
-                
-                alerta = {
-                    "punto_id": point_data.get("id"),
-                    "tipo_punto": point_data.get("type"),
-                    "posicion_detectada": {
-                        "latitud": latitud,
-                        "longitud": longitud
-                    },
-                    "centroide_zona": {
-                        "latitud": centroide[0],
-                        "longitud": centroide[1]
-                    },
-                    "zona": {
-                        "id": zona_detectada.get("id"),
-                        "nombre": nombre_zona,
-                        "color": zona_detectada.get("color")
-                    },
-                    "severidad": severidad,
-                    "timestamp": asyncio.get_event_loop().time()
-                }
-                
-                alertas_detectadas.append(alerta)
-                #Almacenar en la coleccion de alertas
-                ALERTAS_COLLECTION.insert_one(alerta)
-                
-                # Llama al cliente de websocket para mover la cámara
-                # La lógica aquí es que si se detectó una zona (la más prioritaria), se activa la cámara
-                mensaje_para_camara = {
-                    "puntos": puntos_a_enviar
-                }
-                mensaje_json_str = json.dumps(mensaje_para_camara)
-                await radar_websocket_client(mensaje_json_str)
-
-            processed_points.append(puntos_a_enviar)
-        
-        processed_data = {
-            "puntos": processed_points,
-            "alertas": alertas_detectadas
-        }
-        
-        return processed_data
+async def process_radar_logic(objetivos, sensor, estado):
+        """
+        Procesa los objetivos de una trama del radar 'sensor' con el estado
+        vigente del registro (zonas compiladas y su marco) y devuelve la vista
+        combinada de todos los radares más las alertas de esta trama.
+        """
+        return pipeline_radar.procesar(objetivos, sensor, estado)
     
 @router.websocket("/radar")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    # Opciones por cliente: /api/radar?politica=ultimo&formato=binario&protocolo=delta
+    await manager.connect(
+        websocket,
+        websocket.query_params.get("politica"),
+        websocket.query_params.get("formato"),
+        websocket.query_params.get("protocolo")
+    )
     try:
         while True:
-            # Mantener la conexión abierta esperando mensajes del cliente (si los hay)
-            # o simplemente bloqueado hasta que se cierre.
-            await websocket.receive_text() 
+            # El cliente puede enviar {"t": "suscripcion", ...} para filtrar lo que recibe;
+            # cualquier otro mensaje se ignora. Los clientes binarios pueden mandar
+            # el mismo JSON en un frame binario; lo que no sea JSON se les rechaza.
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            texto = frame.get("text")
+            if texto is None:
+                try:
+                    texto = (frame.get("bytes") or b"").decode("utf-8")
+                    mensaje = json.loads(texto)
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    manager.rechazar_suscripcion(websocket, "los mensajes de control deben ser JSON (texto o UTF-8)")
+                    continue
+            else:
+                try:
+                    mensaje = json.loads(texto)
+                except json.JSONDecodeError:
+                    continue
+            if not isinstance(mensaje, dict) or mensaje.get("t") != "suscripcion":
+                continue
+            try:
+                manager.suscribir(websocket, Suscripcion.desde_mensaje(mensaje))
+            except SuscripcionInvalida as e:
+                manager.rechazar_suscripcion(websocket, str(e))
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
@@ -459,146 +452,77 @@ async def websocket_endpoint(websocket: WebSocket):
 
 
 @router.websocket("/solo_punto")
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    ZONAS_DE_DETECCION = list(ZONAS_COLLECTION.find({}, {"_id": 0}))
-    print(ZONAS_DE_DETECCION)
-    while True:
-        try:
-            async with websockets.connect(
-                RADAR_WEBSOCKET_URL,
-                ping_interval=30,
-                ping_timeout=60
-            ) as radar_ws:
-                print("Conectado al radar. Iniciando retransmisión de datos...")
-                processed_points = []
-
-                while True:
-                    radar_data_raw = await radar_ws.recv()
-                    # Limpia los datos para que sean un JSON válido
-                    processed_data_str = re.sub(r'(\w+):', r'"\1":', radar_data_raw)
-                    # Elimina el sufijo de tiempo que no es JSON
-                    processed_data_str = re.sub(r'\d{3}\d{1,2}:\d{2}:\d{2}\.\d{3}$', '', processed_data_str)
-                    
-                    try:
-                        radar_data_json = json.loads(processed_data_str)
-                        
-                        if "data" in radar_data_json and isinstance(radar_data_json["data"], list) and radar_data_json["data"]:
-                            
-                            # Selecciona el primer objetivo de la lista
-                            first_point_data = radar_data_json["data"][0] 
-                            
-                            # Extrae las coordenadas cartesianas
-                            x_meters = first_point_data.get("x", 0)
-                            y_meters = first_point_data.get("y", 0)
-
-                            # Aplica la rotación al punto
-                            x_rotated, y_rotated = rotate_point(x_meters, y_meters, ANGULO_ROTACION)
-
-                            # Convierte a coordenadas geográficas
-                            latitud, longitud = convertir_cartesiano_a_geografico(x_rotated, y_rotated)
-                            
-                            # Verifica si el punto está dentro de alguna zona de peligro
-                            zona_detectada = None
-                            # Itera sobre las zonas cargadas
-                            for zona in ZONAS_DE_DETECCION:
-                                # El polígono debe ser una lista de tuplas (lat, lon)
-                                zona_poligono = [tuple(c) for c in zona.get("coordinates", [])]
-                                
-                                # Usa la función de detección de colisión
-                                if punto_en_poligono((latitud, longitud), zona_poligono):
-                                    zona_detectada = zona
-                                    break  # Sal de este bucle si encuentras una zona
-
-                            # Estructura el JSON de salida con las coordenadas del único punto
-                            puntos_a_enviar = {
-                                "id": first_point_data.get("id"),
-                                "type": first_point_data.get("type"),
-                                "latitud": latitud,
-                                "longitud": longitud,
-                                "azimut": first_point_data.get("a"),
-                                "distancia": first_point_data.get("d")
-                            }
-                            
-                            # Si se detectó una zona, agrégala al objeto del punto
-                            if zona_detectada:
-                                puntos_a_enviar["zona_alerta"] = {
-                                    "id": zona_detectada.get("id"),
-                                    "name": zona_detectada.get("name"),
-                                    "color": zona_detectada.get("color"),
-                                    "category" : zona_detectada.get("category")
-                                }
-                                
-                            processed_points.append(puntos_a_enviar)
-                            
-                            final_data_to_send = {
-                                "puntos": processed_points # Coloca el único punto en una lista para mantener el formato
-                            }
-                                
-                            await websocket.send_json(final_data_to_send)
-                            
-                    except json.JSONDecodeError:
-                        print(f"Datos recibidos no son un JSON válido: {radar_data_raw}")
-                    
-        except websockets.exceptions.ConnectionClosed as e:
-            if e.code == 1000:
-                print("El cliente se ha desconectado o la conexión con el radar se cerró normalmente.")
-                return
-            else:
-                print(f"Conexión perdida. Razón: {e}. Reintentando...")
-                await asyncio.sleep(0.001)
+async def websocket_solo_punto(websocket: WebSocket):
+    # Vista de "solo el primer objetivo" sobre la ingesta compartida: no abre
+    # otra conexión con el radar. Recibe el historial reciente de ese objetivo.
+    await manager_solo_punto.connect(
+        websocket,
+        websocket.query_params.get("politica"),
+        websocket.query_params.get("formato")
+    )
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        manager_solo_punto.disconnect(websocket)
 
-        except ConnectionRefusedError:
-            print("Conexión con el radar rechazada. Reintentando en 1 segundo...")
-            await asyncio.sleep(1)
-        
-        except Exception as e:
-            print(f"Error inesperado: {e}. Cerrando conexión...")
-            break
-            
-    await websocket.close()
 
 class RadarConfig(BaseModel):
     radar_lat: Optional[str]
     radar_lon: Optional[str]
     radar_radio_m: Optional[str]
     angulo_rotacion: Optional[str] # Nuevo campo para el ángulo de rotación
+    sensor_id: Optional[str] = None # Radar a configurar; sin valor es el principal
+    url: Optional[str] = None
+    grado_inclinacion: Optional[float] = None
     
 @router.post("/configurar_radar")
 async def configurar_radar(config: RadarConfig):
     try:
-        # Encuentra la ruta del archivo .env
-        dotenv_file = find_dotenv()
+        sensor_id = config.sensor_id or SENSOR_PRINCIPAL
         
-        # Actualiza las variables en el archivo .env
-        set_key(dotenv_file, "RADAR_LAT", str(config.radar_lat))
-        set_key(dotenv_file, "RADAR_LON", str(config.radar_lon))
-        set_key(dotenv_file, "RADAR_RADIO_M", str(config.radar_radio_m))
-        set_key(dotenv_file, "ANGULO_ROTACION", str(config.angulo_rotacion))
+        if sensor_id == SENSOR_PRINCIPAL:
+            # Encuentra la ruta del archivo .env
+            dotenv_file = find_dotenv()
+            
+            # Actualiza las variables en el archivo .env
+            set_key(dotenv_file, "RADAR_LAT", str(config.radar_lat))
+            set_key(dotenv_file, "RADAR_LON", str(config.radar_lon))
+            set_key(dotenv_file, "RADAR_RADIO_M", str(config.radar_radio_m))
+            set_key(dotenv_file, "ANGULO_ROTACION", str(config.angulo_rotacion))
+            # El documento original del radar principal no tiene 'sensor_id'
+            filtro = {"sensor_id": {"$exists": False}}
+        else:
+            filtro = {"sensor_id": sensor_id}
         
         posiciones = {
             "radar_lat": float(config.radar_lat),
             "radar_lon": float(config.radar_lon)
         }
         
-        # Actualizar lso valores en la base de datos 
-        CONFIGURACION_DATA_COLLECTION.update_one(
-            {}, 
-            {
-                "$set": {
-                    "radar":{
-                        "latitud": float(config.radar_lat),
-                        "longitud": float(config.radar_lon),
-                        "radar_radio_m": float(config.radar_radio_m),
-                        "angulo_rotacion": float(config.angulo_rotacion)
-                    },
-                    "poligono": {
-                        "vertices": calcular_vertices_poligono(float(config.radar_radio_m), float(config.angulo_rotacion), 45, posiciones)
-                    }
-                }
-            },
-            upsert=True
-        )
+        # Campo a campo para no borrar 'url' ni 'grado_inclinacion' si no vienen
+        campos = {
+            "radar.latitud": float(config.radar_lat),
+            "radar.longitud": float(config.radar_lon),
+            "radar.radar_radio_m": float(config.radar_radio_m),
+            "radar.angulo_rotacion": float(config.angulo_rotacion),
+            "poligono": {
+                "vertices": calcular_vertices_poligono(float(config.radar_radio_m), float(config.angulo_rotacion), APERTURA_COBERTURA_GRADOS, posiciones)
+            }
+        }
+        if config.url:
+            campos["radar.url"] = config.url
+        if config.grado_inclinacion is not None:
+            campos["radar.grado_inclinacion"] = float(config.grado_inclinacion)
+        
+        # Actualizar lso valores en la base de datos (devuelve el documento ya actualizado)
+        documento = await repositorio_configuracion.actualizar(filtro, campos)
+        
+        # La tarea del radar usa la nueva configuración desde la próxima trama;
+        # si se movió el radar que define el marco de las zonas, se recompila todo
+        sensor = sensor_desde_documento(documento, RADAR_WEBSOCKET_URL)
+        if sensor is not None and not registro_radar.guardar_sensor(sensor):
+            await recargar_registro()
         
         # Retorna una respuesta de éxito
         return {"mensaje": "Configuración del radar actualizada con éxito."}
@@ -608,6 +532,52 @@ async def configurar_radar(config: RadarConfig):
         return {"error": f"Ocurrió un error al actualizar la configuración: {e}"}
     
 
+@router.get("/sensores")
+async def obtener_sensores():
+    estado = registro_radar.actual
+    return {
+        "sensores": [
+            dict(sensor._asdict(), cobertura=getattr(estado.geometrias.get(sensor.id), "cobertura", None))
+            for sensor in estado.sensores.values()
+        ]
+    }
+
+@router.get("/metrics")
+async def obtener_metricas():
+    """Métricas de la ingesta, la difusión y las escrituras en formato Prometheus."""
+    texto = texto_metricas(
+        metricas_ingesta,
+        sonda_loop,
+        tiempos_arranque,
+        sensores=registro_radar.actual.sensores,
+        gestores={"radar": manager, "solo_punto": manager_solo_punto},
+        escritores={"alertas": escritor_alertas, "historial": historial_tracks},
+        duplicados=pipeline_radar.duplicados,
+        tracks_activos=len(tabla_tracks),
+        registro_version=registro_radar.actual.version,
+        configuracion_version=configuracion_radar.actual.version if configuracion_radar.cargada else 0,
+        actor_ptz=actor_ptz,
+        planificador_camaras=planificador_camaras,
+    )
+    return PlainTextResponse(texto, media_type=TextoPrometheus.TIPO_CONTENIDO)
+
+@router.get("/tracks/{sensor_id}/{track_id}")
+async def obtener_recorrido_track(sensor_id: str, track_id: int, desde: Optional[float] = None, hasta: Optional[float] = None):
+    """
+    Recorrido guardado de un track entre 'desde' y 'hasta' (epoch en segundos).
+    Por defecto, la última hora.
+    """
+    if hasta is None:
+        hasta = time.time()
+    if desde is None:
+        desde = hasta - 3600
+    puntos = await historial_tracks.recorrido(sensor_id, track_id, desde, hasta)
+    return {
+        "sensor": sensor_id,
+        "id": track_id,
+        "puntos": puntos
+    }
+
 # Zonas de deteccion
 class nuevaZona(BaseModel):
     name: str
@@ -622,8 +592,10 @@ class nuevaZona(BaseModel):
 @router.get("/zonas")
 async def obtener_zonas_deteccion():
         
-    CONFIGURACION_RADAR = CONFIGURACION_DATA_COLLECTION.find_one({}, {"_id": 0})
-    ZONAS_DE_DETECCION = list(ZONAS_COLLECTION.find({}, {"_id": 0}))
+    CONFIGURACION_RADAR, ZONAS_DE_DETECCION = await asyncio.gather(
+        repositorio_configuracion.principal(),
+        repositorio_zonas.listar(),
+    )
     
     return {
         "radar": {
@@ -640,18 +612,8 @@ async def obtener_zonas_deteccion():
 @router.post("/zonas_deteccion")
 async def agregar_zona(zona: nuevaZona): 
 
-    ultimo_documento = ZONAS_COLLECTION.find_one(
-            sort=[("_id", -1)]
-        )
-    
-    if ultimo_documento:
-        # 3. Convierte el ObjectId a una cadena de texto para que FastAPI lo pueda serializar
-        ultimo_documento["_id"] = str(ultimo_documento["_id"])
-        
-    if ultimo_documento and "id" in ultimo_documento:
-            nuevo_id = int(ultimo_documento["id"]) + 1
-    else:
-        nuevo_id = 1
+    # 1. El id de la nueva zona es el de la última + 1
+    nuevo_id = await repositorio_zonas.siguiente_id()
 
     # 2. Crear el nuevo diccionario de zona con el ID
     nueva_zona_con_id = {
@@ -663,7 +625,10 @@ async def agregar_zona(zona: nuevaZona):
     }
     
     # 3. Insertar el nuevo documento en la colección de zonas
-    ZONAS_COLLECTION.insert_one(nueva_zona_con_id)    
+    await repositorio_zonas.crear(nueva_zona_con_id)
+    
+    # 4. Publicar la zona a la tarea del radar sin reconectar
+    registro_radar.guardar_zona(nueva_zona_con_id)
     
     return {
             "msg": "Zona creada con éxito."
@@ -673,7 +638,8 @@ async def agregar_zona(zona: nuevaZona):
 @router.delete("/zonas/{zona_id}")
 async def eliminar_zona(zona_id):
         
-    ZONAS_COLLECTION.delete_one({"id": int(zona_id)})
+    await repositorio_zonas.eliminar(int(zona_id))
+    registro_radar.eliminar_zona(zona_id=int(zona_id))
     
     return {
         "msg": "Zona eliminada de JSON y MongoDB."
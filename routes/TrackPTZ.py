@@ -1,21 +1,18 @@
-from pymongo import MongoClient
-from pyproj import Geod
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional
 from pydantic import BaseModel
-from .PTZ import absolute_move_camera
+from .PTZ import CAMERAS, enviar_absolute_move
 from . import Estado as state
-import math
-import json
+from database import configuracion_radar
+from services.asignacion import CamaraPTZ, PlanificadorCamaras, camara_desde_documento
+from services.camara import ModeloCamara
+from services.ptz import ActorPTZ
+from services.sensores import SENSOR_PRINCIPAL
 import os
 
-# Datos Base de datos
-DBMONGO_URI = MongoClient(os.getenv("BDMONGO_URI"))
-ASTRADAR_BD = DBMONGO_URI["astradar"]
-CONFIGURACION_DATA_COLLECTION = ASTRADAR_BD["configuracion_radar"]
-
 # --- 1. CONFIGURACIÓN Y CALIBRACIÓN DE LA CÁMARA ---
-CAM_LAT = CONFIGURACION_DATA_COLLECTION.find_one({}, {"_id": 0})["radar"].get("latitud") # Latitud de la cámara
-CAM_LON = CONFIGURACION_DATA_COLLECTION.find_one({}, {"_id": 0})["radar"].get("longitud") # Longitud de la cámara
+# La cámara está en la posición del radar principal: configuracion_radar.radar
+# (se carga en el lifespan y sigue los cambios de /configurar_radar)
 CAM_ALT = 60.0  # Altitud en metros sobre el nivel del mar (MSL)
 CAM_HEADING_DEGREES = 200.0
 MAX_PAN_DEGREES = 180.0
@@ -33,34 +30,73 @@ ZOOM_TILT_OFFSET_DEGREES = 0.0
 # La suposición es que el objetivo siempre estará POR DEBAJO de la cámara.
 ESTIMATE_ALT_FROM_DISTANCE = True
 
+# --- 4. REPARTO ENTRE CÁMARAS ---
+# Alcance y velocidad de giro (unidades normalizadas por segundo) de la cámara
+# principal; las adicionales los traen en PTZ_CAMARAS_ARCHIVO (routes/PTZ.py).
+# Una cámara no cambia de objetivo antes de PTZ_PERMANENCIA_MIN_S.
+CAM_ALCANCE_M = float(os.getenv("PTZ_ALCANCE_M", "inf"))
+CAM_VELOCIDAD_PAN = float(os.getenv("PTZ_VELOCIDAD_PAN", 0.5))
+CAM_VELOCIDAD_TILT = float(os.getenv("PTZ_VELOCIDAD_TILT", 0.5))
+PTZ_PERMANENCIA_MIN_S = float(os.getenv("PTZ_PERMANENCIA_MIN_S", 3.0))
 
-# --- Modelos Pydantic ---
-class Punto(BaseModel):
-    latitud: float
-    longitud: float
-    azimut: Optional[float] = None
-    distancia: Optional[float] = None
-    id: Optional[int] = None
-    type: Optional[int] = None
 
+# --- Lógica de Cálculo y Control ---
+# services/camara.ModeloCamara precalcula lo que depende de la posición y la
+# calibración; se rearma solo cuando cambia la posición del radar principal.
+@lru_cache(maxsize=4)
+def _modelo_en(latitud: float, longitud: float) -> ModeloCamara:
+    return ModeloCamara(
+        latitud,
+        longitud,
+        altitud_m=CAM_ALT,
+        rumbo_grados=CAM_HEADING_DEGREES,
+        max_pan_grados=MAX_PAN_DEGREES,
+        distancia_zoom_min_m=MIN_ZOOM_DISTANCE,
+        distancia_zoom_max_m=MAX_ZOOM_DISTANCE,
+        corregir_inclinacion=ENABLE_LEAN_CORRECTION,
+        inclinacion_grados=LEAN_ANGLE_DEGREES,
+        direccion_inclinacion_grados=LEAN_DIRECTION_DEGREES,
+        tilt_por_zoom_grados=ZOOM_TILT_OFFSET_DEGREES,
+        estimar_altitud=ESTIMATE_ALT_FROM_DISTANCE,
+    )
 
-class TrackData(BaseModel):
-    puntos: List[Punto]
-    radar: Optional[dict] = None
-    poligono: Optional[dict] = None
 
+def modelo_camara() -> ModeloCamara:
+    """Modelo de la cámara en la posición vigente del radar principal."""
+    radar = configuracion_radar.radar
+    return _modelo_en(radar.latitud, radar.longitud)
 
-# --- FUNCIÓN DE NORMALIZACIÓN DE TILT CON NUEVO MAPEO ---
-def normalize_tilt_new_mapping(physical_angle_deg: float) -> float:
-    physical_angle_deg = max(-90.0, min(90.0, physical_angle_deg))
-    if physical_angle_deg >= 0:
-        normalized_value = 1.0 - (physical_angle_deg / 180.0)
-    else:
-        normalized_value = 1.0 + (physical_angle_deg / 60.0)
-    return max(-0.5, min(1.0, normalized_value))
+
+@lru_cache(maxsize=4)
+def _camaras_en(latitud: Optional[float], longitud: Optional[float]) -> dict:
+    camaras = {}
+    if latitud is not None:
+        camaras["camara_principal"] = CamaraPTZ(
+            "camara_principal",
+            _modelo_en(latitud, longitud),
+            sensor=SENSOR_PRINCIPAL,
+            alcance_m=CAM_ALCANCE_M,
+            velocidad_pan=CAM_VELOCIDAD_PAN,
+            velocidad_tilt=CAM_VELOCIDAD_TILT,
+        )
+    for camara_id, config in CAMERAS.items():
+        if camara_id not in camaras and config.get("latitud") is not None:
+            camaras[camara_id] = camara_desde_documento(camara_id, config)
+    return camaras
+
+
+def camaras_ptz() -> dict:
+    """
+    id -> CamaraPTZ de todas las cámaras con ubicación (la principal, en el
+    radar principal). Sin radar principal cargado (solo radares secundarios)
+    quedan las de CAMERAS que traen su propia ubicación.
+    """
+    if not configuracion_radar.cargada:
+        return _camaras_en(None, None)
+    radar = configuracion_radar.radar
+    return _camaras_en(radar.latitud, radar.longitud)
 
 
-# --- Lógica de Cálculo y Control ---
 def calculate_ptz_for_gps_target(
     target_lat: float,
     target_lon: float,
@@ -68,148 +104,39 @@ def calculate_ptz_for_gps_target(
     target_azimuth: Optional[float] = None,
     target_slant_distance: Optional[float] = None,
 ):
-    geod = Geod(ellps="WGS84")
-    fwd_azimuth, _, distance_2d = geod.inv(
-        lons1=CAM_LON, lats1=CAM_LAT, lons2=target_lon, lats2=target_lat
-    )
-    if target_azimuth is not None:
-        fwd_azimuth = target_azimuth
-
-    # --- ✨ INICIO: LÓGICA DE ALTITUD CORREGIDA ✨ ---
-    delta_altitude = 0.0
-    if target_alt is not None:
-        delta_altitude = target_alt - CAM_ALT
-    elif ESTIMATE_ALT_FROM_DISTANCE and target_slant_distance is not None:
-        # Se verifica si la distancia inclinada es menor que la horizontal (imposible/error).
-        # Si esto ocurre, se asume diferencia de altura cero para evitar un error matemático.
-        if target_slant_distance < distance_2d:
-            delta_altitude = 0.0
-            # Descomenta la siguiente línea si quieres ver una advertencia en la consola
-            # print(f"⚠️ ADVERTENCIA: Distancia inclinada ({target_slant_distance:.2f}m) < horizontal ({distance_2d:.2f}m). Se asume altitud 0.")
-        else:
-            # Si la distancia es válida (>=), se procede con Pitágoras.
-            delta_alt_squared = target_slant_distance**2 - distance_2d**2
-            delta_altitude_magnitude = math.sqrt(delta_alt_squared)
-            delta_altitude = -delta_altitude_magnitude
-    # --- ✨ FIN: LÓGICA DE ALTITUD CORREGIDA ✨ ---
-
-    elevation_angle_deg = math.degrees(math.atan2(delta_altitude, distance_2d))
-    pan_angle_final = fwd_azimuth - CAM_HEADING_DEGREES
-
-    # --- Corrección de inclinación (Lean Correction) ---
-    corrected_pan_angle = pan_angle_final
-    corrected_elevation_angle = elevation_angle_deg
-    if ENABLE_LEAN_CORRECTION and LEAN_ANGLE_DEGREES != 0.0:
-        pan_rad, tilt_rad = (
-            math.radians(pan_angle_final),
-            math.radians(elevation_angle_deg),
-        )
-        lean_angle_rad, lean_direction_rad = (
-            math.radians(LEAN_ANGLE_DEGREES),
-            math.radians(LEAN_DIRECTION_DEGREES),
-        )
-
-        sin_new_tilt = math.sin(tilt_rad) * math.cos(lean_angle_rad) - math.cos(
-            tilt_rad
-        ) * math.sin(lean_angle_rad) * math.cos(pan_rad - lean_direction_rad)
-        sin_new_tilt = max(-1.0, min(1.0, sin_new_tilt))
-        new_tilt_rad = math.asin(sin_new_tilt)
-
-        y = math.sin(pan_rad - lean_direction_rad) * math.cos(tilt_rad)
-        x = math.cos(pan_rad - lean_direction_rad) * math.cos(tilt_rad) * math.cos(
-            lean_angle_rad
-        ) + math.sin(tilt_rad) * math.sin(lean_angle_rad)
-        new_pan_rad = math.atan2(y, x) + lean_direction_rad
-
-        corrected_pan_angle, corrected_elevation_angle = (
-            math.degrees(new_pan_rad),
-            math.degrees(new_tilt_rad),
-        )
-
-    # --- Ajuste de Pan, Zoom y Tilt Final ---
-    if corrected_pan_angle > 180:
-        corrected_pan_angle -= 360
-    elif corrected_pan_angle < -180:
-        corrected_pan_angle += 360
-
-    safe_limit_pan = 0.9999
-    normalized_pan = max(
-        -safe_limit_pan, min(safe_limit_pan, corrected_pan_angle / MAX_PAN_DEGREES)
-    )
-
-    distance_3d = math.sqrt(distance_2d**2 + delta_altitude**2)
-    if distance_3d <= MIN_ZOOM_DISTANCE:
-        normalized_zoom = 0.0
-    elif distance_3d >= MAX_ZOOM_DISTANCE:
-        normalized_zoom = 1.0
-    else:
-        normalized_zoom = (distance_3d - MIN_ZOOM_DISTANCE) / (
-            MAX_ZOOM_DISTANCE - MIN_ZOOM_DISTANCE
-        )
-
-    final_elevation_angle = corrected_elevation_angle + (
-        normalized_zoom * ZOOM_TILT_OFFSET_DEGREES
+    return modelo_camara().resolver_punto(
+        target_lat, target_lon, target_alt, target_azimuth, target_slant_distance
     )
 
-    normalized_tilt = normalize_tilt_new_mapping(final_elevation_angle)
-
-    return {"pan": normalized_pan, "tilt": normalized_tilt, "zoom": normalized_zoom}
-
 class AbsoluteMoveRequest(BaseModel):
     pan: Optional[float] = None
     tilt: Optional[float] = None
     zoom: Optional[float] = None
 
-async def radar_websocket_client(message):
-    if state.manual_override:
-        print("⏸️ Control manual activo. Se ignorará el comando automático.")
-        return
-
-    try:
-        data = json.loads(message)
-        # Asegura que 'data["puntos"]' sea una lista, incluso si es un solo diccionario.
-        if "puntos" in data:
-            # Si 'puntos' es un diccionario, lo envuelve en una lista
-            if isinstance(data["puntos"], dict):
-                data["puntos"] = [data["puntos"]]
-            # Si 'puntos' es una lista de listas, toma la primera
-            elif isinstance(data["puntos"], list) and data["puntos"] and isinstance(data["puntos"][0], list):
-                data["puntos"] = data["puntos"][0]
-
-        try:
-            # Esto asumirá que TrackData puede manejar una lista o un solo objeto
-            track_data = TrackData(**data)
-            
-            if not track_data.puntos:
-                print(" - El mensaje no contenía puntos para procesar.")
-                return 
-
-            for i, point in enumerate(track_data.puntos):
-
-                # Tu lógica de cálculo y movimiento de la cámara aquí
-                ptz_commands = calculate_ptz_for_gps_target(
-                    target_lat=point.latitud,
-                    target_lon=point.longitud,
-                    target_azimuth=point.azimut,
-                    target_slant_distance=point.distancia,
-                )
-
-                payload = {
-                    "pan": round(ptz_commands["pan"], 4),
-                    "tilt": round(ptz_commands["tilt"], 4),
-                }
-                
-                
-                move_request = AbsoluteMoveRequest(**payload)
-
-
-                absolute_move_camera("camara_principal",move_request)
-
-        except Exception as e:
-            print(f"Error inesperado durante el procesamiento de datos: {e}")
-    except Exception as e:
-        print(f"Error inesperado durante el procesamiento de datos: {e}")
-
-
-
+# --- Seguimiento automático fuera del loop ---
+def comando_ptz_para_punto(camara_id: str, punto: dict) -> AbsoluteMoveRequest:
+    """Calcula el AbsoluteMove (pan/tilt) de 'camara_id' para un punto procesado del radar."""
+    ptz_commands = camaras_ptz()[camara_id].modelo.resolver_punto(
+        punto["latitud"], punto["longitud"], azimut=punto.get("azimut"), distancia=punto.get("distancia")
+    )
+    return AbsoluteMoveRequest(
+        pan=round(ptz_commands["pan"], 4),
+        tilt=round(ptz_commands["tilt"], 4),
+    )
 
+# La tarea del radar deja el último objetivo por cámara; el actor envía como
+# máximo un movimiento cada PTZ_INTERVALO_S y descarta objetivos viejos.
+actor_ptz = ActorPTZ(
+    calcular=comando_ptz_para_punto,
+    mover=enviar_absolute_move,
+    intervalo_s=float(os.getenv("PTZ_INTERVALO_S", 0.5)),
+    max_antiguedad_s=float(os.getenv("PTZ_MAX_ANTIGUEDAD_S", 1.0)),
+    pausado=lambda: state.manual_override,
+)
+
+# Qué objetivo sigue cada cámara: se replanifica con cada trama (services/pipeline.py)
+planificador_camaras = PlanificadorCamaras(
+    camaras_ptz,
+    permanencia_min_s=PTZ_PERMANENCIA_MIN_S,
+    vigencia_s=float(os.getenv("RADAR_SENSOR_VIGENCIA_S", 2.0)),
+)
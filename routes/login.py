@@ -1,9 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from motor.motor_asyncio import AsyncIOMotorDatabase
-
 from auth.auth import verify_password, create_access_token
-from database import get_db_mongo
+from database import RepositorioUsuarios, get_repositorio_usuarios
 
 router = APIRouter()
 
@@ -12,9 +10,9 @@ class LoginRequest(BaseModel):
     password: str
     
 @router.post("/login")
-async def login_json(data: LoginRequest, db: AsyncIOMotorDatabase = Depends(get_db_mongo)):
+async def login_json(data: LoginRequest, usuarios: RepositorioUsuarios = Depends(get_repositorio_usuarios)):
     # Buscar al usuario por email en la colección 'usuarios'
-    usuario = await db.usuarios.find_one({"email": data.username})
+    usuario = await usuarios.por_email(data.username)
 
     if not usuario or not verify_password(data.password, usuario["password"]):
         raise HTTPException(
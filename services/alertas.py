@@ -0,0 +1,30 @@
+import os
+
+from .lotes import EscritorLotes
+
+# Escritura de alertas en segundo plano (ver services/lotes.py).
+# Las alertas no se descartan: si Mongo no responde se respaldan en un archivo
+# local y se reinsertan cuando vuelve.
+
+
+class EscritorAlertas(EscritorLotes):
+    def __init__(
+        self,
+        coleccion,
+        tamano_lote: int = 200,
+        intervalo_s: float = 1.0,
+        max_cola: int = 10000,
+        archivo_respaldo: str = "alertas_pendientes.jsonl",
+    ):
+        super().__init__(coleccion, "alertas", tamano_lote, intervalo_s, max_cola, archivo_respaldo)
+
+
+def crear_escritor_alertas(coleccion) -> EscritorAlertas:
+    """Crea el escritor con la configuración del .env."""
+    return EscritorAlertas(
+        coleccion,
+        tamano_lote=int(os.getenv("ALERTAS_TAMANO_LOTE", 200)),
+        intervalo_s=float(os.getenv("ALERTAS_INTERVALO_S", 1.0)),
+        max_cola=int(os.getenv("ALERTAS_MAX_COLA", 10000)),
+        archivo_respaldo=os.getenv("ALERTAS_RESPALDO", "alertas_pendientes.jsonl"),
+    )
@@ -0,0 +1,215 @@
+from typing import NamedTuple, Optional
+import math
+
+import numpy as np
+
+from .camara import ModeloCamara
+
+# Reparto de los objetivos en alerta entre las cámaras PTZ.
+# Antes cada trama elegía un solo objetivo (el de la zona más prioritaria) para
+# "camara_principal": con varias alertas la cámara saltaba de un bote a otro.
+# El planificador se rehace en cada trama, pero de a poco:
+#   - una cámara conserva su objetivo durante 'permanencia_min_s' mientras el
+#     objetivo siga en zona y a su alcance;
+#   - las demás toman los objetivos por prioridad de zona (a igual prioridad,
+#     primero los que ya se siguen), cada uno con la cámara libre que lo cubre
+#     y que menos tarda en girar desde donde quedó; si hace falta se cede un
+#     objetivo a otra cámara para cubrir uno que solo algunas alcanzan.
+# Así N cámaras siguen a los N objetivos más importantes.
+
+
+class CamaraPTZ(NamedTuple):
+    id: str
+    modelo: ModeloCamara
+    sensor: Optional[str] = None  # radar en que está montada: usa su azimut y distancia inclinada
+    alcance_m: float = math.inf  # distancia máxima a la que se le asignan objetivos
+    velocidad_pan: float = 0.5  # unidades normalizadas (ONVIF) por segundo
+    velocidad_tilt: float = 0.5
+
+
+# Claves del documento de una cámara que son parámetros de ModeloCamara
+_PARAMETROS_MODELO = (
+    "altitud_m", "rumbo_grados", "max_pan_grados", "distancia_zoom_min_m", "distancia_zoom_max_m",
+    "corregir_inclinacion", "inclinacion_grados", "direccion_inclinacion_grados", "tilt_por_zoom_grados",
+    "estimar_altitud",
+)
+
+
+def camara_desde_documento(camara_id: str, documento: dict) -> CamaraPTZ:
+    """
+    Arma una cámara desde su configuración, p.ej.
+      {"latitud", "longitud", "altitud_m", "rumbo_grados", "alcance_m",
+       "velocidad_pan", "velocidad_tilt", "sensor", ...calibración de ModeloCamara}
+    """
+    modelo = ModeloCamara(
+        float(documento["latitud"]),
+        float(documento["longitud"]),
+        **{clave: documento[clave] for clave in _PARAMETROS_MODELO if clave in documento},
+    )
+    return CamaraPTZ(
+        id=camara_id,
+        modelo=modelo,
+        sensor=documento.get("sensor"),
+        alcance_m=float(documento.get("alcance_m", math.inf)),
+        velocidad_pan=float(documento.get("velocidad_pan", 0.5)),
+        velocidad_tilt=float(documento.get("velocidad_tilt", 0.5)),
+    )
+
+
+class _Asignacion(NamedTuple):
+    clave: tuple  # (sensor, id del objetivo)
+    desde: float
+
+
+class _Evaluacion(NamedTuple):
+    """Pan/tilt de cada candidato para una cámara y cuánto tarda en llegar."""
+    cubre: list
+    pan: list
+    tilt: list
+    giro_s: list
+
+
+class PlanificadorCamaras:
+    def __init__(self, camaras, permanencia_min_s: float = 3.0, vigencia_s: float = 2.0):
+        """
+        camaras() -> {id: CamaraPTZ}: se consulta en cada trama (sigue la
+        posición del radar principal). vigencia_s: los candidatos de un radar
+        que no envía tramas hace más de esto se descartan.
+        """
+        self.camaras = camaras
+        self.permanencia_min_s = permanencia_min_s
+        self.vigencia_s = vigencia_s
+        self._candidatos = {}  # sensor -> (instante, [(prioridad, punto)])
+        self._asignaciones = {}  # cámara -> _Asignacion
+        self._posiciones = {}  # cámara -> (pan, tilt) del último objetivo
+        self.reasignaciones = {}  # cámara -> cambios de objetivo
+
+    def actualizar(self, sensor_id: str, candidatos: list, ahora: float) -> dict:
+        """
+        candidatos: [(prioridad, punto)] de la trama de 'sensor_id' (objetivos
+        confirmados en zona). Reemplaza los de ese radar, replanifica y
+        devuelve {camara_id: punto} con el objetivo de cada cámara asignada.
+        """
+        self._candidatos[sensor_id] = (ahora, candidatos)
+        objetivos = {}
+        for otro_id, (instante, lista) in list(self._candidatos.items()):
+            if ahora - instante > self.vigencia_s:
+                del self._candidatos[otro_id]
+                continue
+            for prioridad, punto in lista:
+                objetivos[(otro_id, punto["id"])] = (prioridad, punto)
+
+        if not objetivos:
+            self._asignaciones = {}
+            return {}
+
+        claves = list(objetivos)
+        indice = {clave: i for i, clave in enumerate(claves)}
+        prioridades = [objetivos[clave][0] for clave in claves]
+        puntos = [objetivos[clave][1] for clave in claves]
+        latitudes = np.array([punto["latitud"] for punto in puntos], dtype=np.float64)
+        longitudes = np.array([punto["longitud"] for punto in puntos], dtype=np.float64)
+        camaras = self.camaras()
+        evaluaciones = {
+            camara_id: self._evaluar(camara, claves, puntos, latitudes, longitudes)
+            for camara_id, camara in camaras.items()
+        }
+
+        asignaciones = {}
+        tomados = set()
+        # Las cámaras en su permanencia mínima no se mueven a otro objetivo
+        for camara_id, asignacion in self._asignaciones.items():
+            i = indice.get(asignacion.clave)
+            if (
+                i is not None and camara_id in evaluaciones and evaluaciones[camara_id].cubre[i]
+                and ahora - asignacion.desde < self.permanencia_min_s
+            ):
+                asignaciones[camara_id] = asignacion
+                tomados.add(asignacion.clave)
+
+        # Los demás objetivos, por prioridad: cada uno a la cámara libre que lo
+        # cubre y llega antes; si todas las que lo cubren ya tienen uno de esta
+        # pasada, se intenta pasar ese a otra cámara (camino aumentante), así un
+        # objetivo importante no deja sin cámara a otro que solo una puede ver
+        seguidos = {asignacion.clave for asignacion in self._asignaciones.values()}
+        libres = [camara_id for camara_id in evaluaciones if camara_id not in asignaciones]
+        cubren = {}
+        dueno = {}  # cámara -> índice del objetivo asignado en esta pasada
+
+        def colocar(i, visitadas) -> bool:
+            for camara_id in cubren[i]:
+                if camara_id not in dueno:
+                    dueno[camara_id] = i
+                    return True
+            for camara_id in cubren[i]:
+                if camara_id not in visitadas:
+                    visitadas.add(camara_id)
+                    if colocar(dueno[camara_id], visitadas):
+                        dueno[camara_id] = i
+                        return True
+            return False
+
+        for i in sorted(range(len(claves)), key=lambda i: (-prioridades[i], claves[i] not in seguidos)):
+            if len(dueno) == len(libres):
+                break
+            if claves[i] in tomados:
+                continue
+            cubren[i] = sorted(
+                (camara_id for camara_id in libres if evaluaciones[camara_id].cubre[i]),
+                key=lambda camara_id: evaluaciones[camara_id].giro_s[i],
+            )
+            colocar(i, set())
+
+        for camara_id, i in dueno.items():
+            anterior = self._asignaciones.get(camara_id)
+            if anterior is not None and anterior.clave == claves[i]:
+                asignaciones[camara_id] = anterior
+            else:
+                asignaciones[camara_id] = _Asignacion(claves[i], ahora)
+                self.reasignaciones[camara_id] = self.reasignaciones.get(camara_id, 0) + 1
+
+        self._asignaciones = asignaciones
+        destinos = {}
+        for camara_id, asignacion in asignaciones.items():
+            i = indice[asignacion.clave]
+            evaluacion = evaluaciones[camara_id]
+            self._posiciones[camara_id] = (evaluacion.pan[i], evaluacion.tilt[i])
+            punto = puntos[i]
+            if punto.get("sensor") != camaras[camara_id].sensor:
+                # El azimut y la distancia inclinada son del radar, no de esta cámara
+                punto = dict(punto, azimut=None, distancia=None)
+            destinos[camara_id] = punto
+        return destinos
+
+    def _evaluar(self, camara: CamaraPTZ, claves: list, puntos: list, latitudes, longitudes) -> _Evaluacion:
+        modelo = camara.modelo
+        geodesicas = modelo.distancia_y_azimut(latitudes, longitudes)
+        azimuts = distancias = None
+        if camara.sensor is not None:
+            # Cámara montada en un radar: sus propios objetivos usan azimut y distancia medidos
+            def columna(campo):
+                return [
+                    punto[campo] if sensor == camara.sensor and punto.get(campo) is not None else math.nan
+                    for (sensor, _), punto in zip(claves, puntos)
+                ]
+            azimuts, distancias = columna("azimut"), columna("distancia")
+        pan, tilt, _ = modelo.resolver(latitudes, longitudes, azimuts=azimuts, distancias=distancias, geodesicas=geodesicas)
+
+        # Tiempo de giro desde el último objetivo (pan y tilt se mueven a la vez)
+        pan_actual, tilt_actual = self._posiciones.get(camara.id, (0.0, 0.0))
+        delta_pan = np.abs(pan - pan_actual)
+        if modelo.max_pan_grados >= 180:
+            # Pan continuo: de 0.9 a -0.9 se pasa por ±1
+            delta_pan = np.minimum(delta_pan, 2.0 - delta_pan)
+        giro_s = np.maximum(delta_pan / camara.velocidad_pan, np.abs(tilt - tilt_actual) / camara.velocidad_tilt)
+        cubre = geodesicas[1] <= camara.alcance_m
+        return _Evaluacion(cubre.tolist(), pan.tolist(), tilt.tolist(), giro_s.tolist())
+
+    def metricas(self) -> dict:
+        return {
+            camara_id: {
+                "objetivo": self._asignaciones[camara_id].clave if camara_id in self._asignaciones else None,
+                "reasignaciones": self.reasignaciones.get(camara_id, 0),
+            }
+            for camara_id in self.camaras()
+        }
@@ -0,0 +1,190 @@
+from typing import Optional
+import math
+
+import numpy as np
+
+# Modelo de una cámara PTZ: pan/tilt/zoom normalizados (ONVIF AbsoluteMove)
+# para apuntar a posiciones geográficas.
+# Es el cálculo de calculate_ptz_for_gps_target (routes/TrackPTZ.py) con todo
+# lo que depende de la posición, el rumbo y la calibración de la cámara
+# calculado una sola vez, y resuelto para un arreglo de objetivos en una sola
+# llamada (p.ej. para evaluar todos los candidatos de una trama).
+
+
+def _acotar(valores, minimo: float, maximo: float):
+    # np.clip tiene un costo fijo alto para arreglos chicos (pocos objetivos por trama)
+    return np.minimum(np.maximum(valores, minimo), maximo)
+
+
+# --- FUNCIÓN DE NORMALIZACIÓN DE TILT CON NUEVO MAPEO ---
+# (antes en routes/TrackPTZ.py; ModeloCamara.resolver aplica el mismo mapeo a arreglos)
+def normalize_tilt_new_mapping(physical_angle_deg: float) -> float:
+    physical_angle_deg = max(-90.0, min(90.0, physical_angle_deg))
+    if physical_angle_deg >= 0:
+        normalized_value = 1.0 - (physical_angle_deg / 180.0)
+    else:
+        normalized_value = 1.0 + (physical_angle_deg / 60.0)
+    return max(-0.5, min(1.0, normalized_value))
+
+
+class ModeloCamara:
+    def __init__(
+        self,
+        latitud: float,
+        longitud: float,
+        altitud_m: float = 60.0,
+        rumbo_grados: float = 200.0,
+        max_pan_grados: float = 180.0,
+        distancia_zoom_min_m: float = 20.0,
+        distancia_zoom_max_m: float = 1000.0,
+        corregir_inclinacion: bool = True,
+        inclinacion_grados: float = 0.0,
+        direccion_inclinacion_grados: float = 0.0,
+        tilt_por_zoom_grados: float = 0.0,
+        estimar_altitud: bool = True,
+    ):
+        """
+        inclinacion_grados / direccion_inclinacion_grados: calibración del
+        montaje (lean correction). estimar_altitud: sin altitud del objetivo,
+        se deduce de la distancia inclinada del radar (objetivo bajo la cámara).
+        """
+        # pyproj se importa solo si hay cámaras que mover
+        from pyproj import Geod
+
+        self.latitud = float(latitud)
+        self.longitud = float(longitud)
+        self.altitud_m = float(altitud_m)
+        self.rumbo_grados = float(rumbo_grados)
+        self.max_pan_grados = float(max_pan_grados)
+        self.distancia_zoom_min_m = float(distancia_zoom_min_m)
+        self.distancia_zoom_max_m = float(distancia_zoom_max_m)
+        self.tilt_por_zoom_grados = float(tilt_por_zoom_grados)
+        self.estimar_altitud = estimar_altitud
+
+        self._geod = Geod(ellps="WGS84")
+        self._corregir = corregir_inclinacion and inclinacion_grados != 0.0
+        inclinacion = math.radians(inclinacion_grados)
+        self._sin_inclinacion = math.sin(inclinacion)
+        self._cos_inclinacion = math.cos(inclinacion)
+        self._direccion_inclinacion = math.radians(direccion_inclinacion_grados)
+        self._rango_zoom_m = self.distancia_zoom_max_m - self.distancia_zoom_min_m
+
+    def distancia_y_azimut(self, latitudes, longitudes) -> tuple:
+        """Azimut (grados desde el norte) y distancia geodésica (m) desde la cámara."""
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        azimut, _, distancia = self._geod.inv(
+            np.full(latitudes.shape, self.longitud), np.full(latitudes.shape, self.latitud), longitudes, latitudes
+        )
+        return np.asarray(azimut), np.asarray(distancia)
+
+    def resolver(
+        self,
+        latitudes,
+        longitudes,
+        altitudes=None,
+        azimuts=None,
+        distancias=None,
+        geodesicas: tuple = None,
+    ) -> tuple:
+        """
+        pan, tilt y zoom normalizados (arreglos NumPy) para cada objetivo.
+        altitudes, azimuts y distancias (inclinada, del radar) son opcionales;
+        NaN en un elemento equivale a None en calculate_ptz_for_gps_target.
+        geodesicas: (azimut, distancia) de distancia_y_azimut si ya se calcularon.
+        """
+        azimut, distancia_2d = geodesicas if geodesicas is not None else self.distancia_y_azimut(latitudes, longitudes)
+        if azimuts is not None:
+            azimuts = np.asarray(azimuts, dtype=np.float64)
+            azimut = np.where(np.isnan(azimuts), azimut, azimuts)
+
+        # Diferencia de altura: la altitud del objetivo manda; si no hay, se
+        # estima con la distancia inclinada (0 si es menor que la horizontal)
+        delta_altitud = np.zeros_like(distancia_2d)
+        sin_altitud = np.ones(distancia_2d.shape, dtype=bool)
+        if altitudes is not None:
+            altitudes = np.asarray(altitudes, dtype=np.float64)
+            sin_altitud = np.isnan(altitudes)
+            delta_altitud = np.where(sin_altitud, 0.0, altitudes - self.altitud_m)
+        if self.estimar_altitud and distancias is not None:
+            distancias = np.asarray(distancias, dtype=np.float64)
+            estimable = sin_altitud & ~np.isnan(distancias) & (distancias >= distancia_2d)
+            bajo_camara = -np.sqrt(np.where(estimable, distancias ** 2 - distancia_2d ** 2, 0.0))
+            delta_altitud = np.where(estimable, bajo_camara, delta_altitud)
+
+        elevacion = np.degrees(np.arctan2(delta_altitud, distancia_2d))
+        pan = azimut - self.rumbo_grados
+
+        if self._corregir:
+            pan_rad = np.radians(pan)
+            tilt_rad = np.radians(elevacion)
+            relativo = pan_rad - self._direccion_inclinacion
+            sin_tilt, cos_tilt = np.sin(tilt_rad), np.cos(tilt_rad)
+            cos_relativo = np.cos(relativo)
+            sin_nuevo_tilt = _acotar(
+                sin_tilt * self._cos_inclinacion - cos_tilt * self._sin_inclinacion * cos_relativo, -1.0, 1.0
+            )
+            y = np.sin(relativo) * cos_tilt
+            x = cos_relativo * cos_tilt * self._cos_inclinacion + sin_tilt * self._sin_inclinacion
+            pan = np.degrees(np.arctan2(y, x) + self._direccion_inclinacion)
+            elevacion = np.degrees(np.arcsin(sin_nuevo_tilt))
+
+        pan = np.where(pan > 180, pan - 360, np.where(pan < -180, pan + 360, pan))
+        pan_normalizado = _acotar(pan / self.max_pan_grados, -0.9999, 0.9999)
+
+        distancia_3d = np.sqrt(distancia_2d ** 2 + delta_altitud ** 2)
+        zoom = _acotar((distancia_3d - self.distancia_zoom_min_m) / self._rango_zoom_m, 0.0, 1.0)
+
+        # normalize_tilt_new_mapping sobre el arreglo
+        elevacion = _acotar(elevacion + zoom * self.tilt_por_zoom_grados, -90.0, 90.0)
+        tilt = _acotar(np.where(elevacion >= 0, 1.0 - elevacion / 180.0, 1.0 + elevacion / 60.0), -0.5, 1.0)
+        return pan_normalizado, tilt, zoom
+
+    def resolver_punto(
+        self,
+        latitud: float,
+        longitud: float,
+        altitud: Optional[float] = None,
+        azimut: Optional[float] = None,
+        distancia: Optional[float] = None,
+    ) -> dict:
+        """
+        Un solo objetivo, con la salida de calculate_ptz_for_gps_target. Sin
+        NumPy: para un punto el costo fijo de los arreglos supera al cálculo.
+        """
+        azimut_geodesico, _, distancia_2d = self._geod.inv(self.longitud, self.latitud, longitud, latitud)
+        if azimut is None:
+            azimut = azimut_geodesico
+
+        delta_altitud = 0.0
+        if altitud is not None:
+            delta_altitud = altitud - self.altitud_m
+        elif self.estimar_altitud and distancia is not None and distancia >= distancia_2d:
+            delta_altitud = -math.sqrt(distancia ** 2 - distancia_2d ** 2)
+
+        elevacion = math.degrees(math.atan2(delta_altitud, distancia_2d))
+        pan = azimut - self.rumbo_grados
+
+        if self._corregir:
+            tilt_rad = math.radians(elevacion)
+            relativo = math.radians(pan) - self._direccion_inclinacion
+            sin_tilt, cos_tilt = math.sin(tilt_rad), math.cos(tilt_rad)
+            cos_relativo = math.cos(relativo)
+            sin_nuevo_tilt = sin_tilt * self._cos_inclinacion - cos_tilt * self._sin_inclinacion * cos_relativo
+            sin_nuevo_tilt = max(-1.0, min(1.0, sin_nuevo_tilt))
+            y = math.sin(relativo) * cos_tilt
+            x = cos_relativo * cos_tilt * self._cos_inclinacion + sin_tilt * self._sin_inclinacion
+            pan = math.degrees(math.atan2(y, x) + self._direccion_inclinacion)
+            elevacion = math.degrees(math.asin(sin_nuevo_tilt))
+
+        if pan > 180:
+            pan -= 360
+        elif pan < -180:
+            pan += 360
+        pan_normalizado = max(-0.9999, min(0.9999, pan / self.max_pan_grados))
+
+        distancia_3d = math.sqrt(distancia_2d ** 2 + delta_altitud ** 2)
+        zoom = max(0.0, min(1.0, (distancia_3d - self.distancia_zoom_min_m) / self._rango_zoom_m))
+
+        tilt = normalize_tilt_new_mapping(elevacion + zoom * self.tilt_por_zoom_grados)
+        return {"pan": pan_normalizado, "tilt": tilt, "zoom": zoom}
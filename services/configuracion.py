@@ -0,0 +1,80 @@
+from typing import NamedTuple, Optional
+import time
+
+from .geo import PROYECCION_PLANA, PROYECCIONES, TransformacionRadar
+from .sensores import SENSOR_PRINCIPAL, ConfiguracionSensor, GeometriaSensor, geometria_sensor, sensor_desde_documento
+
+# Configuración del radar principal (posición, alcance y ángulo), que también
+# usa la cámara PTZ como su propia posición.
+# Antes se leía con pymongo síncrono al importar routes/Radar.py y
+# routes/TrackPTZ.py (seis find_one): importar la app dependía de que Mongo
+# respondiera. Ahora se carga una vez en el lifespan y después se mantiene al
+# día desde el registro de radares (REST, change streams y cargas completas).
+#
+# Cada cambio arma una instantánea nueva e inmutable, con versión, y la
+# reemplaza de una vez: quien lee 'actual' una sola vez ve una configuración
+# completa (nunca la latitud nueva con la longitud vieja).
+
+
+class ConfiguracionNoCargada(RuntimeError):
+    """Se pidió la configuración antes de que se pudiera leer de Mongo."""
+
+
+class InstantaneaConfiguracion(NamedTuple):
+    version: int
+    radar: ConfiguracionSensor
+    transformacion: TransformacionRadar  # sin/cos de la rotación y metros por grado (marco)
+    cobertura: Optional[tuple]  # ((lat, lon), ...) del cono de cobertura
+
+
+class ServicioConfiguracion:
+    def __init__(self, leer_principal, metros_por_grado_latitud: float, proyeccion: str = PROYECCION_PLANA):
+        """
+        leer_principal() -> documento: corrutina (p.ej. RepositorioConfiguracion.principal).
+        proyeccion: la del marco local (services/geo.py, "plana" o "aeqd").
+        """
+        if proyeccion not in PROYECCIONES:
+            raise ValueError(f"Proyección desconocida: {proyeccion!r} (opciones: {', '.join(PROYECCIONES)})")
+        self._leer_principal = leer_principal
+        self.metros_por_grado_latitud = float(metros_por_grado_latitud)
+        self.proyeccion = proyeccion
+        self._actual: Optional[InstantaneaConfiguracion] = None
+        self.cargada_en: Optional[float] = None  # epoch de la última carga o reemplazo
+
+    async def cargar(self) -> ConfiguracionSensor:
+        """Lee el documento del radar principal; pensado para el lifespan."""
+        documento = await self._leer_principal()
+        sensor = sensor_desde_documento(documento or {})
+        if sensor is None:
+            raise ConfiguracionNoCargada("configuracion_radar no tiene un radar principal con posición")
+        self.reemplazar(sensor)
+        return sensor
+
+    def reemplazar(self, sensor: ConfiguracionSensor, geometria: GeometriaSensor = None):
+        """Publica la instantánea de 'sensor' (con su geometría, si ya está calculada)."""
+        if geometria is None or geometria.sensor != sensor or geometria.transformacion.marco.proyeccion != self.proyeccion:
+            geometria = geometria_sensor(sensor, self.metros_por_grado_latitud, self.proyeccion)
+        version = self._actual.version + 1 if self._actual is not None else 1
+        self._actual = InstantaneaConfiguracion(version, sensor, geometria.transformacion, geometria.cobertura)
+        self.cargada_en = time.time()
+
+    def desde_estado(self, estado):
+        """Para RegistroRadar(al_publicar=...): sigue al radar principal del registro."""
+        sensor = estado.sensores.get(SENSOR_PRINCIPAL)
+        if sensor is not None and (self._actual is None or sensor != self._actual.radar):
+            self.reemplazar(sensor, estado.geometrias.get(SENSOR_PRINCIPAL))
+
+    @property
+    def cargada(self) -> bool:
+        return self._actual is not None
+
+    @property
+    def actual(self) -> InstantaneaConfiguracion:
+        actual = self._actual
+        if actual is None:
+            raise ConfiguracionNoCargada("La configuración del radar aún no se carga")
+        return actual
+
+    @property
+    def radar(self) -> ConfiguracionSensor:
+        return self.actual.radar
@@ -0,0 +1,347 @@
+from collections import deque
+from fastapi import WebSocket
+import asyncio
+import json
+import os
+import time
+
+from .protocolo import CodificadorDelta
+from .suscripciones import SIN_FILTRO, Suscripcion
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa json de la librería estándar
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional; sin él el formato "msgpack" se envía como texto
+    msgpack = None
+
+# Difusión de tramas procesadas a los clientes de /api/radar.
+# Cada cliente tiene su propia cola de salida y su propia tarea de envío, así un
+# cliente lento (p.ej. en red celular) no retrasa a los demás ni a la ingesta:
+# broadcast solo encola y vuelve.
+#
+# Políticas de cola:
+#   "descartar_antiguo": cola acotada; si está llena se descarta la trama más vieja
+#   "ultimo":            solo se guarda la última trama (el cliente siempre ve lo más nuevo)
+#
+# Cada trama se serializa una sola vez (orjson si está instalado) y se envía el
+# mismo texto (o los mismos bytes, con formato "binario") a todos los clientes.
+#
+# Protocolos (se negocian al conectar, ver services/protocolo.py):
+#   "completo": la trama procesada tal cual (el formato de siempre)
+#   "delta":    keyframes + deltas cuantizados; el delta también se codifica una
+#               vez por trama y lo comparten todos los clientes al día
+# Con formato "msgpack" (solo si msgpack está instalado) se envían frames binarios MessagePack.
+#
+# Los clientes se agrupan por suscripción (services/suscripciones.py): cada grupo
+# filtra, limita la frecuencia y lleva su propio codificador delta, así el costo
+# por trama es por suscripción distinta y no por cliente.
+
+POLITICAS = ("descartar_antiguo", "ultimo")
+FORMATOS = ("texto", "binario", "msgpack")
+PROTOCOLOS = ("completo", "delta")
+
+
+def codificar_json(mensaje) -> str:
+    """JSON compacto; usa orjson si está instalado."""
+    if orjson is not None:
+        return orjson.dumps(mensaje).decode("utf-8")
+    return json.dumps(mensaje, separators=(",", ":"), ensure_ascii=False)
+
+
+class MensajeCodificado:
+    """
+    Trama serializada una sola vez y compartida por todos los clientes.
+    Cada representación (texto, bytes, msgpack) se calcula la primera vez que se pide.
+    """
+
+    __slots__ = ("mensaje", "_texto", "_bytes", "_msgpack")
+
+    def __init__(self, mensaje):
+        self.mensaje = mensaje
+        self._texto = None
+        self._bytes = None
+        self._msgpack = None
+
+    @property
+    def texto(self) -> str:
+        if self._texto is None:
+            self._texto = codificar_json(self.mensaje)
+        return self._texto
+
+    @property
+    def bytes(self) -> bytes:
+        if self._bytes is None:
+            self._bytes = self.texto.encode("utf-8")
+        return self._bytes
+
+    @property
+    def msgpack(self) -> bytes:
+        if self._msgpack is None:
+            self._msgpack = msgpack.packb(self.mensaje, use_bin_type=True)
+        return self._msgpack
+
+
+class TramaDifusion:
+    """
+    Una trama lista para difundir: el mensaje completo y, si hay clientes del
+    protocolo delta, el delta compartido y su keyframe (que se codifica solo si
+    algún cliente lo necesita).
+    """
+
+    __slots__ = ("completo", "delta", "_trama_delta", "_clave")
+
+    def __init__(self, mensaje: dict, trama_delta=None):
+        self.completo = MensajeCodificado(mensaje)
+        self._trama_delta = trama_delta
+        self.delta = MensajeCodificado(trama_delta.mensaje) if trama_delta is not None else None
+        self._clave = None
+
+    @property
+    def clave(self) -> MensajeCodificado:
+        if self._trama_delta.es_clave:
+            return self.delta
+        if self._clave is None:
+            self._clave = MensajeCodificado(self._trama_delta.clave())
+        return self._clave
+
+
+class ClienteRadar:
+    def __init__(self, websocket: WebSocket, politica: str, max_cola: int, formato: str = "texto", protocolo: str = "completo"):
+        if politica not in POLITICAS:
+            politica = POLITICAS[0]
+        if formato not in FORMATOS or (formato == "msgpack" and msgpack is None):
+            formato = FORMATOS[0]
+        if protocolo not in PROTOCOLOS:
+            protocolo = PROTOCOLOS[0]
+        self.websocket = websocket
+        self.politica = politica
+        self.formato = formato
+        self.protocolo = protocolo
+        self.cola = deque(maxlen=1 if politica == "ultimo" else max_cola)
+        # Un cliente delta necesita un keyframe al empezar y cada vez que pierde una trama
+        self.necesita_clave = True
+        self.suscripcion = SIN_FILTRO
+        self.control = deque()  # respuestas a los mensajes del cliente; salen antes que las tramas
+        self.hay_datos = asyncio.Event()
+        self.tarea = None
+        self.conectado_desde = time.time()
+
+        # Métricas de retraso
+        self.enviados = 0
+        self.descartados = 0
+        self.ultimo_retraso_ms = 0.0
+        self.max_retraso_ms = 0.0
+
+    def encolar(self, trama: TramaDifusion):
+        if len(self.cola) == self.cola.maxlen:
+            self.descartados += 1
+            self.necesita_clave = True
+        self.cola.append((trama, time.monotonic()))
+        self.hay_datos.set()
+
+    def responder(self, mensaje: dict):
+        self.control.append(MensajeCodificado(mensaje))
+        self.hay_datos.set()
+
+    def reiniciar_cola(self):
+        """Descarta lo pendiente (p.ej. al cambiar de suscripción); lo siguiente va como keyframe."""
+        self.cola.clear()
+        self.necesita_clave = True
+
+    def a_enviar(self, trama: TramaDifusion) -> MensajeCodificado:
+        if self.protocolo == "completo":
+            return trama.completo
+        if self.necesita_clave:
+            self.necesita_clave = False
+            return trama.clave
+        return trama.delta
+
+    async def enviar(self, mensaje: MensajeCodificado):
+        if self.formato == "msgpack":
+            await self.websocket.send_bytes(mensaje.msgpack)
+        elif self.formato == "binario":
+            await self.websocket.send_bytes(mensaje.bytes)
+        else:
+            await self.websocket.send_text(mensaje.texto)
+
+    def metricas(self) -> dict:
+        return {
+            "cliente": f"{self.websocket.client.host}:{self.websocket.client.port}" if self.websocket.client else None,
+            "politica": self.politica,
+            "formato": self.formato,
+            "protocolo": self.protocolo,
+            "suscripcion": self.suscripcion.a_dict(),
+            "en_cola": len(self.cola),
+            "enviados": self.enviados,
+            "descartados": self.descartados,
+            "ultimo_retraso_ms": self.ultimo_retraso_ms,
+            "max_retraso_ms": self.max_retraso_ms,
+            "conectado_desde": self.conectado_desde,
+        }
+
+
+class _GrupoSuscripcion:
+    """Clientes con la misma suscripción: comparten la trama filtrada y su codificación."""
+
+    def __init__(self, suscripcion: Suscripcion, intervalo_clave: int):
+        self.suscripcion = suscripcion
+        self.clientes = set()
+        self.codificador_delta = CodificadorDelta(intervalo_clave)
+        self.ultimo_envio = 0.0
+        self.alertas_pendientes = []
+        self.omitidas = 0
+
+    def preparar(self, message: dict, ahora: float, categorias_zona: dict):
+        """Trama para este grupo, o None si max_hz indica que esta se omite."""
+        max_hz = self.suscripcion.max_hz
+        if max_hz is not None and ahora - self.ultimo_envio < 1 / max_hz:
+            # Las alertas no se pierden: salen con la próxima trama que se envíe
+            self.alertas_pendientes.extend(message.get("alertas", ()))
+            self.omitidas += 1
+            return None
+        self.ultimo_envio = ahora
+        if self.alertas_pendientes:
+            message = dict(message)
+            message["alertas"] = self.alertas_pendientes + message.get("alertas", [])
+            self.alertas_pendientes = []
+
+        message = self.suscripcion.filtrar(message, categorias_zona)
+        trama_delta = None
+        if any(cliente.protocolo == "delta" for cliente in self.clientes):
+            trama_delta = self.codificador_delta.procesar(message)
+        else:
+            # Sin clientes delta no se lleva estado; el próximo que llegue parte con un keyframe
+            self.codificador_delta.reiniciar()
+        return TramaDifusion(message, trama_delta)
+
+
+class ConnectionManager:
+    def __init__(self, politica: str = "descartar_antiguo", max_cola: int = 10, intervalo_clave: int = 100):
+        self.politica = politica
+        self.max_cola = max_cola
+        self.intervalo_clave = intervalo_clave
+        self.clientes: dict = {}  # websocket -> ClienteRadar
+        self.grupos: dict = {}  # Suscripcion -> _GrupoSuscripcion
+        # id de zona -> categoría, para filtrar alertas por categoría (las alertas no
+        # la traen); se rehace desde las zonas del registro con cada estado nuevo
+        self.categorias_zona: dict = {}
+        self.descartados_desconectados = 0  # tramas descartadas por clientes que ya se fueron
+
+    @property
+    def active_connections(self) -> list:
+        return list(self.clientes)
+
+    async def connect(self, websocket: WebSocket, politica: str = None, formato: str = None, protocolo: str = None):
+        await websocket.accept()
+        cliente = ClienteRadar(websocket, politica or self.politica, self.max_cola, formato or "texto", protocolo or "completo")
+        if cliente.protocolo == "delta":
+            # Se informa lo negociado (p.ej. si se pidió msgpack y no está disponible)
+            cliente.responder({
+                "t": "hola",
+                "protocolo": cliente.protocolo,
+                "formato": cliente.formato,
+                "intervalo_clave": self.intervalo_clave,
+            })
+        cliente.tarea = asyncio.create_task(self._enviar(cliente))
+        self.clientes[websocket] = cliente
+        self._grupo(SIN_FILTRO).clientes.add(cliente)
+
+    def disconnect(self, websocket: WebSocket):
+        cliente = self.clientes.pop(websocket, None)
+        if cliente is not None:
+            self.descartados_desconectados += cliente.descartados
+            self._salir_del_grupo(cliente)
+            if cliente.tarea is not None:
+                cliente.tarea.cancel()
+
+    def _grupo(self, suscripcion: Suscripcion) -> _GrupoSuscripcion:
+        grupo = self.grupos.get(suscripcion)
+        if grupo is None:
+            grupo = self.grupos[suscripcion] = _GrupoSuscripcion(suscripcion, self.intervalo_clave)
+        return grupo
+
+    def _salir_del_grupo(self, cliente: ClienteRadar):
+        grupo = self.grupos.get(cliente.suscripcion)
+        if grupo is not None:
+            grupo.clientes.discard(cliente)
+            if not grupo.clientes:
+                del self.grupos[cliente.suscripcion]
+
+    def suscribir(self, websocket: WebSocket, suscripcion: Suscripcion):
+        """Cambia la suscripción de un cliente y le confirma la que quedó activa."""
+        cliente = self.clientes.get(websocket)
+        if cliente is None:
+            return
+        if suscripcion != cliente.suscripcion:
+            self._salir_del_grupo(cliente)
+            cliente.suscripcion = suscripcion
+            self._grupo(suscripcion).clientes.add(cliente)
+            # Lo encolado es del grupo anterior; el nuevo parte con un keyframe propio
+            cliente.reiniciar_cola()
+        cliente.responder({"t": "suscripcion", "ok": True, "suscripcion": suscripcion.a_dict()})
+
+    def rechazar_suscripcion(self, websocket: WebSocket, error: str):
+        cliente = self.clientes.get(websocket)
+        if cliente is not None:
+            cliente.responder({"t": "suscripcion", "ok": False, "error": error})
+
+    def usar_zonas(self, zonas):
+        """Categorías de las zonas vigentes (ZonaCompilada del registro, p.ej. EstadoRadar.indice.zonas)."""
+        self.categorias_zona = {zona.id: zona.categoria for zona in zonas}
+
+    def broadcast(self, message: dict):
+        """
+        Arma y serializa la trama una sola vez por grupo de suscripción y la
+        encola para cada cliente del grupo; no espera ningún envío.
+        """
+        if not self.clientes:
+            return
+        ahora = time.monotonic()
+        for grupo in self.grupos.values():
+            trama = grupo.preparar(message, ahora, self.categorias_zona)
+            if trama is None:
+                continue
+            for cliente in grupo.clientes:
+                cliente.encolar(trama)
+
+    async def _enviar(self, cliente: ClienteRadar):
+        try:
+            while True:
+                await cliente.hay_datos.wait()
+                cliente.hay_datos.clear()
+                while cliente.control or cliente.cola:
+                    if cliente.control:
+                        await cliente.enviar(cliente.control.popleft())
+                        continue
+                    trama, encolado = cliente.cola.popleft()
+                    await cliente.enviar(cliente.a_enviar(trama))
+                    cliente.enviados += 1
+                    cliente.ultimo_retraso_ms = (time.monotonic() - encolado) * 1000
+                    cliente.max_retraso_ms = max(cliente.max_retraso_ms, cliente.ultimo_retraso_ms)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Si falla, el cliente probablemente se desconectó
+            if self.clientes.pop(cliente.websocket, None) is not None:
+                self.descartados_desconectados += cliente.descartados
+                self._salir_del_grupo(cliente)
+
+    def metricas(self) -> list:
+        return [cliente.metricas() for cliente in self.clientes.values()]
+
+    def descartados_total(self) -> int:
+        """Tramas descartadas por clientes lentos desde que arrancó el servidor."""
+        return self.descartados_desconectados + sum(cliente.descartados for cliente in self.clientes.values())
+
+
+def crear_connection_manager() -> ConnectionManager:
+    """Crea el ConnectionManager con la configuración del .env."""
+    return ConnectionManager(
+        politica=os.getenv("RADAR_WS_POLITICA", "descartar_antiguo"),
+        max_cola=int(os.getenv("RADAR_WS_MAX_COLA", 10)),
+        intervalo_clave=int(os.getenv("RADAR_WS_INTERVALO_CLAVE", 100)),
+    )
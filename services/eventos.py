@@ -0,0 +1,135 @@
+import os
+
+# Motor de eventos de zona.
+# Antes cada trama con un objetivo dentro de una zona generaba una alerta nueva
+# (y un movimiento de cámara). Aquí se lleva el estado de cada par
+# (objetivo, zona) y solo se emiten eventos:
+#   - "entrada":     el objetivo lleva 'confirmar_entrada_s' dentro de la zona
+#   - "permanencia": latido cada 'heartbeat_s' mientras sigue dentro
+#   - "salida":      lleva 'confirmar_salida_s' fuera (o sin verse), con el tiempo de permanencia
+# Las dos confirmaciones son la histéresis: un objetivo que "tiembla" sobre el
+# borde de la zona no genera entradas y salidas en cada trama.
+# Con varios radares los ids de objetivo se repiten, así que el estado se lleva
+# por (sensor, objetivo, zona). Cada trama (de cualquier radar) cierra los pares
+# que llevan 'confirmar_salida_s' sin verse, así un radar que se desconecta no
+# deja permanencias abiertas; 'barrer' hace lo mismo sin tramas (con un timer)
+# y cierra de inmediato las de los radares quitados del registro.
+
+
+class _Permanencia:
+    __slots__ = ("sensor", "zona", "objetivo", "latitud", "longitud", "inicio", "ultima_vez", "confirmada", "ultimo_evento")
+
+    def __init__(self, sensor, zona, objetivo, latitud, longitud, ahora):
+        self.sensor = sensor
+        self.zona = zona
+        self.objetivo = objetivo
+        self.latitud = latitud
+        self.longitud = longitud
+        self.inicio = ahora
+        self.ultima_vez = ahora
+        self.confirmada = False
+        self.ultimo_evento = ahora
+
+
+class MotorEventosZona:
+    def __init__(self, confirmar_entrada_s: float = 0.5, confirmar_salida_s: float = 3.0, heartbeat_s: float = 30.0):
+        self.confirmar_entrada_s = confirmar_entrada_s
+        self.confirmar_salida_s = confirmar_salida_s
+        self.heartbeat_s = heartbeat_s
+        self._permanencias = {}  # (sensor, id objetivo, id zona) -> _Permanencia
+
+    def __len__(self):
+        return len(self._permanencias)
+
+    def dentro(self) -> list:
+        """Claves (sensor, id objetivo, id zona) con la entrada ya confirmada."""
+        return [clave for clave, p in self._permanencias.items() if p.confirmada]
+
+    @staticmethod
+    def _evento(tipo: str, permanencia: _Permanencia, ahora: float) -> dict:
+        zona = permanencia.zona
+        objetivo = permanencia.objetivo
+        return {
+            "evento": tipo,
+            "sensor": permanencia.sensor,
+            "punto_id": objetivo.id,
+            "tipo_punto": objetivo.type,
+            "posicion_detectada": {
+                "latitud": permanencia.latitud,
+                "longitud": permanencia.longitud
+            },
+            "centroide_zona": zona.centroide_para_alerta,
+            "zona": zona.zona_para_alerta,
+            "severidad": zona.severidad,
+            "inicio": permanencia.inicio,
+            "permanencia_s": permanencia.ultima_vez - permanencia.inicio,
+            "timestamp": ahora
+        }
+
+    def procesar(self, ahora: float, detecciones, sensor=None) -> list:
+        """
+        Recibe las detecciones de una trama del radar 'sensor' como tuplas
+        (objetivo, zona, latitud, longitud), donde 'zona' es la ZonaCompilada de
+        mayor prioridad o None, y devuelve la lista de eventos (documentos de
+        alerta) que corresponden a esta trama.
+        """
+        eventos = []
+        vistas = set()
+
+        for objetivo, zona, latitud, longitud in detecciones:
+            if zona is None:
+                continue
+            clave = (sensor, objetivo.id, zona.id)
+            vistas.add(clave)
+
+            permanencia = self._permanencias.get(clave)
+            if permanencia is None:
+                permanencia = self._permanencias[clave] = _Permanencia(sensor, zona, objetivo, latitud, longitud, ahora)
+            else:
+                permanencia.zona = zona
+                permanencia.objetivo = objetivo
+                permanencia.latitud = latitud
+                permanencia.longitud = longitud
+                permanencia.ultima_vez = ahora
+
+            if not permanencia.confirmada:
+                if ahora - permanencia.inicio >= self.confirmar_entrada_s:
+                    permanencia.confirmada = True
+                    permanencia.ultimo_evento = ahora
+                    eventos.append(self._evento("entrada", permanencia, ahora))
+            elif ahora - permanencia.ultimo_evento >= self.heartbeat_s:
+                permanencia.ultimo_evento = ahora
+                eventos.append(self._evento("permanencia", permanencia, ahora))
+
+        eventos.extend(self._cerrar(ahora, vistas))
+        return eventos
+
+    def barrer(self, ahora: float, sensores=None) -> list:
+        """
+        Eventos de salida de los pares que llevan 'confirmar_salida_s' sin verse
+        y, si se indica 'sensores' (los radares vigentes), de todos los pares de
+        radares que ya no están.
+        """
+        return self._cerrar(ahora, (), sensores)
+
+    def _cerrar(self, ahora: float, vistas, sensores=None) -> list:
+        eventos = []
+        for clave in [c for c in self._permanencias if c not in vistas]:
+            permanencia = self._permanencias[clave]
+            quitado = sensores is not None and clave[0] not in sensores
+            if not quitado and ahora - permanencia.ultima_vez < self.confirmar_salida_s:
+                continue
+            del self._permanencias[clave]
+            # Una entrada que nunca se confirmó se descarta sin evento
+            if permanencia.confirmada:
+                eventos.append(self._evento("salida", permanencia, ahora))
+        return eventos
+
+
+def crear_motor_eventos() -> MotorEventosZona:
+    """Crea el motor con la configuración del .env."""
+    return MotorEventosZona(
+        confirmar_entrada_s=float(os.getenv("ZONA_CONFIRMAR_ENTRADA_S", 0.5)),
+        confirmar_salida_s=float(os.getenv("ZONA_CONFIRMAR_SALIDA_S", 3.0)),
+        heartbeat_s=float(os.getenv("ZONA_HEARTBEAT_S", 30.0)),
+    )
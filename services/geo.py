@@ -0,0 +1,175 @@
+from functools import lru_cache
+import math
+
+import numpy as np
+
+# Transformación por lotes de coordenadas del radar.
+# rotate_point + convertir_cartesiano_a_geografico aplicados punto a punto
+# equivalen a una transformación afín fija para una configuración dada:
+#   lat = RADAR_LAT + (-x*sin + y*cos) / METROS_POR_GRADO_LATITUD
+#   lon = RADAR_LON + ( x*cos + y*sin) / (METROS_POR_GRADO_LATITUD * cos(RADAR_LAT))
+# Los coeficientes se calculan una sola vez y se aplican a la trama completa.
+#
+# Proyecciones del marco local (RADAR_PROYECCION):
+#   "plana": metros por grado fijos (METROS_POR_GRADO_LATITUD); el error crece
+#            con la distancia y a 1-2 km ya mueve puntos de un lado a otro del
+#            borde de una zona.
+#   "aeqd":  azimutal equidistante centrada en el radar sobre el elipsoide
+#            WGS84 (pyproj): conserva distancia y azimut desde el radar, que es
+#            lo que mide. Los Transformer se arman una vez por posición de radar
+#            y convierten la trama completa en una llamada.
+
+PROYECCION_PLANA = "plana"
+PROYECCION_AEQD = "aeqd"
+PROYECCIONES = (PROYECCION_PLANA, PROYECCION_AEQD)
+
+
+class MarcoLocal:
+    """
+    Marco métrico local centrado en el radar: 'este' y 'norte' en metros.
+    Es el mismo plano que usa convertir_cartesiano_a_geografico.
+    """
+
+    proyeccion = PROYECCION_PLANA
+
+    def __init__(self, radar_lat: float, radar_lon: float, metros_por_grado_latitud: float):
+        self.radar_lat = float(radar_lat)
+        self.radar_lon = float(radar_lon)
+        self.metros_por_grado_lat = float(metros_por_grado_latitud)
+        self.metros_por_grado_lon = self.metros_por_grado_lat * math.cos(math.radians(self.radar_lat))
+
+    def a_local(self, lat, lon) -> tuple:
+        """Latitud/longitud -> (este, norte) en metros."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        return (lon - self.radar_lon) * self.metros_por_grado_lon, (lat - self.radar_lat) * self.metros_por_grado_lat
+
+    def a_geografico(self, este, norte) -> tuple:
+        """(este, norte) en metros -> latitud/longitud."""
+        este = np.asarray(este, dtype=np.float64)
+        norte = np.asarray(norte, dtype=np.float64)
+        return self.radar_lat + norte / self.metros_por_grado_lat, self.radar_lon + este / self.metros_por_grado_lon
+
+    def a_geografico_punto(self, este: float, norte: float) -> tuple:
+        """Un solo punto, sin NumPy (rutas REST y código antiguo)."""
+        return self.radar_lat + norte / self.metros_por_grado_lat, self.radar_lon + este / self.metros_por_grado_lon
+
+
+class MarcoAEQD:
+    """
+    Marco local con la proyección azimutal equidistante (WGS84) centrada en el
+    radar. Misma interfaz que MarcoLocal; 'metros_por_grado_*' quedan solo como
+    referencia (los valores en el radar), la conversión la hace pyproj.
+    """
+
+    proyeccion = PROYECCION_AEQD
+
+    def __init__(self, radar_lat: float, radar_lon: float, metros_por_grado_latitud: float):
+        # pyproj se importa solo si se usa esta proyección
+        from pyproj import CRS, Transformer
+
+        self.radar_lat = float(radar_lat)
+        self.radar_lon = float(radar_lon)
+        self.metros_por_grado_lat = float(metros_por_grado_latitud)
+        self.metros_por_grado_lon = self.metros_por_grado_lat * math.cos(math.radians(self.radar_lat))
+        local = CRS.from_proj4(f"+proj=aeqd +lat_0={self.radar_lat!r} +lon_0={self.radar_lon!r} +datum=WGS84 +units=m")
+        # always_xy: (lon, lat) y (este, norte)
+        self._a_local = Transformer.from_crs("EPSG:4326", local, always_xy=True)
+        self._a_geografico = Transformer.from_crs(local, "EPSG:4326", always_xy=True)
+
+    def a_local(self, lat, lon) -> tuple:
+        """Latitud/longitud -> (este, norte) en metros."""
+        return self._a_local.transform(np.asarray(lon, dtype=np.float64), np.asarray(lat, dtype=np.float64))
+
+    def a_geografico(self, este, norte) -> tuple:
+        """(este, norte) en metros -> latitud/longitud."""
+        lon, lat = self._a_geografico.transform(np.asarray(este, dtype=np.float64), np.asarray(norte, dtype=np.float64))
+        return lat, lon
+
+    def a_geografico_punto(self, este: float, norte: float) -> tuple:
+        lon, lat = self._a_geografico.transform(este, norte)
+        return lat, lon
+
+
+class TransformacionRadar:
+    """
+    Convierte coordenadas cartesianas del radar (metros) a latitud/longitud,
+    aplicando la rotación del radar, para todos los objetivos de una trama.
+    """
+
+    def __init__(self, radar_lat: float, radar_lon: float, angulo_grados: float, metros_por_grado_latitud: float,
+                 proyeccion: str = PROYECCION_PLANA):
+        self.marco = obtener_marco_local(radar_lat, radar_lon, metros_por_grado_latitud, proyeccion)
+        self.radar_lat = self.marco.radar_lat
+        self.radar_lon = self.marco.radar_lon
+        self.angulo_grados = float(angulo_grados)
+
+        rad = math.radians(self.angulo_grados)
+        cos_a, sin_a = math.cos(rad), math.sin(rad)
+        grados_por_metro_lat = 1.0 / self.marco.metros_por_grado_lat
+        grados_por_metro_lon = 1.0 / self.marco.metros_por_grado_lon
+
+        # Filas: (este, norte); columnas: (x, y). Es la rotación de rotate_point.
+        self.rotacion = np.array([
+            [cos_a, sin_a],
+            [-sin_a, cos_a],
+        ])
+        # Filas: (lat, lon); columnas: (x, y). Solo vale para el marco plano.
+        self.matriz = np.array([
+            [-sin_a * grados_por_metro_lat, cos_a * grados_por_metro_lat],
+            [cos_a * grados_por_metro_lon, sin_a * grados_por_metro_lon],
+        ])
+        self.origen = np.array([self.radar_lat, self.radar_lon])
+
+    @staticmethod
+    def _apilar(x, y):
+        return np.vstack((np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)))
+
+    def a_local(self, x, y) -> tuple:
+        """
+        Recibe arreglos de x e y del radar y devuelve (este, norte) en metros
+        en el marco local del radar (ya rotados).
+        """
+        este_norte = self.rotacion @ self._apilar(x, y)
+        return este_norte[0], este_norte[1]
+
+    def a_geografico(self, x, y) -> tuple:
+        """
+        Recibe arreglos (o listas) de x e y en metros y devuelve dos arreglos
+        NumPy con las latitudes y longitudes correspondientes.
+        """
+        if self.marco.proyeccion != PROYECCION_PLANA:
+            return self.marco.a_geografico(*self.a_local(x, y))
+        lat_lon = self.matriz @ self._apilar(x, y) + self.origen[:, None]
+        return lat_lon[0], lat_lon[1]
+
+
+@lru_cache(maxsize=16)
+def obtener_marco_local(radar_lat: float, radar_lon: float, metros_por_grado_latitud: float,
+                        proyeccion: str = PROYECCION_PLANA):
+    """Devuelve (y reutiliza) el marco local para una posición de radar."""
+    if proyeccion == PROYECCION_PLANA:
+        return MarcoLocal(radar_lat, radar_lon, metros_por_grado_latitud)
+    if proyeccion == PROYECCION_AEQD:
+        return MarcoAEQD(radar_lat, radar_lon, metros_por_grado_latitud)
+    raise ValueError(f"Proyección desconocida: {proyeccion!r} (opciones: {', '.join(PROYECCIONES)})")
+
+
+@lru_cache(maxsize=16)
+def obtener_transformacion(radar_lat: float, radar_lon: float, angulo_grados: float, metros_por_grado_latitud: float,
+                           proyeccion: str = PROYECCION_PLANA) -> TransformacionRadar:
+    """Devuelve (y reutiliza) la transformación para una configuración de radar."""
+    return TransformacionRadar(radar_lat, radar_lon, angulo_grados, metros_por_grado_latitud, proyeccion)
+
+
+def vertices_cobertura(marco, radio_m: float, angulo_rotacion: float, apertura_grados: float = 45.0) -> tuple:
+    """
+    Cono de cobertura del radar centrado en 'angulo_rotacion' (grados desde el
+    norte): el radar y los dos extremos del alcance, como ((lat, lon), ...).
+    """
+    inicio = math.radians(angulo_rotacion - apertura_grados / 2)
+    fin = math.radians(angulo_rotacion + apertura_grados / 2)
+    este = (0.0, radio_m * math.sin(inicio), radio_m * math.sin(fin))
+    norte = (0.0, radio_m * math.cos(inicio), radio_m * math.cos(fin))
+    latitudes, longitudes = marco.a_geografico(este, norte)
+    return tuple(zip(latitudes.tolist(), longitudes.tolist()))
@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+import os
+
+from pymongo import ASCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from .lotes import EscritorLotes
+
+# Historial de tracks en la colección 'data'.
+# Cada punto guardado es un documento
+#   {"t": fecha, "track": {"sensor", "id"}, "latitud", "longitud", "velocidad", "rumbo", "zona"}
+# en una colección time-series de Mongo (metaField "track"), que agrupa los
+# puntos de cada track en buckets por tiempo; si Mongo no soporta time-series
+# (o 'data' ya existe como colección normal) se usan índices comunes. En ambos
+# casos la consulta por track y ventana de tiempo va por índice y los puntos
+# expiran a los 'retencion_s' segundos.
+#
+# Submuestreo por track: como máximo un punto cada 'periodo_s' (1 Hz por
+# defecto) y uno cada 'periodo_zona_s' mientras está dentro de una zona
+# (0 = todas las tramas).
+
+
+class HistorialTracks(EscritorLotes):
+    def __init__(
+        self,
+        coleccion,
+        periodo_s: float = 1.0,
+        periodo_zona_s: float = 0.0,
+        retencion_s: int = 30 * 24 * 3600,
+        tamano_lote: int = 500,
+        intervalo_s: float = 2.0,
+        max_cola: int = 50000,
+    ):
+        # Sin archivo de respaldo: si Mongo no da abasto se descartan puntos, no alertas
+        super().__init__(coleccion, "puntos de track", tamano_lote, intervalo_s, max_cola)
+        self.periodo_s = periodo_s
+        self.periodo_zona_s = periodo_zona_s
+        self.retencion_s = retencion_s
+        self._ultimo = {}  # (sensor, id) -> instante del último punto guardado
+        # Un track se olvida recién cuando ya le tocaba otro punto: con periodos
+        # largos, olvidarlo antes haría guardar todas sus tramas
+        self._horizonte_s = max(60.0, 2 * max(periodo_s, periodo_zona_s))
+        self._proxima_limpieza = 0.0
+        self.submuestreados = 0
+
+    async def preparar(self):
+        """Crea la colección time-series (o los índices) si hace falta."""
+        nombre = self.coleccion.name
+        try:
+            await self.coleccion.database.create_collection(
+                nombre,
+                timeseries={"timeField": "t", "metaField": "track", "granularity": "seconds"},
+                expireAfterSeconds=self.retencion_s,
+            )
+            print(f"Colección time-series '{nombre}' creada")
+        except (CollectionInvalid, OperationFailure) as e:
+            # Ya existe, o Mongo < 5.0: colección normal con TTL sobre 't'
+            print(f"Historial de tracks en '{nombre}' sin crear time-series: {e}")
+            try:
+                await self.coleccion.create_index([("t", ASCENDING)], expireAfterSeconds=self.retencion_s)
+            except OperationFailure as e:
+                # p.ej. 'data' ya es time-series con otra retención
+                print(f"No se pudo crear el índice TTL de '{nombre}': {e}")
+        try:
+            await self.coleccion.create_index([("track.sensor", ASCENDING), ("track.id", ASCENDING), ("t", ASCENDING)])
+        except OperationFailure as e:
+            print(f"No se pudo crear el índice por track de '{nombre}': {e}")
+
+    async def ejecutar(self):
+        """Tarea de fondo: prepara la colección y escribe los lotes."""
+        try:
+            await self.preparar()
+        except Exception as e:
+            print(f"No se pudo preparar el historial de tracks: {e}")
+        await super().ejecutar()
+
+    def registrar(self, ahora: float, sensor, objetivo_id, latitud: float, longitud: float, velocidad: float, rumbo: float, zona_id=None):
+        """Encola el punto si corresponde según el submuestreo del track."""
+        clave = (sensor, objetivo_id)
+        periodo = self.periodo_s if zona_id is None else self.periodo_zona_s
+        ultimo = self._ultimo.get(clave)
+        if ultimo is not None and ahora - ultimo < periodo:
+            self.submuestreados += 1
+            return
+        self._ultimo[clave] = ahora
+        self.encolar({
+            "t": datetime.fromtimestamp(ahora, tz=timezone.utc),
+            "track": {"sensor": sensor, "id": objetivo_id},
+            "latitud": latitud,
+            "longitud": longitud,
+            "velocidad": velocidad,
+            "rumbo": rumbo,
+            "zona": zona_id,
+        })
+
+        # Los tracks que ya no se ven no deben acumularse en memoria
+        if ahora >= self._proxima_limpieza:
+            self._proxima_limpieza = ahora + 60
+            limite = ahora - self._horizonte_s
+            self._ultimo = {c: t for c, t in self._ultimo.items() if t >= limite}
+
+    def metricas(self) -> dict:
+        metricas = super().metricas()
+        metricas["submuestreados"] = self.submuestreados
+        metricas["tracks"] = len(self._ultimo)
+        return metricas
+
+    async def recorrido(self, sensor, objetivo_id, desde: float, hasta: float, limite: int = 10000) -> list:
+        """Puntos guardados de un track entre 'desde' y 'hasta' (epoch en segundos), en orden."""
+        cursor = self.coleccion.find(
+            {
+                "track.sensor": sensor,
+                "track.id": objetivo_id,
+                "t": {
+                    "$gte": datetime.fromtimestamp(desde, tz=timezone.utc),
+                    "$lte": datetime.fromtimestamp(hasta, tz=timezone.utc),
+                },
+            },
+            {"_id": 0, "track": 0},
+        ).sort("t", ASCENDING).limit(limite)
+        return [
+            dict(documento, t=documento["t"].replace(tzinfo=timezone.utc).timestamp())
+            async for documento in cursor
+        ]
+
+
+def crear_historial_tracks(coleccion) -> HistorialTracks:
+    """Crea el historial con la configuración del .env."""
+    return HistorialTracks(
+        coleccion,
+        periodo_s=float(os.getenv("HISTORIAL_PERIODO_S", 1.0)),
+        periodo_zona_s=float(os.getenv("HISTORIAL_PERIODO_ZONA_S", 0.0)),
+        retencion_s=int(os.getenv("HISTORIAL_RETENCION_S", 30 * 24 * 3600)),
+        tamano_lote=int(os.getenv("HISTORIAL_TAMANO_LOTE", 500)),
+        intervalo_s=float(os.getenv("HISTORIAL_INTERVALO_S", 2.0)),
+        max_cola=int(os.getenv("HISTORIAL_MAX_COLA", 50000)),
+    )
@@ -0,0 +1,212 @@
+from pathlib import Path
+from typing import Optional
+import asyncio
+import time
+
+from bson import json_util
+from pymongo.errors import BulkWriteError
+
+from .metricas import Histograma
+
+# Escritura en lotes en segundo plano.
+# La tarea del radar solo encola; un escritor junta los documentos y los inserta
+# en Mongo con insert_many por tamaño de lote o por tiempo. Si Mongo está lento y
+# la cola se llena (o un insert falla), los documentos se respaldan en un archivo
+# local y se reinsertan cuando Mongo vuelve a responder. Sin archivo de respaldo
+# esos documentos se descartan (y se cuentan).
+#
+# El respaldo no escribe el archivo desde el loop: los documentos se juntan en
+# memoria y una sola tarea los agrega al archivo en un hilo. Así encolar sigue
+# siendo O(1) justo cuando la cola está llena.
+# Los documentos respaldados conservan su '_id' (json_util): si un insert_many
+# falló después de escribir una parte, al reinsertar esos documentos dan clave
+# duplicada y se ignoran en lugar de quedar dos veces.
+
+DUPLICADO = 11000  # código de error de Mongo para clave duplicada
+
+
+class EscritorLotes:
+    def __init__(
+        self,
+        coleccion,
+        nombre: str = "documentos",
+        tamano_lote: int = 200,
+        intervalo_s: float = 1.0,
+        max_cola: int = 10000,
+        archivo_respaldo: Optional[str] = None,
+    ):
+        self.coleccion = coleccion  # colección Motor (asíncrona)
+        self.nombre = nombre
+        self.tamano_lote = tamano_lote
+        self.intervalo_s = intervalo_s
+        self.archivo_respaldo = Path(archivo_respaldo) if archivo_respaldo else None
+        self._cola = asyncio.Queue(maxsize=max_cola)
+        self._por_respaldar = []  # documentos que aún no llegan al archivo
+        self._volcado = None  # tarea que los agrega al archivo
+        self._bloqueo_archivo = asyncio.Lock()  # agregar al archivo / renombrarlo para reinsertar
+
+        # Contadores
+        self.encoladas = 0
+        self.escritas = 0
+        self.respaldadas = 0
+        self.reinsertadas = 0
+        self.descartadas = 0
+        self.lotes = 0
+        self.errores = 0
+        self.ultimo_lote_ms = 0.0
+        self.latencia_lotes = Histograma()  # duración de cada insert_many exitoso
+
+    def encolar(self, documento: dict):
+        """
+        Encola un documento sin esperar a la base de datos.
+        Se guarda una copia porque insert_many agrega '_id' al documento.
+        """
+        self.encoladas += 1
+        try:
+            self._cola.put_nowait(dict(documento))
+        except asyncio.QueueFull:
+            self._respaldar([dict(documento)])
+
+    def metricas(self) -> dict:
+        return {
+            "en_cola": self._cola.qsize(),
+            "capacidad_cola": self._cola.maxsize,
+            "encoladas": self.encoladas,
+            "escritas": self.escritas,
+            "respaldadas": self.respaldadas,
+            "reinsertadas": self.reinsertadas,
+            "descartadas": self.descartadas,
+            "lotes": self.lotes,
+            "errores": self.errores,
+            "ultimo_lote_ms": self.ultimo_lote_ms,
+            "respaldo_pendiente": bool(self._por_respaldar) or self._hay_respaldo(),
+        }
+
+    def _hay_respaldo(self) -> bool:
+        return self.archivo_respaldo is not None and self.archivo_respaldo.exists()
+
+    def _respaldar(self, documentos: list):
+        """Deja los documentos para el archivo de respaldo; no escribe desde el loop."""
+        if not documentos:
+            return
+        if self.archivo_respaldo is None:
+            self.descartadas += len(documentos)
+            return
+        self._por_respaldar.extend(documentos)
+        self.respaldadas += len(documentos)
+        if self._volcado is None or self._volcado.done():
+            self._volcado = asyncio.create_task(self._volcar_respaldo())
+
+    async def _volcar_respaldo(self):
+        async with self._bloqueo_archivo:
+            while self._por_respaldar:
+                documentos, self._por_respaldar = self._por_respaldar, []
+                await asyncio.to_thread(self._anexar, self.archivo_respaldo, documentos)
+
+    @staticmethod
+    def _anexar(ruta: Path, documentos: list):
+        with ruta.open("a", encoding="utf-8") as f:
+            f.writelines(json_util.dumps(documento) + "\n" for documento in documentos)
+
+    async def _siguiente_lote(self) -> list:
+        lote = [await self._cola.get()]
+        limite = time.monotonic() + self.intervalo_s
+        try:
+            while len(lote) < self.tamano_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Lo ya sacado de la cola no se pierde al apagar
+            self._respaldar(lote)
+            raise
+        return lote
+
+    async def _insertar(self, lote: list) -> bool:
+        inicio = time.perf_counter()
+        try:
+            # ordered=False: un documento que falla no impide escribir los demás
+            await self.coleccion.insert_many(lote, ordered=False)
+        except BulkWriteError as e:
+            # Solo se respaldan los que fallaron; los duplicados ya estaban escritos
+            errores = e.details.get("writeErrors", [])
+            fallidos = [lote[error["index"]] for error in errores if error.get("code") != DUPLICADO]
+            self.escritas += len(lote) - len(fallidos)
+            if not fallidos:
+                return True
+            self._error(len(fallidos), e)
+            self._respaldar(fallidos)
+            return False
+        except Exception as e:
+            # Sin detalle (p.ej. timeout): se respalda el lote completo con sus _id
+            self._error(len(lote), e)
+            self._respaldar(lote)
+            return False
+        duracion = time.perf_counter() - inicio
+        self.latencia_lotes.observar(duracion)
+        self.ultimo_lote_ms = duracion * 1000
+        self.escritas += len(lote)
+        self.lotes += 1
+        return True
+
+    def _error(self, cantidad: int, error: Exception):
+        self.errores += 1
+        destino = f"Se respaldan en {self.archivo_respaldo}" if self.archivo_respaldo else "Se descartan"
+        print(f"Error al guardar {cantidad} {self.nombre}: {error}. {destino}")
+
+    @staticmethod
+    def _leer_respaldo(ruta: Path) -> list:
+        with ruta.open(encoding="utf-8") as f:
+            return [json_util.loads(linea) for linea in f if linea.strip()]
+
+    async def _reinsertar_respaldo(self):
+        # Con el bloqueo, el renombre no se mezcla con un volcado a medias
+        en_proceso = self.archivo_respaldo.with_suffix(".procesando")
+        async with self._bloqueo_archivo:
+            await asyncio.to_thread(self.archivo_respaldo.replace, en_proceso)
+        documentos = await asyncio.to_thread(self._leer_respaldo, en_proceso)
+        for i in range(0, len(documentos), self.tamano_lote):
+            lote = documentos[i:i + self.tamano_lote]
+            if not await self._insertar(lote):
+                # _insertar ya respaldó este lote; se devuelven también los que faltan
+                self._respaldar(documentos[i + self.tamano_lote:])
+                break
+            self.reinsertadas += len(lote)
+        en_proceso.unlink()
+
+    async def ejecutar(self):
+        """Tarea de fondo: vacía la cola en lotes mientras la app está activa."""
+        if self.archivo_respaldo is not None:
+            # Un respaldo que quedó a medio reinsertar (p.ej. por un corte) vuelve al respaldo
+            en_proceso = self.archivo_respaldo.with_suffix(".procesando")
+            if en_proceso.exists():
+                async with self._bloqueo_archivo:
+                    documentos = await asyncio.to_thread(self._leer_respaldo, en_proceso)
+                    await asyncio.to_thread(self._anexar, self.archivo_respaldo, documentos)
+                    en_proceso.unlink()
+            if self._hay_respaldo():
+                await self._reinsertar_respaldo()
+        while True:
+            lote = await self._siguiente_lote()
+            try:
+                insertado = await self._insertar(lote)
+            except asyncio.CancelledError:
+                self._respaldar(lote)
+                raise
+            if insertado and self._hay_respaldo():
+                await self._reinsertar_respaldo()
+
+    async def vaciar(self):
+        """Inserta lo que quede en la cola (al apagar el servidor)."""
+        lote = []
+        while not self._cola.empty():
+            lote.append(self._cola.get_nowait())
+        for i in range(0, len(lote), self.tamano_lote):
+            await self._insertar(lote[i:i + self.tamano_lote])
+        # Lo que se respaldó al apagar tiene que llegar al archivo antes de salir
+        if self._volcado is not None:
+            await self._volcado
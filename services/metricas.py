@@ -0,0 +1,303 @@
+from bisect import bisect_left
+import asyncio
+import time
+
+# Métricas de la ingesta y exportación en formato de texto de Prometheus.
+# Los histogramas tienen límites fijos: observar un valor es un bisect y una
+# suma, así la instrumentación se puede dejar siempre activa en el camino del
+# radar. El texto se arma solo cuando alguien consulta /api/metrics.
+
+# Límites en segundos (le="..." de Prometheus): de 100 us a 2,5 s
+LIMITES_SEGUNDOS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histograma:
+    __slots__ = ("limites", "cuentas", "suma", "total")
+
+    def __init__(self, limites: tuple = LIMITES_SEGUNDOS):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)  # la última es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.cuentas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+class Histogramas:
+    """Un histograma por valor de etiqueta (etapa, cámara, sensor...)."""
+
+    def __init__(self, limites: tuple = LIMITES_SEGUNDOS):
+        self.limites = limites
+        self.por_etiqueta = {}
+
+    def observar(self, etiqueta, valor: float):
+        histograma = self.por_etiqueta.get(etiqueta)
+        if histograma is None:
+            histograma = self.por_etiqueta[etiqueta] = Histograma(self.limites)
+        histograma.observar(valor)
+
+    def observar_marcas(self, etapas: tuple, marcas: list):
+        """marcas[i] y marcas[i + 1] son el inicio y el fin de etapas[i] (perf_counter)."""
+        for i, etapa in enumerate(etapas):
+            self.observar(etapa, marcas[i + 1] - marcas[i])
+
+
+class Tasa:
+    """Contador con su tasa por segundo en la última ventana completa."""
+
+    __slots__ = ("total", "ventana_s", "_inicio", "_inicio_total", "por_segundo")
+
+    def __init__(self, ventana_s: float = 5.0):
+        self.total = 0
+        self.ventana_s = ventana_s
+        self._inicio = time.monotonic()
+        self._inicio_total = 0
+        self.por_segundo = 0.0
+
+    def incrementar(self, n: int = 1):
+        self.total += n
+        ahora = time.monotonic()
+        if ahora - self._inicio >= self.ventana_s:
+            self.por_segundo = (self.total - self._inicio_total) / (ahora - self._inicio)
+            self._inicio = ahora
+            self._inicio_total = self.total
+
+    def actual(self) -> float:
+        """Tasa vigente; cae a 0 si dejaron de llegar tramas."""
+        if time.monotonic() - self._inicio >= 2 * self.ventana_s:
+            return 0.0
+        return self.por_segundo
+
+
+class MetricasIngesta:
+    """Contadores por radar y latencias por etapa de la ingesta."""
+
+    def __init__(self):
+        self.etapas = Histogramas()
+        self.tramas_total = Histogramas()  # latencia de la trama completa, por radar
+        self.tramas = {}  # sensor -> Tasa
+        self.invalidas = {}  # sensor -> tramas que no se pudieron decodificar
+        self.descartadas = {}  # sensor -> tramas recibidas que no se procesaron
+        self.reconexiones = {}  # sensor -> conexiones perdidas o fallidas
+
+    def trama(self, sensor: str, segundos: float):
+        tasa = self.tramas.get(sensor)
+        if tasa is None:
+            tasa = self.tramas[sensor] = Tasa()
+        tasa.incrementar()
+        self.tramas_total.observar(sensor, segundos)
+
+    def contar(self, contador: dict, sensor: str):
+        contador[sensor] = contador.get(sensor, 0) + 1
+
+
+class SondaLoop:
+    """
+    Mide el retraso del loop de asyncio: duerme 'intervalo_s' y registra cuánto
+    tarde despertó. Una llamada bloqueante (p.ej. una consulta síncrona a Mongo)
+    aparece como un retraso del tamaño de la llamada.
+    """
+
+    def __init__(self, intervalo_s: float = 0.05):
+        self.intervalo_s = intervalo_s
+        self.retrasos = Histograma()
+        self.maximo_s = 0.0
+
+    async def ejecutar(self):
+        while True:
+            inicio = time.perf_counter()
+            await asyncio.sleep(self.intervalo_s)
+            retraso = max(time.perf_counter() - inicio - self.intervalo_s, 0.0)
+            self.retrasos.observar(retraso)
+            if retraso > self.maximo_s:
+                self.maximo_s = retraso
+
+
+class TiemposArranque:
+    """
+    Duración de cada paso del arranque (importación, carga de configuración,
+    subsistemas opcionales). Un paso que falla queda con su error y el
+    arranque sigue: la tarea del radar reintenta por su cuenta.
+    """
+
+    def __init__(self):
+        self.pasos = []  # (nombre, segundos, error o None)
+
+    def registrar(self, nombre: str, segundos: float, error: str = None):
+        self.pasos.append((nombre, segundos, error))
+
+    async def medir(self, nombre: str, corrutina, timeout_s: float = None):
+        inicio = time.perf_counter()
+        try:
+            resultado = await asyncio.wait_for(corrutina, timeout_s)
+        except Exception as e:
+            self.registrar(nombre, time.perf_counter() - inicio, f"{type(e).__name__}: {str(e)[:100]}")
+            return None
+        self.registrar(nombre, time.perf_counter() - inicio)
+        return resultado
+
+    def reporte(self, total_s: float = None) -> str:
+        """total_s: desde el inicio de la importación (los pasos pueden ir en paralelo)."""
+        lineas = ["Arranque:"]
+        for nombre, segundos, error in self.pasos:
+            lineas.append(f"  {nombre:<16}{segundos * 1000:>9.1f} ms" + (f"  ERROR {error}" if error else ""))
+        if total_s is not None:
+            lineas.append(f"  {'total':<16}{total_s * 1000:>9.1f} ms")
+        return "\n".join(lineas)
+
+
+def _etiquetas(etiquetas: dict) -> str:
+    if not etiquetas:
+        return ""
+    pares = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in etiquetas.items()
+    )
+    return "{" + pares + "}"
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class TextoPrometheus:
+    """Arma la respuesta en el formato de exposición de texto 0.0.4."""
+
+    TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._lineas = []
+
+    def _familia(self, nombre: str, tipo: str, ayuda: str):
+        self._lineas.append(f"# HELP {nombre} {ayuda}")
+        self._lineas.append(f"# TYPE {nombre} {tipo}")
+
+    def _muestras(self, nombre: str, valores):
+        if isinstance(valores, (int, float)):
+            valores = [({}, valores)]
+        for etiquetas, valor in valores:
+            self._lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}")
+
+    def contador(self, nombre: str, ayuda: str, valores):
+        """valores: un número o una lista de (etiquetas, valor)."""
+        self._familia(nombre, "counter", ayuda)
+        self._muestras(nombre, valores)
+
+    def medidor(self, nombre: str, ayuda: str, valores):
+        self._familia(nombre, "gauge", ayuda)
+        self._muestras(nombre, valores)
+
+    def histograma(self, nombre: str, ayuda: str, etiqueta: str, histogramas: dict):
+        """histogramas: valor de la etiqueta -> Histograma (p.ej. Histogramas.por_etiqueta)."""
+        self._familia(nombre, "histogram", ayuda)
+        for valor_etiqueta, histograma in sorted(histogramas.items(), key=lambda par: str(par[0])):
+            acumulado = 0
+            for limite, cuenta in zip(histograma.limites + (float("inf"),), histograma.cuentas):
+                acumulado += cuenta
+                self._muestras(f"{nombre}_bucket", [({etiqueta: valor_etiqueta, "le": _numero(limite)}, acumulado)])
+            self._muestras(f"{nombre}_sum", [({etiqueta: valor_etiqueta}, histograma.suma)])
+            self._muestras(f"{nombre}_count", [({etiqueta: valor_etiqueta}, histograma.total)])
+
+    def texto(self) -> str:
+        return "\n".join(self._lineas) + "\n"
+
+
+def texto_metricas(
+    metricas_ingesta: MetricasIngesta,
+    sonda_loop: SondaLoop,
+    tiempos_arranque: TiemposArranque,
+    sensores,
+    gestores: dict,
+    escritores: dict,
+    duplicados: dict,
+    tracks_activos: int,
+    registro_version: int,
+    configuracion_version: int,
+    actor_ptz=None,
+    planificador_camaras=None,
+) -> str:
+    """
+    Texto de /api/metrics. gestores: endpoint -> ConnectionManager; escritores:
+    nombre -> EscritorLotes; actor_ptz y planificador_camaras son opcionales.
+    """
+    texto = TextoPrometheus()
+    sensores = sorted(set(metricas_ingesta.tramas) | set(sensores))
+
+    def por_sensor(contador: dict) -> list:
+        return [({"sensor": sensor}, contador.get(sensor, 0)) for sensor in sensores]
+
+    texto.histograma("radar_etapa_segundos", "Duración de cada etapa del procesamiento de una trama.", "etapa", metricas_ingesta.etapas.por_etiqueta)
+    texto.histograma("radar_trama_segundos", "Desde la recepción de la trama hasta que quedó encolada para los clientes.", "sensor", metricas_ingesta.tramas_total.por_etiqueta)
+    texto.contador("radar_tramas_total", "Tramas procesadas.", [
+        ({"sensor": sensor}, metricas_ingesta.tramas[sensor].total if sensor in metricas_ingesta.tramas else 0) for sensor in sensores
+    ])
+    texto.medidor("radar_tramas_por_segundo", "Tramas procesadas por segundo (ventana de 5 s).", [
+        ({"sensor": sensor}, metricas_ingesta.tramas[sensor].actual() if sensor in metricas_ingesta.tramas else 0.0) for sensor in sensores
+    ])
+    texto.contador("radar_tramas_invalidas_total", "Tramas que no se pudieron decodificar.", por_sensor(metricas_ingesta.invalidas))
+    texto.contador("radar_tramas_descartadas_total", "Tramas recibidas que no se procesaron (radar quitado o con otra url).", por_sensor(metricas_ingesta.descartadas))
+    texto.contador("radar_reconexiones_total", "Conexiones con el radar perdidas o fallidas.", por_sensor(metricas_ingesta.reconexiones))
+    texto.histograma("radar_loop_retraso_segundos", "Retraso del loop de asyncio (llamadas bloqueantes).", "loop", {"principal": sonda_loop.retrasos})
+    texto.medidor("radar_loop_retraso_max_segundos", "Mayor retraso del loop desde el arranque.", sonda_loop.maximo_s)
+    texto.contador("radar_objetivos_duplicados_total", "Objetivos descartados por repetir el id de otro en la misma trama.", por_sensor(duplicados))
+    texto.medidor("radar_tracks_activos", "Tracks en la tabla del filtro de Kalman.", tracks_activos)
+    texto.medidor("radar_registro_version", "Versión del registro de zonas y sensores.", registro_version)
+    texto.medidor("radar_configuracion_version", "Versión de la configuración del radar principal (0 = sin cargar).", configuracion_version)
+
+    clientes = [(endpoint, cliente) for endpoint, gestor in gestores.items() for cliente in gestor.clientes.values()]
+    endpoints = tuple(gestores)
+    texto.medidor("radar_ws_clientes", "Clientes websocket conectados.", [
+        ({"endpoint": endpoint}, sum(1 for e, _ in clientes if e == endpoint)) for endpoint in endpoints
+    ])
+    texto.medidor("radar_ws_cola", "Tramas en cola para los clientes websocket (suma).", [
+        ({"endpoint": endpoint}, sum(len(c.cola) for e, c in clientes if e == endpoint)) for endpoint in endpoints
+    ])
+    texto.medidor("radar_ws_cola_max", "Cola del cliente websocket más atrasado.", [
+        ({"endpoint": endpoint}, max((len(c.cola) for e, c in clientes if e == endpoint), default=0)) for endpoint in endpoints
+    ])
+    texto.contador("radar_ws_tramas_descartadas_total", "Tramas descartadas por clientes websocket lentos.", [
+        ({"endpoint": endpoint}, gestor.descartados_total()) for endpoint, gestor in gestores.items()
+    ])
+
+    metricas_escritores = [(nombre, escritor.metricas()) for nombre, escritor in escritores.items()]
+    texto.medidor("radar_escritor_cola", "Documentos en cola para Mongo.", [({"escritor": n}, m["en_cola"]) for n, m in metricas_escritores])
+    for clave, ayuda in (
+        ("escritas", "Documentos insertados en Mongo."),
+        ("respaldadas", "Documentos enviados al archivo de respaldo."),
+        ("descartadas", "Documentos descartados (sin archivo de respaldo)."),
+        ("errores", "Inserts fallidos."),
+    ):
+        texto.contador(f"radar_escritor_{clave}_total", ayuda, [({"escritor": n}, m[clave]) for n, m in metricas_escritores])
+    texto.histograma("radar_escritor_lote_segundos", "Duración de cada insert_many.", "escritor", {
+        nombre: escritor.latencia_lotes for nombre, escritor in escritores.items()
+    })
+
+    if actor_ptz is not None:
+        metricas_ptz = actor_ptz.metricas()
+        for clave, ayuda in (
+            ("enviados", "Movimientos enviados a la cámara."),
+            ("reemplazados", "Objetivos reemplazados por uno más reciente antes de enviarse."),
+            ("descartados_viejos", "Objetivos descartados por antiguos."),
+            ("errores", "Movimientos fallidos."),
+        ):
+            texto.contador(f"radar_ptz_{clave}_total", ayuda, [({"camara": c}, m[clave]) for c, m in metricas_ptz.items()])
+        texto.histograma("radar_ptz_movimiento_segundos", "Duración de cada movimiento PTZ (cálculo y llamada ONVIF).", "camara", actor_ptz.latencia_envios.por_etiqueta)
+        if planificador_camaras is not None:
+            metricas_asignacion = planificador_camaras.metricas()
+            texto.medidor("radar_ptz_asignada", "1 si la cámara sigue a un objetivo.", [
+                ({"camara": c}, int(m["objetivo"] is not None)) for c, m in metricas_asignacion.items()
+            ])
+            texto.contador("radar_ptz_reasignaciones_total", "Cambios de objetivo de cada cámara.", [
+                ({"camara": c}, m["reasignaciones"]) for c, m in metricas_asignacion.items()
+            ])
+
+    texto.medidor("radar_arranque_segundos", "Duración de cada paso del arranque.", [
+        ({"paso": nombre}, segundos) for nombre, segundos, _ in tiempos_arranque.pasos
+    ])
+
+    return texto.texto()
@@ -0,0 +1,216 @@
+from typing import Optional
+import time
+
+from .geo import PROYECCION_PLANA, obtener_transformacion
+
+# Procesamiento de una trama decodificada: transformación a geográficas, filtro
+# de Kalman, zonas, eventos de alerta y objetivo de la cámara.
+# routes/Radar.py lo usa con los escritores y el actor PTZ del servidor; las
+# herramientas de reproducción lo arman sin ellos (sin red ni base de datos).
+# Con 'etapas' (services/metricas.Histogramas) se registra la duración de cada
+# etapa de ETAPAS_PIPELINE en cada trama.
+
+ETAPAS_PIPELINE = ("transformar", "seguimiento", "zonas", "eventos", "ptz", "vista")
+
+
+class PipelineRadar:
+    def __init__(
+        self,
+        metros_por_grado_latitud: float,
+        tabla_tracks,
+        motor_eventos,
+        vista_sensores,
+        escritor_alertas=None,
+        historial_tracks=None,
+        actor_ptz=None,
+        horizonte_prediccion_s: float = 1.0,
+        ptz_anticipar: bool = False,
+        camara: str = "camara_principal",
+        planificador_camaras=None,
+        etapas=None,
+    ):
+        self.metros_por_grado_latitud = metros_por_grado_latitud
+        self.tabla_tracks = tabla_tracks
+        self.motor_eventos = motor_eventos
+        self.vista_sensores = vista_sensores
+        # Destinos opcionales: None = no se guarda / no se mueve la cámara
+        self.escritor_alertas = escritor_alertas
+        self.historial_tracks = historial_tracks
+        self.actor_ptz = actor_ptz
+        self.horizonte_prediccion_s = horizonte_prediccion_s
+        self.ptz_anticipar = ptz_anticipar
+        self.camara = camara
+        # Con varias cámaras (services/asignacion.PlanificadorCamaras) cada una
+        # sigue a un objetivo distinto; sin él, todo va a 'camara'
+        self.planificador_camaras = planificador_camaras
+        self.etapas = etapas
+        self.duplicados = {}  # sensor -> objetivos repetidos (mismo id en una trama) descartados
+        self._alertas_pendientes = []  # salidas de 'barrer' que aún no se difundieron
+
+    def procesar(self, objetivos, sensor, estado, ahora: Optional[float] = None) -> Optional[dict]:
+        """
+        Procesa los objetivos de una trama del radar 'sensor' con el estado
+        vigente del registro (zonas compiladas y su marco) y devuelve la vista
+        combinada de todos los radares más las alertas de esta trama.
+        'ahora' (epoch en segundos) permite reproducir una grabación con sus
+        tiempos originales; por defecto es la hora actual.
+        """
+        if objetivos is None:
+            return None
+
+        # Dos objetivos con el mismo id en una trama irían a la misma ranura del
+        # filtro de Kalman (y a los mismos eventos): se conserva el primero
+        ids = {objetivo.id for objetivo in objetivos}
+        if len(ids) < len(objetivos):
+            vistos = set()
+            unicos = []
+            for objetivo in objetivos:
+                if objetivo.id not in vistos:
+                    vistos.add(objetivo.id)
+                    unicos.append(objetivo)
+            self.duplicados[sensor.id] = self.duplicados.get(sensor.id, 0) + len(objetivos) - len(unicos)
+            objetivos = unicos
+
+        reloj = time.perf_counter
+        marcas = [reloj()]
+        processed_points = []
+        alertas_detectadas = []
+        ZONAS_DE_DETECCION = estado.indice
+
+        # Rotación y conversión a geográficas de toda la trama en un solo paso, con
+        # las constantes que el registro precalculó para la configuración vigente
+        geometria = estado.geometrias.get(sensor.id)
+        if geometria is not None and geometria.sensor is sensor:
+            transformacion = geometria.transformacion
+        else:
+            proyeccion = estado.marco.proyeccion if estado.marco is not None else PROYECCION_PLANA
+            transformacion = obtener_transformacion(
+                sensor.latitud, sensor.longitud, sensor.angulo_total, self.metros_por_grado_latitud, proyeccion
+            )
+        este, norte = transformacion.a_local(
+            [objetivo.x for objetivo in objetivos],
+            [objetivo.y for objetivo in objetivos]
+        )
+        latitudes, longitudes = transformacion.marco.a_geografico(este, norte)
+        marco = transformacion.marco
+        if estado.marco is not None and transformacion.marco is not estado.marco:
+            # Radar secundario: sus puntos se llevan al marco en que están compiladas las zonas
+            marco = estado.marco
+            este, norte = marco.a_local(latitudes, longitudes)
+        marcas.append(reloj())
+
+        # Filtro de Kalman de toda la trama en una sola pasada
+        reproduccion = ahora is not None
+        if ahora is None:
+            ahora = time.time()
+        estimacion = self.tabla_tracks.actualizar(ahora, sensor.id, [objetivo.id for objetivo in objetivos], este, norte)
+        latitudes_suavizadas, longitudes_suavizadas = marco.a_geografico(estimacion.este, estimacion.norte)
+        latitudes_previstas, longitudes_previstas = marco.a_geografico(*estimacion.prediccion(self.horizonte_prediccion_s))
+        marcas.append(reloj())
+
+        detecciones = []
+        puntos_en_zona = {}
+
+        for objetivo, x_local, y_local, latitud, longitud, lat_suavizada, lon_suavizada, velocidad, rumbo, lat_prevista, lon_prevista in zip(
+            objetivos, este.tolist(), norte.tolist(), latitudes.tolist(), longitudes.tolist(),
+            latitudes_suavizadas.tolist(), longitudes_suavizadas.tolist(),
+            estimacion.velocidad().tolist(), estimacion.rumbo().tolist(),
+            latitudes_previstas.tolist(), longitudes_previstas.tolist()
+        ):
+
+            # Solo se evalúan las zonas cercanas al punto (índice espacial),
+            # con los polígonos ya proyectados al marco local del radar
+            zona_detectada = ZONAS_DE_DETECCION.zona_prioritaria(x_local, y_local)
+
+            puntos_a_enviar = {
+                "id": objetivo.id,
+                "sensor": sensor.id,
+                "type": objetivo.type,
+                "latitud": latitud,
+                "longitud": longitud,
+                "azimut": objetivo.a,
+                "distancia": objetivo.d,
+                "track": {
+                    "latitud": lat_suavizada,
+                    "longitud": lon_suavizada,
+                    "velocidad": round(velocidad, 2), # m/s
+                    "rumbo": round(rumbo, 1), # grados desde el norte
+                    "prediccion": {
+                        "latitud": lat_prevista,
+                        "longitud": lon_prevista
+                    }
+                }
+            }
+
+            if self.historial_tracks is not None:
+                self.historial_tracks.registrar(
+                    ahora, sensor.id, objetivo.id, latitud, longitud, velocidad, rumbo,
+                    zona_detectada.id if zona_detectada else None
+                )
+
+            if zona_detectada:
+                # La zona actual se muestra en cada punto, en todas las tramas
+                puntos_a_enviar["zona_alerta"] = zona_detectada.zona_alerta
+                detecciones.append((objetivo, zona_detectada, latitud, longitud))
+                puntos_en_zona[objetivo.id] = puntos_a_enviar
+
+            processed_points.append(puntos_a_enviar)
+        marcas.append(reloj())
+
+        # Las alertas solo se generan en los eventos de entrada, permanencia y salida
+        if self._alertas_pendientes:
+            alertas_detectadas.extend(self._alertas_pendientes)
+            self._alertas_pendientes = []
+        self._guardar_alertas(self.motor_eventos.procesar(ahora, detecciones, sensor.id), alertas_detectadas)
+        marcas.append(reloj())
+
+        # Las cámaras siguen a los objetivos confirmados dentro de zona, por prioridad.
+        # El actor PTZ se queda con el más reciente y mueve cada cámara fuera del loop.
+        if self.actor_ptz is not None:
+            confirmados = set(self.motor_eventos.dentro())
+            candidatos = []
+            for objetivo, zona, latitud, longitud in detecciones:
+                if (sensor.id, objetivo.id, zona.id) in confirmados:
+                    punto_camara = puntos_en_zona[objetivo.id]
+                    if self.ptz_anticipar:
+                        # Se apunta a la posición prevista; el azimut medido por el radar
+                        # no se usa porque fijaría el pan en la posición actual
+                        prevision = punto_camara["track"]["prediccion"]
+                        punto_camara = dict(punto_camara, latitud=prevision["latitud"], longitud=prevision["longitud"], azimut=None)
+                    candidatos.append((zona.prioridad, punto_camara))
+            if self.planificador_camaras is not None:
+                for camara_id, punto_camara in self.planificador_camaras.actualizar(sensor.id, candidatos, ahora).items():
+                    self.actor_ptz.apuntar(camara_id, punto_camara)
+            elif candidatos:
+                # Una sola cámara: la zona más prioritaria (a igual prioridad, el primero)
+                self.actor_ptz.apuntar(self.camara, max(candidatos, key=lambda candidato: candidato[0])[1])
+        marcas.append(reloj())
+
+        processed_data = {
+            # Los puntos de esta trama junto con los últimos de los demás radares
+            # (en reproducción la vigencia se mide con el reloj de la grabación)
+            "puntos": self.vista_sensores.combinar(sensor.id, processed_points, ahora if reproduccion else time.monotonic()),
+            "alertas": alertas_detectadas
+        }
+        if self.etapas is not None:
+            marcas.append(reloj())
+            self.etapas.observar_marcas(ETAPAS_PIPELINE, marcas)
+        return processed_data
+
+    def _guardar_alertas(self, alertas: list, destino: list):
+        for alerta in alertas:
+            destino.append(alerta)
+            if self.escritor_alertas is not None:
+                # Encolar para guardar en la colección de alertas (no espera a Mongo)
+                self.escritor_alertas.encolar(alerta)
+
+    def barrer(self, sensores=None, ahora: Optional[float] = None) -> list:
+        """
+        Cierra las permanencias de radares que dejaron de enviar tramas (o que ya
+        no están en 'sensores'). Las salidas se guardan ya y se difunden con la
+        próxima trama procesada; devuelve las generadas ahora.
+        """
+        alertas = []
+        self._guardar_alertas(self.motor_eventos.barrer(time.time() if ahora is None else ahora, sensores), alertas)
+        self._alertas_pendientes.extend(alertas)
+        return alertas
@@ -0,0 +1,163 @@
+# Protocolo compacto para /api/radar (?protocolo=delta).
+#
+# En lugar de reenviar todos los puntos en cada trama se envían:
+#   keyframe  {"t": "k", "s": seq, "q": escala, "z": {id: [name, color, category]}, "p": [fila, ...], "a": [alerta, ...]}
+#   delta     {"t": "d", "s": seq, "b": seq_base, "u": [fila, ...], "r": [[id, sensor], ...], "a": [alerta, ...], "z": {...}}
+# fila   = [id, type, lat_q, lon_q, azimut_q, distancia_q, zona_id, sensor]
+# alerta = [evento, punto_id, zona_id, severidad, lat_q, lon_q, permanencia_s, sensor]
+#
+# lat/lon van cuantizadas como enteros (grados * q) y azimut/distancia en décimas.
+# Un objetivo se identifica por (id, sensor): con varios radares los ids se repiten.
+# 'u' trae los objetivos nuevos o que cambiaron, 'r' los que desaparecieron y
+# 'z' (opcional) las zonas nuevas o modificadas. Un delta solo aplica sobre la
+# trama 'b'; un cliente que pierde una trama recibe el keyframe de la siguiente.
+
+ESCALA_COORDENADAS = 1_000_000  # 1e-6 grados ~ 0.1 m
+ESCALA_DECIMAS = 10
+
+
+def _fila(punto: dict) -> list:
+    zona = punto.get("zona_alerta")
+    return [
+        punto.get("id"),
+        punto.get("type"),
+        round(punto["latitud"] * ESCALA_COORDENADAS),
+        round(punto["longitud"] * ESCALA_COORDENADAS),
+        round((punto.get("azimut") or 0) * ESCALA_DECIMAS),
+        round((punto.get("distancia") or 0) * ESCALA_DECIMAS),
+        zona["id"] if zona else None,
+        punto.get("sensor"),
+    ]
+
+
+def _alerta(alerta: dict) -> list:
+    posicion = alerta.get("posicion_detectada", {})
+    return [
+        alerta.get("evento"),
+        alerta.get("punto_id"),
+        alerta.get("zona", {}).get("id"),
+        alerta.get("severidad"),
+        round(posicion.get("latitud", 0) * ESCALA_COORDENADAS),
+        round(posicion.get("longitud", 0) * ESCALA_COORDENADAS),
+        round(alerta.get("permanencia_s", 0), 1),
+        alerta.get("sensor"),
+    ]
+
+
+def _keyframe(seq: int, filas: list, zonas: dict, alertas: list) -> dict:
+    return {
+        "t": "k",
+        "s": seq,
+        "q": ESCALA_COORDENADAS,
+        "z": {str(zona_id): datos for zona_id, datos in zonas.items()},
+        "p": filas,
+        "a": alertas,
+    }
+
+
+class TramaDelta:
+    """Salida del codificador para una trama: el mensaje compartido y, a pedido, su keyframe."""
+
+    __slots__ = ("seq", "mensaje", "_filas", "_zonas", "_alertas", "_clave")
+
+    def __init__(self, seq: int, mensaje: dict, filas: list, zonas: dict, alertas: list):
+        self.seq = seq
+        self.mensaje = mensaje
+        self._filas = filas
+        self._zonas = zonas
+        self._alertas = alertas
+        self._clave = None
+
+    @property
+    def es_clave(self) -> bool:
+        return self.mensaje["t"] == "k"
+
+    def clave(self) -> dict:
+        """Keyframe de esta trama (para clientes nuevos o que perdieron tramas)."""
+        if self.es_clave:
+            return self.mensaje
+        if self._clave is None:
+            self._clave = _keyframe(self.seq, self._filas, self._zonas, self._alertas)
+        return self._clave
+
+
+class CodificadorDelta:
+    """
+    Guarda la última trama difundida y genera, una vez por trama, el delta que
+    comparten todos los clientes del protocolo compacto. Cada 'intervalo_clave'
+    tramas se envía un keyframe completo a todos.
+    """
+
+    def __init__(self, intervalo_clave: int = 100):
+        self.intervalo_clave = intervalo_clave
+        self.reiniciar()
+
+    def reiniciar(self):
+        self._seq = 0
+        self._anteriores = None  # (id, sensor) -> fila de la última trama, None si no hay base para un delta
+        self._zonas = {}  # id -> [name, color, category]
+        self._desde_clave = 0
+
+    def procesar(self, mensaje: dict) -> TramaDelta:
+        self._seq += 1
+        filas = []
+        zonas_nuevas = {}
+        for punto in mensaje.get("puntos", []):
+            filas.append(_fila(punto))
+            zona = punto.get("zona_alerta")
+            if zona:
+                datos = [zona.get("name"), zona.get("color"), zona.get("category")]
+                if self._zonas.get(zona["id"]) != datos:
+                    self._zonas[zona["id"]] = datos
+                    zonas_nuevas[str(zona["id"])] = datos
+        alertas = [_alerta(alerta) for alerta in mensaje.get("alertas", [])]
+
+        por_id = {(fila[0], fila[7]): fila for fila in filas}
+        # Sin ids únicos no hay cómo referenciar objetivos: la trama va completa
+        ids_validos = len(por_id) == len(filas) and all(fila[0] is not None for fila in filas)
+        zonas = dict(self._zonas)
+
+        if self._anteriores is None or not ids_validos or self._desde_clave >= self.intervalo_clave:
+            salida = _keyframe(self._seq, filas, zonas, alertas)
+            self._desde_clave = 0
+        else:
+            anteriores = self._anteriores
+            salida = {
+                "t": "d",
+                "s": self._seq,
+                "b": self._seq - 1,
+                "u": [fila for clave, fila in por_id.items() if anteriores.get(clave) != fila],
+                "r": [list(clave) for clave in anteriores if clave not in por_id],
+                "a": alertas,
+            }
+            if zonas_nuevas:
+                salida["z"] = zonas_nuevas
+            self._desde_clave += 1
+
+        self._anteriores = por_id if ids_validos else None
+        return TramaDelta(self._seq, salida, filas, zonas, alertas)
+
+
+def aplicar(estado: dict, mensaje: dict) -> dict:
+    """
+    Aplica un mensaje del protocolo sobre el estado de un cliente
+    ({"s": seq, "zonas": {...}, "objetivos": {(id, sensor): fila}}) y devuelve el nuevo estado.
+    Es la referencia de lo que debe hacer el frontend; lanza ValueError si el
+    delta no corresponde a la última trama aplicada.
+    """
+    if mensaje["t"] == "k":
+        return {
+            "s": mensaje["s"],
+            "zonas": dict(mensaje["z"]),
+            "objetivos": {(fila[0], fila[7]): fila for fila in mensaje["p"]},
+        }
+    if estado is None or estado["s"] != mensaje["b"]:
+        raise ValueError(f"Delta {mensaje['s']} sobre base {mensaje['b']}, el cliente está en {estado and estado['s']}")
+    objetivos = dict(estado["objetivos"])
+    for objetivo_id, sensor in mensaje["r"]:
+        objetivos.pop((objetivo_id, sensor), None)
+    for fila in mensaje["u"]:
+        objetivos[(fila[0], fila[7])] = fila
+    zonas = dict(estado["zonas"])
+    zonas.update(mensaje.get("z", {}))
+    return {"s": mensaje["s"], "zonas": zonas, "objetivos": objetivos}
@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+
+from .metricas import Histogramas
+
+# Actor de control PTZ.
+# La tarea del radar solo deja el último objetivo de cada cámara en una "ranura"
+# (apuntar es O(1) y nunca espera). Un bucle por cámara toma el valor más
+# reciente, calcula pan/tilt con el modelo de esa cámara y envía el movimiento
+# ONVIF (SOAP síncrono) en un executor propio, así la cámara recibe como máximo
+# un movimiento cada 'intervalo_s' y los objetivos intermedios o demasiado
+# viejos se descartan.
+
+
+class _CanalCamara:
+    def __init__(self):
+        self.ranura = None  # (punto, instante en que llegó)
+        self.evento = asyncio.Event()
+        self.tarea = None
+        self.ultimo_envio = 0.0
+        self.enviados = 0
+        self.reemplazados = 0
+        self.descartados_viejos = 0
+        self.errores = 0
+        self.ultimo_envio_ms = 0.0
+
+
+class ActorPTZ:
+    def __init__(self, calcular, mover, intervalo_s: float = 0.5, max_antiguedad_s: float = 1.0, pausado=None, max_hilos: int = 4):
+        """
+        calcular(camara_id, punto) -> comando   se ejecuta en el executor
+        mover(camara_id, comando)               se ejecuta en el executor (llamada ONVIF)
+        pausado() -> bool                       p.ej. control manual activo
+        """
+        self.calcular = calcular
+        self.mover = mover
+        self.intervalo_s = intervalo_s
+        self.max_antiguedad_s = max_antiguedad_s
+        self.pausado = pausado or (lambda: False)
+        self._executor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="ptz")
+        self._canales = {}
+        self.latencia_envios = Histogramas()  # duración de cada movimiento, por cámara
+
+    def apuntar(self, camara_id, punto: dict):
+        """Deja 'punto' como próximo objetivo de la cámara, reemplazando al anterior."""
+        canal = self._canales.get(camara_id)
+        if canal is None:
+            canal = self._canales[camara_id] = _CanalCamara()
+        if canal.ranura is not None:
+            canal.reemplazados += 1
+        canal.ranura = (punto, time.monotonic())
+        canal.evento.set()
+        if canal.tarea is None or canal.tarea.done():
+            canal.tarea = asyncio.create_task(self._bucle_camara(camara_id, canal))
+
+    def _enviar(self, camara_id, punto: dict):
+        self.mover(camara_id, self.calcular(camara_id, punto))
+
+    async def _bucle_camara(self, camara_id, canal: _CanalCamara):
+        loop = asyncio.get_running_loop()
+        while True:
+            await canal.evento.wait()
+            canal.evento.clear()
+
+            espera = canal.ultimo_envio + self.intervalo_s - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+
+            if canal.ranura is None:
+                continue
+            punto, recibido = canal.ranura
+            canal.ranura = None
+
+            if time.monotonic() - recibido > self.max_antiguedad_s:
+                canal.descartados_viejos += 1
+                continue
+            if self.pausado():
+                continue
+
+            canal.ultimo_envio = time.monotonic()
+            try:
+                await loop.run_in_executor(self._executor, self._enviar, camara_id, punto)
+                canal.enviados += 1
+            except Exception as e:
+                canal.errores += 1
+                print(f"Error al mover la cámara '{camara_id}': {e}")
+            duracion = time.monotonic() - canal.ultimo_envio
+            self.latencia_envios.observar(camara_id, duracion)
+            canal.ultimo_envio_ms = duracion * 1000
+
+    def metricas(self) -> dict:
+        return {
+            camara_id: {
+                "pendiente": canal.ranura is not None,
+                "enviados": canal.enviados,
+                "reemplazados": canal.reemplazados,
+                "descartados_viejos": canal.descartados_viejos,
+                "errores": canal.errores,
+                "ultimo_envio_ms": canal.ultimo_envio_ms,
+            }
+            for camara_id, canal in self._canales.items()
+        }
+
+    async def detener(self):
+        for canal in self._canales.values():
+            if canal.tarea is not None:
+                canal.tarea.cancel()
+        await asyncio.gather(
+            *(canal.tarea for canal in self._canales.values() if canal.tarea is not None),
+            return_exceptions=True,
+        )
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,198 @@
+from typing import NamedTuple, Optional
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from .sensores import SENSOR_PRINCIPAL, ConfiguracionSensor, geometria_sensor, sensor_desde_documento
+from .zonas import IndiceZonas, ZonaCompilada
+
+# Registro en memoria de zonas y configuración de los radares.
+# Los endpoints REST y los change streams de Mongo lo actualizan; cada tarea de
+# radar lee 'registro.actual' una vez por trama, así que cada cambio se ve entre
+# tramas sin reconectar con el radar.
+#
+# Las zonas se compilan una sola vez en un marco local compartido (centrado en
+# el radar principal); los puntos de los demás radares se llevan a ese marco.
+# Cada estado trae también la geometría precalculada de cada sensor
+# (transformación y cobertura), así la trama no recalcula trigonometría.
+
+
+class EstadoRadar(NamedTuple):
+    """Instantánea inmutable que usan las tareas de los radares en cada trama."""
+    version: int
+    sensores: dict  # id -> ConfiguracionSensor
+    indice: IndiceZonas
+    marco: object = None  # MarcoLocal de las zonas
+    geometrias: dict = {}  # id -> GeometriaSensor (no se modifica: cada estado trae el suyo)
+
+
+class RegistroRadar:
+    def __init__(self, url_por_defecto: str = None, al_publicar=None):
+        """al_publicar(estado): se llama con cada estado nuevo (p.ej. ServicioConfiguracion.desde_estado)."""
+        self.url_por_defecto = url_por_defecto
+        self.al_publicar = al_publicar
+        self._marco = None
+        self._zonas = {}  # clave del documento -> ZonaCompilada
+        self._siguiente_orden = 0
+        self.actual = EstadoRadar(0, {}, IndiceZonas([]))
+
+    @staticmethod
+    def _clave(documento: dict):
+        if "_id" in documento:
+            return str(documento["_id"])
+        return ("id", documento.get("id"))
+
+    def _geometrias(self, sensores: dict) -> dict:
+        """Geometría de cada sensor; solo se recalcula la de los que cambiaron."""
+        if self._marco is None:
+            return {}
+        anteriores = self.actual.geometrias
+        metros_por_grado_latitud = self._marco.metros_por_grado_lat
+        proyeccion = self._marco.proyeccion  # todos los sensores en la proyección del marco de las zonas
+        geometrias = {}
+        for sensor_id, sensor in sensores.items():
+            geometria = anteriores.get(sensor_id)
+            if (
+                geometria is None or geometria.sensor != sensor
+                or geometria.transformacion.marco.metros_por_grado_lat != metros_por_grado_latitud
+                or geometria.transformacion.marco.proyeccion != proyeccion
+            ):
+                geometria = geometria_sensor(sensor, metros_por_grado_latitud, proyeccion)
+            elif geometria.sensor is not sensor:
+                geometria = geometria._replace(sensor=sensor)
+            geometrias[sensor_id] = geometria
+        return geometrias
+
+    def _publicar(self, sensores: dict = None, indice: IndiceZonas = None, marco_cambiado: bool = False):
+        actual = self.actual
+        if sensores is None and not marco_cambiado:
+            sensores, geometrias = actual.sensores, actual.geometrias
+        else:
+            sensores = actual.sensores if sensores is None else sensores
+            geometrias = self._geometrias(sensores)
+        # Un solo reemplazo de la referencia: las tramas ven el estado anterior o el nuevo
+        self.actual = EstadoRadar(
+            actual.version + 1,
+            sensores,
+            actual.indice if indice is None else indice,
+            self._marco,
+            geometrias,
+        )
+        if self.al_publicar is not None:
+            self.al_publicar(self.actual)
+
+    def cargar(self, zonas, sensores: dict, marco):
+        """Carga completa: compila todas las zonas y reemplaza el estado."""
+        self._marco = marco
+        self._zonas = {}
+        for orden, documento in enumerate(zonas):
+            self._zonas[self._clave(documento)] = ZonaCompilada(documento, marco, orden)
+        self._siguiente_orden = len(self._zonas)
+        self._publicar(dict(sensores), IndiceZonas(self._zonas.values()), marco_cambiado=True)
+
+    def guardar_zona(self, documento: dict):
+        """Agrega una zona nueva o reemplaza una existente (mismo _id)."""
+        if self._marco is None:
+            return
+        clave = self._clave(documento)
+        anterior = self._zonas.get(clave)
+        if anterior is None:
+            orden = self._siguiente_orden
+            self._siguiente_orden += 1
+        else:
+            orden = anterior.orden
+        zona = ZonaCompilada(documento, self._marco, orden)
+        self._zonas[clave] = zona
+        quitar = (anterior,) if anterior is not None else ()
+        self._publicar(indice=self.actual.indice.actualizado(agregar=(zona,), quitar=quitar))
+
+    def eliminar_zona(self, _id=None, zona_id=None):
+        """Quita una zona por _id de Mongo o por su campo 'id'."""
+        if _id is not None:
+            claves = [str(_id)]
+        else:
+            claves = [clave for clave, zona in self._zonas.items() if zona.id == zona_id]
+        quitadas = [self._zonas.pop(clave) for clave in claves if clave in self._zonas]
+        if quitadas:
+            self._publicar(indice=self.actual.indice.actualizado(quitar=quitadas))
+
+    def guardar_sensor(self, sensor: ConfiguracionSensor) -> bool:
+        """
+        Agrega o reemplaza la configuración de un sensor. Devuelve False si el
+        cambio mueve el origen del marco de las zonas (hace falta una carga completa).
+        """
+        anterior = self.actual.sensores.get(sensor.id)
+        if anterior == sensor:
+            return True
+        if (
+            anterior is not None and self._marco is not None
+            and (anterior.latitud, anterior.longitud) == (self._marco.radar_lat, self._marco.radar_lon)
+            and (sensor.latitud, sensor.longitud) != (anterior.latitud, anterior.longitud)
+        ):
+            return False
+        sensores = dict(self.actual.sensores)
+        sensores[sensor.id] = sensor
+        self._publicar(sensores=sensores)
+        return True
+
+    def actualizar_angulo(self, angulo_rotacion: float, sensor_id: str = SENSOR_PRINCIPAL):
+        sensor = self.actual.sensores.get(sensor_id)
+        if sensor is not None:
+            self.guardar_sensor(sensor._replace(angulo_rotacion=float(angulo_rotacion)))
+
+    async def vigilar_zonas(self, coleccion_zonas, recargar):
+        """
+        Sigue el change stream de la colección de zonas (Motor) para recoger los
+        cambios hechos por otros procesos. 'recargar' (corrutina) hace una carga
+        completa y se usa cuando el stream se invalida o se pierden eventos.
+        """
+        await self._vigilar(coleccion_zonas, self._aplicar_cambio_zona, recargar)
+
+    async def vigilar_configuracion(self, coleccion_configuracion, recargar):
+        """Sigue el change stream de configuracion_radar (sensores, posición y ángulo)."""
+        await self._vigilar(coleccion_configuracion, self._aplicar_cambio_configuracion, recargar)
+
+    def _aplicar_cambio_zona(self, cambio: dict) -> bool:
+        operacion = cambio.get("operationType")
+        if operacion in ("insert", "update", "replace"):
+            if cambio.get("fullDocument"):
+                self.guardar_zona(cambio["fullDocument"])
+            else:
+                # La zona ya no existe al momento de leerla
+                self.eliminar_zona(_id=cambio["documentKey"]["_id"])
+        elif operacion == "delete":
+            self.eliminar_zona(_id=cambio["documentKey"]["_id"])
+        elif operacion in ("drop", "rename", "dropDatabase", "invalidate"):
+            return False
+        return True
+
+    def _aplicar_cambio_configuracion(self, cambio: dict) -> bool:
+        if cambio.get("operationType") not in ("insert", "update", "replace"):
+            # Un sensor eliminado (o la colección) se resuelve con una carga completa
+            return False
+        documento: Optional[dict] = cambio.get("fullDocument")
+        if not documento:
+            return False
+        sensor = sensor_desde_documento(documento, self.url_por_defecto)
+        if sensor is None:
+            return True
+        return self.guardar_sensor(sensor)
+
+    async def _vigilar(self, coleccion, aplicar, recargar):
+        while True:
+            try:
+                async with coleccion.watch(full_document="updateLookup") as stream:
+                    # Al (re)abrir el stream se pudieron perder eventos
+                    await recargar()
+                    async for cambio in stream:
+                        if not aplicar(cambio):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Mongo sin replica set: los change streams no están disponibles
+                print(f"Change streams no disponibles para '{coleccion.name}': {e}")
+                return
+            except Exception as e:
+                print(f"Error en change stream de '{coleccion.name}': {e}. Reintentando en 5s...")
+                await asyncio.sleep(5)
@@ -0,0 +1,169 @@
+from typing import NamedTuple
+import os
+
+import numpy as np
+
+# Tabla de tracks con filtro de Kalman de velocidad constante.
+# Cada objetivo (sensor, id del radar) tiene un estado [este, norte, v_este, v_norte]
+# en el marco local de las zonas (metros, m/s). El estado vive en arreglos NumPy
+# indexados por "ranura", así la predicción y la corrección de todos los
+# objetivos de una trama se hacen en una sola operación vectorizada; las ranuras
+# de los tracks retirados se reutilizan.
+#
+# Modelo: aceleración como ruido blanco (densidad 'ruido_aceleracion'^2) y
+# medición de posición con desvío 'ruido_medicion_m'.
+
+
+class Estimacion(NamedTuple):
+    """Estado filtrado de los objetivos de una trama (arreglos en el orden de entrada)."""
+    este: np.ndarray
+    norte: np.ndarray
+    vel_este: np.ndarray
+    vel_norte: np.ndarray
+
+    def velocidad(self) -> np.ndarray:
+        """Rapidez en m/s."""
+        return np.hypot(self.vel_este, self.vel_norte)
+
+    def rumbo(self) -> np.ndarray:
+        """Rumbo en grados: 0 = norte, 90 = este."""
+        return np.degrees(np.arctan2(self.vel_este, self.vel_norte)) % 360.0
+
+    def prediccion(self, horizonte_s: float) -> tuple:
+        """Posición (este, norte) estimada dentro de 'horizonte_s' segundos."""
+        return self.este + self.vel_este * horizonte_s, self.norte + self.vel_norte * horizonte_s
+
+
+class TablaTracks:
+    def __init__(
+        self,
+        ruido_aceleracion: float = 0.5,
+        ruido_medicion_m: float = 5.0,
+        velocidad_inicial_max: float = 10.0,
+        max_edad_s: float = 5.0,
+        capacidad: int = 256,
+    ):
+        self.q = ruido_aceleracion ** 2
+        self.r = ruido_medicion_m ** 2
+        self.max_edad_s = max_edad_s
+        self._p_inicial = np.diag([self.r, self.r, velocidad_inicial_max ** 2, velocidad_inicial_max ** 2])
+
+        self._x = np.zeros((capacidad, 4))
+        self._p = np.zeros((capacidad, 4, 4))
+        self._t = np.zeros(capacidad)  # última actualización
+        self._inicio = np.zeros(capacidad)
+        self._activo = np.zeros(capacidad, dtype=bool)
+        self._claves = [None] * capacidad
+        self._ranuras = {}  # (sensor, id) -> ranura
+        self._libres = list(range(capacidad - 1, -1, -1))
+
+    def __len__(self):
+        return len(self._ranuras)
+
+    def _crecer(self):
+        capacidad = len(self._t)
+        nueva = capacidad * 2
+        self._x = np.concatenate((self._x, np.zeros((capacidad, 4))))
+        self._p = np.concatenate((self._p, np.zeros((capacidad, 4, 4))))
+        self._t = np.concatenate((self._t, np.zeros(capacidad)))
+        self._inicio = np.concatenate((self._inicio, np.zeros(capacidad)))
+        self._activo = np.concatenate((self._activo, np.zeros(capacidad, dtype=bool)))
+        self._claves.extend([None] * capacidad)
+        self._libres.extend(range(nueva - 1, capacidad - 1, -1))
+
+    def _asignar(self, clave) -> int:
+        if not self._libres:
+            self._crecer()
+        ranura = self._libres.pop()
+        self._ranuras[clave] = ranura
+        self._claves[ranura] = clave
+        self._activo[ranura] = True
+        return ranura
+
+    def _predecir_y_corregir(self, ranuras: np.ndarray, dt: np.ndarray, z: np.ndarray):
+        x = self._x[ranuras]
+        p = self._p[ranuras]
+        n = len(ranuras)
+
+        # Predicción: x = F x,  P = F P F' + Q
+        f = np.broadcast_to(np.eye(4), (n, 4, 4)).copy()
+        f[:, 0, 2] = dt
+        f[:, 1, 3] = dt
+        x = np.einsum("nij,nj->ni", f, x)
+        dt2 = dt * dt
+        q = np.zeros((n, 4, 4))
+        q[:, 0, 0] = q[:, 1, 1] = dt2 * dt / 3
+        q[:, 0, 2] = q[:, 2, 0] = q[:, 1, 3] = q[:, 3, 1] = dt2 / 2
+        q[:, 2, 2] = q[:, 3, 3] = dt
+        p = f @ p @ f.transpose(0, 2, 1) + self.q * q
+
+        # Corrección con la posición medida (H = [I 0]); S es 2x2 y se invierte a mano
+        s = p[:, :2, :2] + self.r * np.eye(2)
+        det = s[:, 0, 0] * s[:, 1, 1] - s[:, 0, 1] * s[:, 1, 0]
+        s_inv = np.empty_like(s)
+        s_inv[:, 0, 0] = s[:, 1, 1] / det
+        s_inv[:, 1, 1] = s[:, 0, 0] / det
+        s_inv[:, 0, 1] = -s[:, 0, 1] / det
+        s_inv[:, 1, 0] = -s[:, 1, 0] / det
+        k = p[:, :, :2] @ s_inv
+        innovacion = z - x[:, :2]
+        x = x + np.einsum("nij,nj->ni", k, innovacion)
+        p = p - k @ p[:, :2, :]
+
+        self._x[ranuras] = x
+        self._p[ranuras] = p
+
+    def actualizar(self, ahora: float, sensor, ids, este, norte) -> Estimacion:
+        """
+        Incorpora las posiciones medidas en una trama del radar 'sensor' y
+        devuelve la estimación filtrada de cada objetivo, en el mismo orden.
+        """
+        este = np.asarray(este, dtype=np.float64)
+        norte = np.asarray(norte, dtype=np.float64)
+        ranuras = np.empty(len(este), dtype=np.intp)
+        nuevos = np.zeros(len(este), dtype=bool)
+        for i, objetivo_id in enumerate(ids):
+            clave = (sensor, objetivo_id)
+            ranura = self._ranuras.get(clave)
+            if ranura is None:
+                ranura = self._asignar(clave)
+                nuevos[i] = True
+            ranuras[i] = ranura
+
+        if nuevos.any():
+            r = ranuras[nuevos]
+            self._x[r, 0] = este[nuevos]
+            self._x[r, 1] = norte[nuevos]
+            self._x[r, 2:] = 0.0
+            self._p[r] = self._p_inicial
+            self._inicio[r] = ahora
+
+        existentes = ~nuevos
+        if existentes.any():
+            r = ranuras[existentes]
+            dt = np.maximum(ahora - self._t[r], 0.0)
+            self._predecir_y_corregir(r, dt, np.column_stack((este[existentes], norte[existentes])))
+
+        self._t[ranuras] = ahora
+        self.retirar(ahora)
+
+        x = self._x[ranuras]
+        return Estimacion(x[:, 0], x[:, 1], x[:, 2], x[:, 3])
+
+    def retirar(self, ahora: float):
+        """Libera los tracks que llevan más de 'max_edad_s' sin medirse."""
+        viejos = np.flatnonzero(self._activo & (ahora - self._t > self.max_edad_s))
+        for ranura in viejos.tolist():
+            del self._ranuras[self._claves[ranura]]
+            self._claves[ranura] = None
+            self._activo[ranura] = False
+            self._libres.append(ranura)
+
+
+def crear_tabla_tracks() -> TablaTracks:
+    """Crea la tabla con la configuración del .env."""
+    return TablaTracks(
+        ruido_aceleracion=float(os.getenv("SEGUIMIENTO_RUIDO_ACELERACION", 0.5)),
+        ruido_medicion_m=float(os.getenv("SEGUIMIENTO_RUIDO_MEDICION_M", 5.0)),
+        max_edad_s=float(os.getenv("SEGUIMIENTO_MAX_EDAD_S", 5.0)),
+    )
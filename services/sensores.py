@@ -0,0 +1,112 @@
+from typing import NamedTuple, Optional
+
+from .geo import PROYECCION_PLANA, TransformacionRadar, obtener_transformacion, vertices_cobertura
+
+# Registro de sensores (radares).
+# Cada documento de 'configuracion_radar' describe un radar:
+#   {"sensor_id": "muelle_norte",
+#    "radar": {"latitud", "longitud", "radar_radio_m", "angulo_rotacion",
+#              "grado_inclinacion", "url"},
+#    "poligono": {...}}
+# El documento original (sin 'sensor_id') es el radar "principal"; si no trae
+# 'url' usa RADAR_WEBSOCKET_URL del .env, como siempre.
+
+SENSOR_PRINCIPAL = "principal"
+GRADO_INCLINACION_POR_DEFECTO = 40
+# Apertura del cono de cobertura (la misma que usa /configurar_radar)
+APERTURA_COBERTURA_GRADOS = 45
+
+
+class ConfiguracionSensor(NamedTuple):
+    id: str
+    url: Optional[str]
+    latitud: float
+    longitud: float
+    angulo_rotacion: float
+    grado_inclinacion: float
+    radio_m: Optional[float]
+
+    @property
+    def angulo_total(self) -> float:
+        """Rotación que se aplica a sus x/y: ángulo del radar más la inclinación del montaje, menos 30."""
+        return (self.angulo_rotacion + self.grado_inclinacion) - 30
+
+
+class GeometriaSensor(NamedTuple):
+    """
+    Constantes de un sensor precalculadas para su configuración vigente: la
+    transformación (sin/cos de la rotación, metros por grado de latitud y de
+    longitud) y el cono de cobertura. Se arma una vez por cambio de configuración.
+    """
+    sensor: ConfiguracionSensor
+    transformacion: TransformacionRadar
+    cobertura: Optional[tuple]  # ((lat, lon), ...) o None sin radio_m
+
+
+def geometria_sensor(sensor: ConfiguracionSensor, metros_por_grado_latitud: float,
+                     proyeccion: str = PROYECCION_PLANA) -> GeometriaSensor:
+    transformacion = obtener_transformacion(
+        sensor.latitud, sensor.longitud, sensor.angulo_total, metros_por_grado_latitud, proyeccion
+    )
+    cobertura = None
+    if sensor.radio_m is not None:
+        cobertura = vertices_cobertura(transformacion.marco, sensor.radio_m, sensor.angulo_rotacion, APERTURA_COBERTURA_GRADOS)
+    return GeometriaSensor(sensor, transformacion, cobertura)
+
+
+def sensor_desde_documento(documento: dict, url_por_defecto: str = None) -> Optional[ConfiguracionSensor]:
+    """Arma la configuración de un sensor desde su documento; None si le falta la posición."""
+    radar = documento.get("radar") or {}
+    if radar.get("latitud") is None or radar.get("longitud") is None:
+        return None
+    sensor_id = str(documento.get("sensor_id") or SENSOR_PRINCIPAL)
+    url = radar.get("url") or (url_por_defecto if sensor_id == SENSOR_PRINCIPAL else None)
+    radio_m = radar.get("radar_radio_m")
+    return ConfiguracionSensor(
+        id=sensor_id,
+        url=url,
+        latitud=float(radar["latitud"]),
+        longitud=float(radar["longitud"]),
+        angulo_rotacion=float(radar.get("angulo_rotacion") or 0),
+        grado_inclinacion=float(radar.get("grado_inclinacion", GRADO_INCLINACION_POR_DEFECTO)),
+        radio_m=float(radio_m) if radio_m is not None else None,
+    )
+
+
+def sensores_desde_documentos(documentos, url_por_defecto: str = None) -> dict:
+    """id -> ConfiguracionSensor; el primer documento de cada id manda."""
+    sensores = {}
+    for documento in documentos:
+        sensor = sensor_desde_documento(documento, url_por_defecto)
+        if sensor is None:
+            print(f"Configuración de radar sin posición, se ignora: {documento.get('sensor_id')}")
+            continue
+        sensores.setdefault(sensor.id, sensor)
+    return sensores
+
+
+class VistaSensores:
+    """
+    Combina los últimos puntos de cada sensor para difundir una sola vista del
+    puerto: cada trama de un sensor reemplaza sus puntos y conserva los de los
+    demás mientras no tengan más de 'vigencia_s' segundos.
+    """
+
+    def __init__(self, vigencia_s: float = 2.0):
+        self.vigencia_s = vigencia_s
+        self._puntos = {}  # sensor -> (instante, puntos)
+
+    def combinar(self, sensor_id: str, puntos: list, ahora: float) -> list:
+        self._puntos[sensor_id] = (ahora, puntos)
+        if len(self._puntos) == 1:
+            return puntos
+        combinados = []
+        for otro_id, (instante, puntos_sensor) in list(self._puntos.items()):
+            if ahora - instante > self.vigencia_s:
+                del self._puntos[otro_id]
+                continue
+            combinados.extend(puntos_sensor)
+        return combinados
+
+    def quitar(self, sensor_id: str):
+        self._puntos.pop(sensor_id, None)
@@ -0,0 +1,144 @@
+from typing import NamedTuple, Optional
+
+from .zonas import ORDEN_SEVERIDAD
+
+# Filtros de suscripción para /api/radar.
+# Un cliente envía por el mismo websocket:
+#   {"t": "suscripcion", "bbox": [sur, oeste, norte, este], "zonas": [id, ...],
+#    "categorias": ["interior", ...], "severidad_min": "alta", "max_hz": 2}
+# Todos los campos son opcionales; {"t": "suscripcion"} vuelve al flujo completo.
+# Los mensajes de control son JSON en frames de texto (o binarios con JSON en
+# UTF-8); cualquier otro frame binario (p.ej. MessagePack) se responde con error.
+#
+#   bbox:          puntos y alertas cuya posición cae dentro del rectángulo (lat/lon)
+#   zonas:         solo puntos dentro de esas zonas y alertas de esas zonas
+#   categorias:    idem, por categoría de zona
+#   severidad_min: alertas con al menos esa severidad (los puntos no tienen severidad)
+#   max_hz:        máximo de tramas por segundo; las alertas de las tramas omitidas
+#                  se envían con la siguiente
+#
+# El filtro usa lo que el pipeline ya calculó para cada punto ('zona_alerta'), así
+# que cuesta una pasada por la trama. Los clientes con la misma suscripción se
+# agrupan y la trama filtrada se arma y codifica una sola vez por grupo.
+
+
+class SuscripcionInvalida(ValueError):
+    pass
+
+
+class Suscripcion(NamedTuple):
+    bbox: Optional[tuple] = None  # (sur, oeste, norte, este)
+    zonas: Optional[frozenset] = None  # ids como str
+    categorias: Optional[frozenset] = None
+    severidad_min: Optional[str] = None
+    max_hz: Optional[float] = None
+
+    @classmethod
+    def desde_mensaje(cls, mensaje: dict) -> "Suscripcion":
+        bbox = mensaje.get("bbox")
+        if bbox is not None:
+            try:
+                sur, oeste, norte, este = (float(v) for v in bbox)
+            except (TypeError, ValueError):
+                raise SuscripcionInvalida("bbox debe ser [sur, oeste, norte, este]")
+            if sur > norte or oeste > este:
+                raise SuscripcionInvalida("bbox con sur > norte u oeste > este")
+            bbox = (sur, oeste, norte, este)
+
+        zonas = mensaje.get("zonas")
+        if zonas is not None:
+            if not isinstance(zonas, list):
+                raise SuscripcionInvalida("zonas debe ser una lista de ids")
+            if not all(isinstance(zona_id, (str, int)) and not isinstance(zona_id, bool) for zona_id in zonas):
+                raise SuscripcionInvalida("los ids de zonas deben ser texto o enteros")
+            zonas = frozenset(str(zona_id) for zona_id in zonas)
+
+        categorias = mensaje.get("categorias")
+        if categorias is not None:
+            if not isinstance(categorias, list):
+                raise SuscripcionInvalida("categorias debe ser una lista")
+            if not all(isinstance(categoria, str) for categoria in categorias):
+                raise SuscripcionInvalida("categorias debe ser una lista de textos")
+            categorias = frozenset(categorias)
+
+        severidad_min = mensaje.get("severidad_min")
+        if severidad_min is not None and severidad_min not in ORDEN_SEVERIDAD:
+            raise SuscripcionInvalida(f"severidad_min debe ser una de {list(ORDEN_SEVERIDAD)}")
+
+        max_hz = mensaje.get("max_hz")
+        if max_hz is not None:
+            try:
+                max_hz = float(max_hz)
+            except (TypeError, ValueError):
+                raise SuscripcionInvalida("max_hz debe ser un número")
+            if max_hz <= 0:
+                raise SuscripcionInvalida("max_hz debe ser mayor que 0")
+
+        return cls(bbox, zonas, categorias, severidad_min, max_hz)
+
+    @property
+    def filtra(self) -> bool:
+        """True si la suscripción recorta el contenido (no solo la frecuencia)."""
+        return any(v is not None for v in (self.bbox, self.zonas, self.categorias, self.severidad_min))
+
+    def a_dict(self) -> dict:
+        return {
+            "bbox": list(self.bbox) if self.bbox else None,
+            "zonas": sorted(self.zonas) if self.zonas is not None else None,
+            "categorias": sorted(self.categorias) if self.categorias is not None else None,
+            "severidad_min": self.severidad_min,
+            "max_hz": self.max_hz,
+        }
+
+    def _en_bbox(self, latitud: float, longitud: float) -> bool:
+        sur, oeste, norte, este = self.bbox
+        return sur <= latitud <= norte and oeste <= longitud <= este
+
+    def _zona_incluida(self, zona_id, categoria) -> bool:
+        if self.zonas is not None and str(zona_id) not in self.zonas:
+            return False
+        if self.categorias is not None and categoria not in self.categorias:
+            return False
+        return True
+
+    def filtrar(self, mensaje: dict, categorias_zona: dict) -> dict:
+        """
+        Devuelve la trama con solo lo que corresponde a esta suscripción.
+        'categorias_zona' (id -> categoría) sirve para las alertas, que no traen la categoría.
+        """
+        if not self.filtra:
+            return mensaje
+
+        por_zona = self.zonas is not None or self.categorias is not None
+        puntos = []
+        for punto in mensaje.get("puntos", []):
+            if self.bbox is not None and not self._en_bbox(punto["latitud"], punto["longitud"]):
+                continue
+            if por_zona:
+                zona = punto.get("zona_alerta")
+                if zona is None or not self._zona_incluida(zona["id"], zona.get("category")):
+                    continue
+            puntos.append(punto)
+
+        minimo = ORDEN_SEVERIDAD.get(self.severidad_min, 0)
+        alertas = []
+        for alerta in mensaje.get("alertas", []):
+            if ORDEN_SEVERIDAD.get(alerta.get("severidad"), 0) < minimo:
+                continue
+            if self.bbox is not None:
+                posicion = alerta.get("posicion_detectada", {})
+                if not self._en_bbox(posicion.get("latitud", 0), posicion.get("longitud", 0)):
+                    continue
+            if por_zona:
+                zona_id = alerta.get("zona", {}).get("id")
+                if not self._zona_incluida(zona_id, categorias_zona.get(zona_id)):
+                    continue
+            alertas.append(alerta)
+
+        filtrado = dict(mensaje)
+        filtrado["puntos"] = puntos
+        filtrado["alertas"] = alertas
+        return filtrado
+
+
+SIN_FILTRO = Suscripcion()
@@ -0,0 +1,135 @@
+import re
+from typing import List, NamedTuple, Optional
+
+# Decodificador del formato de trama del radar.
+# El radar envía un JSON "relajado": las claves no vienen entre comillas y al
+# final de la trama puede venir pegado un sufijo de tiempo que no es JSON, p.ej.
+#   {cmd:1,data:[{id:3,type:0,x:12.5,y:80.1,a:8.9,d:81.0}]}20215:04:33.123
+# En lugar de corregir el texto con re.sub y luego pasarlo por json.loads, se
+# ubica la lista 'data' con una regex, se toman sus objetos planos con findall
+# (validando con find/count que no haya anidados) y cada objetivo se parte por
+# ',' y ':' para entregar directamente los objetivos tipados. Son varias
+# búsquedas sobre la trama (rfind, search, find, findall, count), todas en C.
+
+# 'data' como clave completa (no el final de 'metadata' ni de '"xdata"')
+_INICIO_DATA_RE = re.compile(r'(?<![\w"])"?data"?\s*:\s*\[')
+_OBJETO_RE = re.compile(r'\{([^{}\[\]]*)\}')
+
+
+class TramaInvalida(ValueError):
+    """La trama recibida no respeta el formato esperado del radar."""
+
+
+class Objetivo(NamedTuple):
+    id: Optional[int]
+    type: Optional[int]
+    x: float
+    y: float
+    a: float
+    d: float
+
+
+class TramaRadar(NamedTuple):
+    objetivos: List[Objetivo]
+    timestamp: Optional[str]
+
+
+_SIN_COMILLAS_NI_ESPACIOS = str.maketrans("", "", '" \t\r\n')
+
+
+def _entero(valor) -> Optional[int]:
+    if valor is None or valor == "null":
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        return int(float(valor))
+
+
+def _decimal(valor) -> float:
+    if valor is None or valor == "null":
+        return 0.0
+    return float(valor)
+
+
+def _campos(cuerpo: str) -> dict:
+    # Quita comillas y espacios de claves y valores. Los valores son números (o
+    # null): json.loads + float() del decodificador anterior también aceptaba
+    # "12.5" entre comillas, así que el resultado es el mismo.
+    if '"' in cuerpo or " " in cuerpo:
+        cuerpo = cuerpo.translate(_SIN_COMILLAS_NI_ESPACIOS)
+    if not cuerpo:
+        return {}
+    try:
+        return dict(par.split(":", 1) for par in cuerpo.split(","))
+    except ValueError as e:
+        raise TramaInvalida(f"Campo sin valor en la trama: {cuerpo!r}") from e
+
+
+def _objetivo(cuerpo: str) -> Objetivo:
+    campos = _campos(cuerpo)
+    get = campos.get
+    try:
+        # Camino rápido: todos los campos presentes y numéricos.
+        return Objetivo(
+            int(get("id")), int(get("type")),
+            float(get("x")), float(get("y")), float(get("a")), float(get("d")),
+        )
+    except (TypeError, ValueError):
+        pass
+    try:
+        return Objetivo(
+            _entero(get("id")), _entero(get("type")),
+            _decimal(get("x")), _decimal(get("y")), _decimal(get("a")), _decimal(get("d")),
+        )
+    except ValueError as e:
+        raise TramaInvalida(f"Objetivo con valores no numéricos: {cuerpo!r}") from e
+
+
+def _cuerpos_data(raw: str) -> Optional[list]:
+    """
+    Cuerpos (texto entre llaves) de los objetivos de la lista 'data', o None si
+    la trama no la trae. Los objetivos son objetos planos: un objeto o una
+    lista dentro de un objetivo no se puede decodificar y es TramaInvalida.
+    """
+    inicio = _INICIO_DATA_RE.search(raw)
+    if inicio is None:
+        return None
+    # Sin anidamiento el primer ']' cierra la lista; si hay un '[' antes, o más
+    # llaves que objetos planos, algún objetivo trae un campo anidado (y ese
+    # ']' podría no ser el de la lista)
+    fin = raw.find("]", inicio.end())
+    if fin == -1:
+        raise TramaInvalida("La lista 'data' de la trama no está cerrada.")
+    cuerpos = _OBJETO_RE.findall(raw, inicio.end(), fin)
+    if (
+        raw.find("[", inicio.end(), fin) != -1
+        or raw.count("{", inicio.end(), fin) != len(cuerpos)
+        or raw.count("}", inicio.end(), fin) != len(cuerpos)
+    ):
+        raise TramaInvalida("Objetivo con un campo anidado: solo se aceptan objetos planos.")
+    return cuerpos
+
+
+def extraer_timestamp(raw: str) -> Optional[str]:
+    """Devuelve el sufijo de tiempo que viene después del objeto JSON, si existe."""
+    cierre = raw.rfind("}")
+    if cierre == -1:
+        raise TramaInvalida("La trama no contiene un objeto JSON.")
+    sufijo = raw[cierre + 1:].strip()
+    return sufijo or None
+
+
+def decodificar_trama(raw: str) -> Optional[TramaRadar]:
+    """
+    Decodifica una trama cruda del radar.
+    Retorna None si la trama no trae la lista 'data' (mensajes de control, etc.).
+    Lanza TramaInvalida si la trama está mal formada.
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    timestamp = extraer_timestamp(raw)
+    cuerpos = _cuerpos_data(raw)
+    if cuerpos is None:
+        return None
+    return TramaRadar([_objetivo(cuerpo) for cuerpo in cuerpos], timestamp)
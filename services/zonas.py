@@ -0,0 +1,324 @@
+from collections import defaultdict
+import math
+
+import numpy as np
+
+PRIORIDAD_ZONAS = {
+    "exterior": 1,
+    "atencion": 2,
+    "interior": 3,
+    "modulo": 4,
+}
+
+
+def punto_en_poligono(point: tuple, polygon: list) -> bool:
+    """
+    Verifica si un punto (lat, lon) está dentro de un polígono.
+    Implementa el algoritmo de cruce de rayos (Ray Casting).
+    """
+    x, y = point
+    n = len(polygon)
+    inside = False
+
+    p1x, p1y = polygon[0]
+    for i in range(n + 1):
+        p2x, p2y = polygon[i % n]
+
+        # Verifica si el punto está en el borde del polígono
+        if (x == p1x and y == p1y) or (x == p2x and y == p2y):
+            return True
+
+        if y > min(p1y, p2y):
+            if y <= max(p1y, p2y):
+                if x <= max(p1x, p2x):
+                    if p1y != p2y:
+                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                    if p1x == p2x or x <= xinters:
+                        inside = not inside
+        p1x, p1y = p2x, p2y
+
+    return inside
+
+
+def zona_prioritaria_fuerza_bruta(latitud: float, longitud: float, zonas: list):
+    """
+    Recorre todas las zonas y devuelve la de mayor prioridad que contiene al punto.
+    Es el comportamiento original de process_radar_logic; se conserva como referencia.
+    """
+    zona_detectada = None
+    prioridad_actual = 0
+
+    for zona in zonas:
+        zona_poligono = [tuple(c) for c in zona.get("coordinates", [])]
+
+        if punto_en_poligono((latitud, longitud), zona_poligono):
+            categoria_zona = zona.get("category")
+            prioridad_zona = PRIORIDAD_ZONAS.get(categoria_zona, 0)
+
+            if prioridad_zona > prioridad_actual:
+                prioridad_actual = prioridad_zona
+                zona_detectada = zona
+
+    return zona_detectada
+
+
+def calcular_centroide_zona(coordinates: list) -> tuple:
+    """
+    Calcula el centroide (centro geométrico) de un polígono.
+    """
+    if not coordinates:
+        return (0, 0)
+
+    lat_sum = sum(coord[0] for coord in coordinates)
+    lon_sum = sum(coord[1] for coord in coordinates)
+    n = len(coordinates)
+
+    return (lat_sum / n, lon_sum / n)
+
+
+# Severidades de menor a mayor
+ORDEN_SEVERIDAD = {"baja": 0, "media": 1, "alta": 2, "critica": 3}
+
+
+def detectar_severidad_por_nombre(nombre_zona: str) -> str:
+    """
+    Determina la severidad de la alerta basándose en el nombre de la zona.
+    El cliente define el nombre, por lo que buscamos palabras clave.
+    """
+    nombre_lower = nombre_zona.lower()
+
+    # Palabras clave para severidad crítica
+    if any(palabra in nombre_lower for palabra in ["critica", "crítica", "peligro", "emergencia", "prohibido"]):
+        return "critica"
+
+    # Palabras clave para severidad alta
+    if any(palabra in nombre_lower for palabra in ["alerta", "restriccion", "restricción", "interior", "control"]):
+        return "alta"
+
+    # Palabras clave para severidad media
+    if any(palabra in nombre_lower for palabra in ["atencion", "atención", "precaucion", "precaución", "zona"]):
+        return "media"
+
+    # Por defecto, severidad baja
+    return "baja"
+
+
+class ZonaCompilada:
+    """
+    Zona de detección preparada una sola vez al cargarla.
+
+    Guarda los vértices proyectados al marco local del radar (este/norte en metros),
+    su caja envolvente, y todo lo que antes se recalculaba por punto y por trama:
+    prioridad, severidad, centroide y los diccionarios que se envían en
+    'zona_alerta' y en las alertas.
+    """
+
+    __slots__ = (
+        "id", "nombre", "categoria", "color", "prioridad", "severidad", "orden",
+        "vertices", "caja", "centroide", "zona_alerta", "zona_para_alerta",
+        "centroide_para_alerta", "documento", "_aristas", "_vertices",
+    )
+
+    def __init__(self, zona: dict, marco, orden: int = 0):
+        self.documento = zona
+        self.orden = orden
+        self.id = zona.get("id")
+        self.nombre = zona.get("name", "")
+        self.categoria = zona.get("category")
+        self.color = zona.get("color")
+        self.prioridad = PRIORIDAD_ZONAS.get(self.categoria, 0)
+        self.severidad = detectar_severidad_por_nombre(self.nombre or "")
+
+        coordenadas = zona.get("coordinates", [])
+        self.centroide = calcular_centroide_zona(coordenadas)
+
+        if coordenadas:
+            lat_lon = np.asarray(coordenadas, dtype=np.float64)
+            este, norte = marco.a_local(lat_lon[:, 0], lat_lon[:, 1])
+            self.vertices = np.column_stack((este, norte))
+            self.caja = (float(este.min()), float(norte.min()), float(este.max()), float(norte.max()))
+        else:
+            self.vertices = np.empty((0, 2))
+            self.caja = None
+
+        # Aristas no horizontales para el cruce de rayos:
+        # (norte_min, norte_max, este_1, norte_1, d_este/d_norte)
+        puntos = [tuple(v) for v in self.vertices.tolist()]
+        self._vertices = frozenset(puntos)
+        self._aristas = []
+        for i, (x1, y1) in enumerate(puntos):
+            x2, y2 = puntos[(i + 1) % len(puntos)]
+            if y1 != y2:
+                self._aristas.append((min(y1, y2), max(y1, y2), x1, y1, (x2 - x1) / (y2 - y1)))
+        self._aristas = tuple(self._aristas)
+
+        # Cargas útiles ya armadas (se comparten, no se deben modificar)
+        self.zona_alerta = {
+            "id": self.id,
+            "name": zona.get("name"),
+            "color": self.color,
+            "category": self.categoria,
+        }
+        self.zona_para_alerta = {
+            "id": self.id,
+            "nombre": self.nombre,
+            "color": self.color,
+        }
+        self.centroide_para_alerta = {
+            "latitud": self.centroide[0],
+            "longitud": self.centroide[1],
+        }
+
+    def contiene(self, este: float, norte: float) -> bool:
+        """Cruce de rayos sobre las aristas precalculadas (mismo criterio que punto_en_poligono)."""
+        if (este, norte) in self._vertices:
+            return True
+        dentro = False
+        for norte_min, norte_max, x1, y1, pendiente in self._aristas:
+            if norte_min < norte <= norte_max and este <= x1 + (norte - y1) * pendiente:
+                dentro = not dentro
+        return dentro
+
+    def __repr__(self):
+        return f"ZonaCompilada(id={self.id!r}, nombre={self.nombre!r}, categoria={self.categoria!r})"
+
+
+def compilar_zonas(zonas, marco) -> list:
+    """Compila los documentos de zonas de Mongo contra el marco local del radar."""
+    return [ZonaCompilada(zona, marco, orden) for orden, zona in enumerate(zonas)]
+
+
+class IndiceZonas:
+    """
+    Índice espacial de zonas compiladas basado en una grilla uniforme sobre
+    las cajas envolventes (bounding boxes) de cada polígono, en metros locales.
+
+    Para un punto solo se evalúan las zonas cuya caja cae en la celda del punto,
+    ordenadas por prioridad (y luego por orden de carga), de modo que la primera
+    zona que contiene al punto es la misma que elegiría el recorrido completo.
+    """
+
+    # Límite de celdas de la grilla para que zonas muy grandes no la inflen
+    MAX_CELDAS = 4096
+
+    def __init__(self, zonas: list, tam_celda: float = None):
+        self.zonas = list(zonas)
+        # Zonas sin prioridad o sin vértices nunca se seleccionan
+        self._entradas = sorted(
+            (zona for zona in self.zonas if self._indexable(zona)),
+            key=self._clave_orden,
+        )
+        self.tam_celda = tam_celda or self._calcular_tam_celda()
+        celdas = defaultdict(list)
+
+        for zona in self._entradas:
+            for celda in self._celdas_de(zona):
+                # Como _entradas ya está ordenado, cada celda queda ordenada
+                celdas[celda].append((zona.caja, zona))
+
+        # Las celdas son tuplas inmutables para poder compartirlas entre versiones
+        self._celdas = {celda: tuple(contenido) for celda, contenido in celdas.items()}
+
+    @staticmethod
+    def _indexable(zona) -> bool:
+        return zona.prioridad > 0 and zona.caja is not None
+
+    @staticmethod
+    def _clave_orden(zona) -> tuple:
+        return (-zona.prioridad, zona.orden)
+
+    def _celdas_de(self, zona):
+        este_min, norte_min, este_max, norte_max = zona.caja
+        fila_min, col_min = self._celda(este_min, norte_min)
+        fila_max, col_max = self._celda(este_max, norte_max)
+        for fila in range(fila_min, fila_max + 1):
+            for col in range(col_min, col_max + 1):
+                yield (fila, col)
+
+    def _n_celdas(self, zona) -> int:
+        este_min, norte_min, este_max, norte_max = zona.caja
+        fila_min, col_min = self._celda(este_min, norte_min)
+        fila_max, col_max = self._celda(este_max, norte_max)
+        return (fila_max - fila_min + 1) * (col_max - col_min + 1)
+
+    def actualizado(self, agregar=(), quitar=()) -> "IndiceZonas":
+        """
+        Devuelve un índice nuevo con zonas agregadas y/o quitadas, sin tocar este.
+        Solo se reconstruyen las celdas afectadas; el resto se comparte con la
+        versión anterior. Si una zona nueva es desproporcionada para la grilla
+        actual, se reconstruye el índice completo con un tamaño de celda nuevo.
+        """
+        agregar = list(agregar)
+        quitar_ids = {id(zona) for zona in quitar}
+        zonas = [zona for zona in self.zonas if id(zona) not in quitar_ids] + agregar
+
+        nuevas = [zona for zona in agregar if self._indexable(zona)]
+        if any(self._n_celdas(zona) > self.MAX_CELDAS for zona in nuevas):
+            return IndiceZonas(zonas)
+
+        nuevo = object.__new__(IndiceZonas)
+        nuevo.zonas = zonas
+        nuevo.tam_celda = self.tam_celda
+        nuevo._entradas = sorted(
+            [zona for zona in self._entradas if id(zona) not in quitar_ids] + nuevas,
+            key=self._clave_orden,
+        )
+        nuevo._celdas = dict(self._celdas)
+
+        celdas_nuevas = [(zona, set(self._celdas_de(zona))) for zona in nuevas]
+        afectadas = set()
+        for zona in quitar:
+            if self._indexable(zona):
+                afectadas.update(self._celdas_de(zona))
+        for _, celdas in celdas_nuevas:
+            afectadas.update(celdas)
+
+        for celda in afectadas:
+            contenido = [
+                entrada for entrada in self._celdas.get(celda, ())
+                if id(entrada[1]) not in quitar_ids
+            ]
+            contenido.extend((zona.caja, zona) for zona, celdas in celdas_nuevas if celda in celdas)
+            contenido.sort(key=lambda entrada: self._clave_orden(entrada[1]))
+            if contenido:
+                nuevo._celdas[celda] = tuple(contenido)
+            else:
+                nuevo._celdas.pop(celda, None)
+        return nuevo
+
+    def _calcular_tam_celda(self) -> float:
+        if not self._entradas:
+            return 1.0
+        cajas = [zona.caja for zona in self._entradas]
+        extensiones = sorted(max(caja[2] - caja[0], caja[3] - caja[1]) for caja in cajas)
+        tam = extensiones[len(extensiones) // 2] or 1.0
+
+        este_min = min(caja[0] for caja in cajas)
+        norte_min = min(caja[1] for caja in cajas)
+        este_max = max(caja[2] for caja in cajas)
+        norte_max = max(caja[3] for caja in cajas)
+        area = (este_max - este_min) * (norte_max - norte_min)
+        if area / (tam * tam) > self.MAX_CELDAS:
+            tam = math.sqrt(area / self.MAX_CELDAS)
+        return tam
+
+    def _celda(self, este: float, norte: float) -> tuple:
+        return (math.floor(este / self.tam_celda), math.floor(norte / self.tam_celda))
+
+    def candidatas(self, este: float, norte: float) -> list:
+        """Zonas cuya caja envolvente contiene al punto, de mayor a menor prioridad."""
+        return [
+            zona
+            for caja, zona in self._celdas.get(self._celda(este, norte), ())
+            if caja[0] <= este <= caja[2] and caja[1] <= norte <= caja[3]
+        ]
+
+    def zona_prioritaria(self, este: float, norte: float):
+        """Devuelve la zona compilada de mayor prioridad que contiene al punto, o None."""
+        for caja, zona in self._celdas.get(self._celda(este, norte), ()):
+            if caja[0] <= este <= caja[2] and caja[1] <= norte <= caja[3] and zona.contiene(este, norte):
+                return zona
+        return None
+
+    def __len__(self):
+        return len(self.zonas)
@@ -0,0 +1,181 @@
+import math
+import random
+
+import numpy as np
+from pyproj import Geod
+
+from services.camara import ModeloCamara
+from services.zonas import PRIORIDAD_ZONAS
+
+# Datos sintéticos y cálculos de referencia que comparten los tests y los
+# benchmarks. Los benchmarks importan de aquí (no al revés): así cambiar un
+# benchmark no cambia lo que los tests dan por correcto.
+
+RADAR_LAT = -41.462296967669154
+RADAR_LON = -72.98740792932408
+METROS_POR_GRADO_LATITUD = 111320
+
+
+def zonas_sinteticas(n_zonas: int, n_vertices: int, rng: random.Random) -> list:
+    """Polígonos convexos repartidos a lo largo de una "costa" de ~5 km."""
+    categorias = list(PRIORIDAD_ZONAS)
+    zonas = []
+    for i in range(n_zonas):
+        centro_lat = RADAR_LAT + rng.uniform(-0.005, 0.005)
+        centro_lon = RADAR_LON + rng.uniform(-0.03, 0.03)
+        radio = rng.uniform(0.0002, 0.0015)
+        angulos = sorted(rng.uniform(0, 2 * math.pi) for _ in range(n_vertices))
+        zonas.append({
+            "id": i + 1,
+            "name": f"Zona {i + 1}",
+            "category": rng.choice(categorias),
+            "color": "#ff0000",
+            "coordinates": [
+                [centro_lat + radio * math.sin(a), centro_lon + radio * math.cos(a) * 1.5]
+                for a in angulos
+            ],
+        })
+    return zonas
+
+
+def puntos_sinteticos(n_puntos: int, rng: random.Random) -> list:
+    return [
+        (RADAR_LAT + rng.uniform(-0.006, 0.006), RADAR_LON + rng.uniform(-0.032, 0.032))
+        for _ in range(n_puntos)
+    ]
+
+
+# La cámara principal está en la posición del radar
+CAM_LAT = RADAR_LAT
+CAM_LON = RADAR_LON
+
+# Calibraciones de prueba: (nombre, parámetros de ModeloCamara)
+CALIBRACIONES = (
+    ("sin inclinación", {}),
+    ("inclinada", {"inclinacion_grados": 3.5, "direccion_inclinacion_grados": 120.0, "tilt_por_zoom_grados": 2.0}),
+    ("sin estimar altitud", {"inclinacion_grados": -2.0, "direccion_inclinacion_grados": 300.0, "estimar_altitud": False}),
+)
+
+
+def normalize_tilt_new_mapping(physical_angle_deg: float) -> float:
+    """El mapeo de tilt anterior, copiado tal cual: es parte del cálculo de referencia."""
+    physical_angle_deg = max(-90.0, min(90.0, physical_angle_deg))
+    if physical_angle_deg >= 0:
+        normalized_value = 1.0 - (physical_angle_deg / 180.0)
+    else:
+        normalized_value = 1.0 + (physical_angle_deg / 60.0)
+    return max(-0.5, min(1.0, normalized_value))
+
+
+def ptz_escalar(c: dict, target_lat, target_lon, target_alt=None, target_azimuth=None, target_slant_distance=None):
+    """calculate_ptz_for_gps_target anterior (routes/TrackPTZ.py); 'c' reemplaza a las constantes del módulo."""
+    geod = Geod(ellps="WGS84")
+    fwd_azimuth, _, distance_2d = geod.inv(
+        lons1=c["longitud"], lats1=c["latitud"], lons2=target_lon, lats2=target_lat
+    )
+    if target_azimuth is not None:
+        fwd_azimuth = target_azimuth
+
+    delta_altitude = 0.0
+    if target_alt is not None:
+        delta_altitude = target_alt - c["altitud_m"]
+    elif c["estimar_altitud"] and target_slant_distance is not None:
+        if target_slant_distance < distance_2d:
+            delta_altitude = 0.0
+        else:
+            delta_alt_squared = target_slant_distance**2 - distance_2d**2
+            delta_altitude_magnitude = math.sqrt(delta_alt_squared)
+            delta_altitude = -delta_altitude_magnitude
+
+    elevation_angle_deg = math.degrees(math.atan2(delta_altitude, distance_2d))
+    pan_angle_final = fwd_azimuth - c["rumbo_grados"]
+
+    corrected_pan_angle = pan_angle_final
+    corrected_elevation_angle = elevation_angle_deg
+    if c["corregir_inclinacion"] and c["inclinacion_grados"] != 0.0:
+        pan_rad, tilt_rad = (
+            math.radians(pan_angle_final),
+            math.radians(elevation_angle_deg),
+        )
+        lean_angle_rad, lean_direction_rad = (
+            math.radians(c["inclinacion_grados"]),
+            math.radians(c["direccion_inclinacion_grados"]),
+        )
+
+        sin_new_tilt = math.sin(tilt_rad) * math.cos(lean_angle_rad) - math.cos(
+            tilt_rad
+        ) * math.sin(lean_angle_rad) * math.cos(pan_rad - lean_direction_rad)
+        sin_new_tilt = max(-1.0, min(1.0, sin_new_tilt))
+        new_tilt_rad = math.asin(sin_new_tilt)
+
+        y = math.sin(pan_rad - lean_direction_rad) * math.cos(tilt_rad)
+        x = math.cos(pan_rad - lean_direction_rad) * math.cos(tilt_rad) * math.cos(
+            lean_angle_rad
+        ) + math.sin(tilt_rad) * math.sin(lean_angle_rad)
+        new_pan_rad = math.atan2(y, x) + lean_direction_rad
+
+        corrected_pan_angle, corrected_elevation_angle = (
+            math.degrees(new_pan_rad),
+            math.degrees(new_tilt_rad),
+        )
+
+    if corrected_pan_angle > 180:
+        corrected_pan_angle -= 360
+    elif corrected_pan_angle < -180:
+        corrected_pan_angle += 360
+
+    safe_limit_pan = 0.9999
+    normalized_pan = max(
+        -safe_limit_pan, min(safe_limit_pan, corrected_pan_angle / c["max_pan_grados"])
+    )
+
+    distance_3d = math.sqrt(distance_2d**2 + delta_altitude**2)
+    if distance_3d <= c["distancia_zoom_min_m"]:
+        normalized_zoom = 0.0
+    elif distance_3d >= c["distancia_zoom_max_m"]:
+        normalized_zoom = 1.0
+    else:
+        normalized_zoom = (distance_3d - c["distancia_zoom_min_m"]) / (
+            c["distancia_zoom_max_m"] - c["distancia_zoom_min_m"]
+        )
+
+    final_elevation_angle = corrected_elevation_angle + (
+        normalized_zoom * c["tilt_por_zoom_grados"]
+    )
+
+    normalized_tilt = normalize_tilt_new_mapping(final_elevation_angle)
+
+    return {"pan": normalized_pan, "tilt": normalized_tilt, "zoom": normalized_zoom}
+
+
+def parametros(modelo: ModeloCamara, calibracion: dict) -> dict:
+    """Las constantes del cálculo escalar para el mismo modelo."""
+    return {
+        "latitud": modelo.latitud, "longitud": modelo.longitud, "altitud_m": modelo.altitud_m,
+        "rumbo_grados": modelo.rumbo_grados, "max_pan_grados": modelo.max_pan_grados,
+        "distancia_zoom_min_m": modelo.distancia_zoom_min_m, "distancia_zoom_max_m": modelo.distancia_zoom_max_m,
+        "tilt_por_zoom_grados": modelo.tilt_por_zoom_grados, "estimar_altitud": modelo.estimar_altitud,
+        "corregir_inclinacion": calibracion.get("corregir_inclinacion", True),
+        "inclinacion_grados": calibracion.get("inclinacion_grados", 0.0),
+        "direccion_inclinacion_grados": calibracion.get("direccion_inclinacion_grados", 0.0),
+    }
+
+
+def objetivos_al_azar(n: int, rng: random.Random) -> list:
+    """(lat, lon, altitud, azimut, distancia): cada opcional falta en parte de los casos."""
+    objetivos = []
+    for _ in range(n):
+        lat = CAM_LAT + rng.uniform(-0.02, 0.02)
+        lon = CAM_LON + rng.uniform(-0.03, 0.03)
+        altitud = rng.uniform(-5, 80) if rng.random() < 0.2 else None
+        azimut = rng.uniform(-180, 360) if rng.random() < 0.3 else None
+        # Distancia inclinada a veces menor que la horizontal (error del radar)
+        distancia = rng.uniform(0, 2500) if rng.random() < 0.7 else None
+        objetivos.append((lat, lon, altitud, azimut, distancia))
+    return objetivos
+
+
+def columnas(objetivos: list) -> tuple:
+    def columna(i):
+        return np.array([math.nan if o[i] is None else o[i] for o in objetivos], dtype=np.float64)
+    return columna(0), columna(1), columna(2), columna(3), columna(4)
@@ -0,0 +1,118 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from database import RepositorioAlertas, RepositorioConfiguracion, RepositorioUsuarios, RepositorioZonas
+from services.lotes import EscritorLotes
+from services.metricas import SondaLoop
+
+# El acceso a Mongo nunca debe detener el loop de asyncio. El caso que importa es
+# el lento: un Mongo caído (conexión rechazada) o colgado (acepta la conexión y
+# no responde), donde cada operación espera su timeout completo. Se prueba contra
+# servidores locales así, sin depender de un Mongo real.
+
+TIMEOUT_MS = 300
+UMBRAL_S = 0.05
+
+
+@pytest.fixture
+def uri_rechaza():
+    # Un puerto que se libera al salir del bloque: nadie escucha ahí
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        puerto = s.getsockname()[1]
+    return f"mongodb://127.0.0.1:{puerto}/"
+
+
+@pytest.fixture
+def uri_no_responde():
+    servidor = socket.socket()
+    servidor.bind(("127.0.0.1", 0))
+    servidor.listen()
+    conexiones = []
+
+    def aceptar():
+        while True:
+            try:
+                conexiones.append(servidor.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=aceptar, daemon=True).start()
+    yield f"mongodb://127.0.0.1:{servidor.getsockname()[1]}/"
+    servidor.close()
+    for conexion in conexiones:
+        conexion.close()
+
+
+def operaciones(db, archivo_respaldo) -> list:
+    """(nombre, fábrica de la corrutina): lecturas y escrituras de los repositorios y del escritor en lotes."""
+    configuracion = RepositorioConfiguracion(db)
+    zonas = RepositorioZonas(db)
+    alertas = RepositorioAlertas(db)
+    usuarios = RepositorioUsuarios(db)
+    escritor = EscritorLotes(db.alertas, "alertas", archivo_respaldo=str(archivo_respaldo))
+
+    async def vaciar_escritor():
+        for i in range(10):
+            escritor.encolar({"evento": "entrada", "punto_id": i})
+        await escritor.vaciar()
+        # El insert falló por timeout: el lote completo quedó en el archivo de respaldo
+        assert escritor.errores == 1 and escritor.respaldadas == 10
+        assert len(archivo_respaldo.read_text(encoding="utf-8").splitlines()) == 10
+
+    return [
+        ("configuracion.sensores", configuracion.sensores),
+        ("configuracion.principal", configuracion.principal),
+        ("configuracion.actualizar", lambda: configuracion.actualizar({"sensor_id": "muelle"}, {"latitud": 1.0})),
+        ("zonas.documentos", zonas.documentos),
+        ("zonas.siguiente_id", zonas.siguiente_id),
+        ("zonas.crear", lambda: zonas.crear({"id": 1, "name": "Zona 1"})),
+        ("zonas.eliminar", lambda: zonas.eliminar(1)),
+        ("alertas.listar", lambda: alertas.listar(100)),
+        ("usuarios.por_email", lambda: usuarios.por_email("no-existe@ejemplo.cl")),
+        ("usuarios.crear", lambda: usuarios.crear({"email": "nuevo@ejemplo.cl"})),
+        ("usuarios.actualizar", lambda: usuarios.actualizar(ObjectId(), {"nombre": "x"})),
+        ("escritor.vaciar", vaciar_escritor),
+    ]
+
+
+def retrasos(uri: str, archivo_respaldo) -> dict:
+    """nombre -> (mayor retraso del loop durante la operación, si falló)."""
+
+    async def medir():
+        client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=TIMEOUT_MS, connectTimeoutMS=TIMEOUT_MS, socketTimeoutMS=TIMEOUT_MS)
+        sonda = SondaLoop(intervalo_s=0.005)
+        tarea_sonda = asyncio.create_task(sonda.ejecutar())
+        await asyncio.sleep(0.02)
+        resultado = {}
+        try:
+            for nombre, operacion in operaciones(client.astradar, archivo_respaldo):
+                sonda.maximo_s = 0.0
+                try:
+                    await operacion()
+                    fallo = False
+                except Exception:
+                    fallo = True
+                # Un ciclo más de la sonda para registrar un bloqueo al final de la llamada
+                await asyncio.sleep(sonda.intervalo_s * 2)
+                resultado[nombre] = (sonda.maximo_s, fallo)
+        finally:
+            tarea_sonda.cancel()
+            client.close()
+        return resultado
+
+    return asyncio.run(medir())
+
+
+@pytest.mark.parametrize("servidor", ["uri_rechaza", "uri_no_responde"])
+def test_mongo_caido_no_bloquea_el_loop(servidor, request, tmp_path):
+    medidos = retrasos(request.getfixturevalue(servidor), tmp_path / "alertas_pendientes.jsonl")
+    bloquean = {nombre: f"{retraso * 1000:.1f} ms" for nombre, (retraso, _) in medidos.items() if retraso > UMBRAL_S}
+    assert not bloquean
+    # Todas fueron por el camino lento (el escritor se traga el error y lo respalda)
+    assert all(fallo for nombre, (_, fallo) in medidos.items() if nombre != "escritor.vaciar")
@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+import pytest
+
+from services.camara import ModeloCamara, normalize_tilt_new_mapping
+from tests import _referencias as referencias
+from tests._referencias import CALIBRACIONES, CAM_LAT, CAM_LON, columnas, objetivos_al_azar, parametros, ptz_escalar
+
+TOLERANCIA = 1e-9
+
+
+def resultados(lista) -> np.ndarray:
+    return np.array([[r["pan"], r["tilt"], r["zoom"]] for r in lista])
+
+
+@pytest.mark.parametrize("nombre, calibracion", CALIBRACIONES, ids=[nombre for nombre, _ in CALIBRACIONES])
+def test_resolver_igual_al_calculo_escalar(nombre, calibracion):
+    # Objetivos con y sin azimut del radar, distancia inclinada y altitud
+    modelo = ModeloCamara(CAM_LAT, CAM_LON, **calibracion)
+    c = parametros(modelo, calibracion)
+    objetivos = objetivos_al_azar(2000, random.Random(0))
+    esperados = resultados(ptz_escalar(c, *o) for o in objetivos)
+
+    pan, tilt, zoom = modelo.resolver(*columnas(objetivos))
+    np.testing.assert_allclose(np.column_stack((pan, tilt, zoom)), esperados, rtol=0, atol=TOLERANCIA)
+
+    puntos = resultados(modelo.resolver_punto(*o) for o in objetivos)
+    np.testing.assert_allclose(puntos, esperados, rtol=0, atol=TOLERANCIA)
+
+
+def test_resolver_sin_objetivos():
+    modelo = ModeloCamara(CAM_LAT, CAM_LON)
+    pan, tilt, zoom = modelo.resolver(*columnas([]))
+    assert len(pan) == len(tilt) == len(zoom) == 0
+
+
+@pytest.mark.parametrize("elevacion, tilt", [
+    (0.0, 1.0), (90.0, 0.5), (120.0, 0.5), (-30.0, 0.5), (-60.0, 0.0), (-90.0, -0.5), (-120.0, -0.5),
+])
+def test_normalize_tilt_new_mapping(elevacion, tilt):
+    assert normalize_tilt_new_mapping(elevacion) == pytest.approx(tilt)
+
+
+def test_normalize_tilt_new_mapping_igual_a_la_referencia():
+    for elevacion in np.linspace(-120.0, 120.0, 481).tolist():
+        assert normalize_tilt_new_mapping(elevacion) == referencias.normalize_tilt_new_mapping(elevacion)
@@ -0,0 +1,61 @@
+from typing import NamedTuple
+
+from services.eventos import MotorEventosZona
+from services.trama import Objetivo
+
+
+class Zona(NamedTuple):
+    """Lo que el motor usa de una ZonaCompilada."""
+    id: int
+    severidad: str = "alta"
+    centroide_para_alerta: dict = {}
+    zona_para_alerta: dict = {}
+
+
+ZONA = Zona(1)
+
+
+def deteccion(objetivo_id: int):
+    return (Objetivo(objetivo_id, 0, 0.0, 0.0, 0.0, 0.0), ZONA, -41.46, -72.98)
+
+
+def tipos(eventos: list) -> list:
+    return [(e["evento"], e["sensor"], e["punto_id"]) for e in eventos]
+
+
+def motor_con_entrada(sensor: str = "muelle") -> MotorEventosZona:
+    motor = MotorEventosZona(confirmar_entrada_s=0.5, confirmar_salida_s=3.0)
+    motor.procesar(0.0, [deteccion(7)], sensor)
+    assert tipos(motor.procesar(1.0, [deteccion(7)], sensor)) == [("entrada", sensor, 7)]
+    return motor
+
+
+def test_tramas_de_otro_radar_cierran_las_permanencias_de_un_radar_caido():
+    motor = motor_con_entrada("muelle")
+    # "muelle" deja de enviar; solo llegan tramas del principal
+    assert motor.procesar(2.0, [], "principal") == []
+    assert tipos(motor.procesar(4.5, [], "principal")) == [("salida", "muelle", 7)]
+    assert len(motor) == 0
+
+
+def test_barrer_sin_tramas():
+    motor = motor_con_entrada()
+    assert motor.barrer(3.0) == []
+    assert tipos(motor.barrer(4.0)) == [("salida", "muelle", 7)]
+    assert len(motor) == 0
+
+
+def test_barrer_cierra_de_inmediato_los_radares_quitados():
+    motor = motor_con_entrada("muelle")
+    motor.procesar(1.0, [deteccion(3)], "principal")
+    eventos = motor.barrer(1.1, sensores={"principal"})
+    assert tipos(eventos) == [("salida", "muelle", 7)]
+    # El par sin confirmar del principal sigue abierto
+    assert len(motor) == 1
+
+
+def test_entrada_sin_confirmar_se_descarta_sin_evento():
+    motor = MotorEventosZona(confirmar_entrada_s=0.5, confirmar_salida_s=3.0)
+    motor.procesar(0.0, [deteccion(7)], "muelle")
+    assert motor.barrer(10.0) == []
+    assert len(motor) == 0
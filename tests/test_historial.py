@@ -0,0 +1,32 @@
+import pytest
+
+from services.historial import HistorialTracks
+
+
+def guardados(historial: HistorialTracks, puntos: list) -> list:
+    """Instantes de 'puntos' [(ahora, id)] que el submuestreo deja pasar."""
+    antes = historial.metricas()["en_cola"]
+    resultado = []
+    for ahora, objetivo_id in puntos:
+        historial.registrar(ahora, "principal", objetivo_id, -41.46, -72.98, 1.0, 90.0)
+        en_cola = historial.metricas()["en_cola"]
+        if en_cola > antes:
+            resultado.append((ahora, objetivo_id))
+        antes = en_cola
+    return resultado
+
+
+@pytest.mark.parametrize("periodo_s", [1.0, 120.0, 600.0])
+def test_submuestreo_sobrevive_a_la_limpieza(periodo_s):
+    historial = HistorialTracks(coleccion=None, periodo_s=periodo_s)
+    # El track 1 se ve cada 10 s; tracks nuevos (siempre se guardan) disparan las limpiezas de '_ultimo'
+    puntos = sorted([(t, 1) for t in range(0, 1800, 10)] + [(t + 5, 1000 + t) for t in range(0, 1800, 61)])
+    del_track_1 = [ahora for ahora, objetivo_id in guardados(historial, puntos) if objetivo_id == 1]
+    assert del_track_1 == list(range(0, 1800, max(10, int(periodo_s))))
+
+
+def test_limpieza_olvida_los_tracks_que_no_se_ven():
+    historial = HistorialTracks(coleccion=None, periodo_s=120.0)
+    historial.registrar(0.0, "principal", 1, 0.0, 0.0, 0.0, 0.0)
+    historial.registrar(1000.0, "principal", 2, 0.0, 0.0, 0.0, 0.0)
+    assert historial.metricas()["tracks"] == 1
@@ -0,0 +1,49 @@
+from services.difusion import ConnectionManager
+from services.historial import HistorialTracks
+from services.metricas import MetricasIngesta, SondaLoop, TiemposArranque, texto_metricas
+
+
+def familias(texto: str) -> dict:
+    """nombre -> tipo, de las líneas '# TYPE'."""
+    return {
+        partes[2]: partes[3]
+        for partes in (linea.split() for linea in texto.splitlines())
+        if partes[:2] == ["#", "TYPE"]
+    }
+
+
+def exportar() -> str:
+    metricas_ingesta = MetricasIngesta()
+    metricas_ingesta.trama("principal", 0.002)
+    metricas_ingesta.contar(metricas_ingesta.invalidas, "muelle")
+    tiempos_arranque = TiemposArranque()
+    tiempos_arranque.registrar("registro", 0.1)
+    return texto_metricas(
+        metricas_ingesta,
+        SondaLoop(),
+        tiempos_arranque,
+        sensores={"principal": None, "muelle": None},
+        gestores={"radar": ConnectionManager(), "solo_punto": ConnectionManager()},
+        escritores={"historial": HistorialTracks(coleccion=None)},
+        duplicados={"muelle": 2},
+        tracks_activos=3,
+        registro_version=4,
+        configuracion_version=0,
+    )
+
+
+def test_texto_metricas():
+    texto = exportar()
+    tipos = familias(texto)
+    assert tipos["radar_tramas_total"] == "counter"
+    assert tipos["radar_etapa_segundos"] == "histogram"
+    assert tipos["radar_ws_clientes"] == "gauge"
+    assert 'radar_tramas_total{sensor="principal"} 1' in texto
+    assert 'radar_tramas_invalidas_total{sensor="muelle"} 1' in texto
+    assert 'radar_objetivos_duplicados_total{sensor="muelle"} 2' in texto
+    assert 'radar_ws_tramas_descartadas_total{endpoint="solo_punto"} 0' in texto
+    assert 'radar_escritor_cola{escritor="historial"} 0' in texto
+    assert "radar_registro_version 4" in texto
+    assert 'radar_arranque_segundos{paso="registro"} 0.1' in texto
+    # Sin actor PTZ no hay métricas de cámaras
+    assert not any(nombre.startswith("radar_ptz_") for nombre in tipos)
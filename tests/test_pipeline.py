@@ -0,0 +1,57 @@
+import pytest
+
+from database import configuracion_radar
+from routes import TrackPTZ
+from routes.PTZ import CAMERAS
+from services.eventos import MotorEventosZona
+from services.geo import obtener_marco_local
+from services.pipeline import PipelineRadar
+from services.registro import RegistroRadar
+from services.seguimiento import TablaTracks
+from services.sensores import ConfiguracionSensor, VistaSensores
+from services.trama import Objetivo
+from tests._referencias import METROS_POR_GRADO_LATITUD, RADAR_LAT, RADAR_LON
+
+
+class ActorFalso:
+    def __init__(self):
+        self.apuntados = []
+
+    def apuntar(self, camara_id, punto: dict):
+        self.apuntados.append((camara_id, punto["id"]))
+
+
+@pytest.fixture
+def camara_muelle(monkeypatch):
+    # Una cámara con ubicación propia en el archivo de cámaras
+    monkeypatch.setitem(CAMERAS, "camara_muelle", {"latitud": RADAR_LAT, "longitud": RADAR_LON, "sensor": "muelle"})
+    TrackPTZ._camaras_en.cache_clear()
+    yield
+    TrackPTZ._camaras_en.cache_clear()
+
+
+def test_solo_radar_secundario_con_planificador(camara_muelle):
+    # Sin radar principal no hay configuracion_radar: la cámara principal no existe
+    assert not configuracion_radar.cargada
+    assert list(TrackPTZ.camaras_ptz()) == ["camara_muelle"]
+
+    sensor = ConfiguracionSensor("muelle", None, RADAR_LAT, RADAR_LON, 0.0, 30.0, None)
+    zona = {
+        "id": 1, "name": "Zona 1", "category": "interior", "color": "#ff0000",
+        "coordinates": [[RADAR_LAT, RADAR_LON - 0.001], [RADAR_LAT + 0.001, RADAR_LON - 0.001],
+                        [RADAR_LAT + 0.001, RADAR_LON + 0.001], [RADAR_LAT, RADAR_LON + 0.001]],
+    }
+    registro = RegistroRadar()
+    registro.cargar([zona], {sensor.id: sensor}, obtener_marco_local(RADAR_LAT, RADAR_LON, METROS_POR_GRADO_LATITUD))
+    actor = ActorFalso()
+    pipeline = PipelineRadar(
+        METROS_POR_GRADO_LATITUD, TablaTracks(), MotorEventosZona(confirmar_entrada_s=0.5), VistaSensores(2.0),
+        actor_ptz=actor, planificador_camaras=TrackPTZ.planificador_camaras,
+    )
+
+    # Un objetivo 50 m al norte del radar, dentro de la zona
+    for ahora in (0.0, 1.0):
+        resultado = pipeline.procesar([Objetivo(7, 0, 0.0, 50.0, 0.0, 50.0)], sensor, registro.actual, ahora=ahora)
+        assert [punto["id"] for punto in resultado["puntos"]] == [7]
+    assert [alerta["evento"] for alerta in resultado["alertas"]] == ["entrada"]
+    assert actor.apuntados == [("camara_muelle", 7)]
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from services.difusion import ConnectionManager
+from services.geo import obtener_marco_local
+from services.suscripciones import Suscripcion, SuscripcionInvalida
+from services.zonas import compilar_zonas
+from tests._referencias import METROS_POR_GRADO_LATITUD, RADAR_LAT, RADAR_LON
+
+
+class WebSocketFalso:
+    client = None
+
+    def __init__(self):
+        self.recibidos = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, texto: str):
+        self.recibidos.append(json.loads(texto))
+
+    async def send_bytes(self, datos: bytes):
+        self.recibidos.append(json.loads(datos))
+
+
+def zona(zona_id: int, categoria: str) -> dict:
+    return {
+        "id": zona_id, "name": f"Zona {zona_id}", "category": categoria, "color": "#ff0000",
+        "coordinates": [[RADAR_LAT, RADAR_LON], [RADAR_LAT + 0.001, RADAR_LON], [RADAR_LAT, RADAR_LON + 0.001]],
+    }
+
+
+def alerta(zona_id: int) -> dict:
+    return {"evento": "entrada", "severidad": "alta", "zona": {"id": zona_id}, "posicion_detectada": {"latitud": 0, "longitud": 0}}
+
+
+def alertas_recibidas(zonas: list, mensaje: dict) -> list:
+    """Ids de zona de las alertas que recibe un cliente suscrito a la categoría "interior"."""
+    marco = obtener_marco_local(RADAR_LAT, RADAR_LON, METROS_POR_GRADO_LATITUD)
+
+    async def difundir():
+        manager = ConnectionManager()
+        manager.usar_zonas(compilar_zonas(zonas, marco))
+        websocket = WebSocketFalso()
+        await manager.connect(websocket)
+        manager.suscribir(websocket, Suscripcion.desde_mensaje({"t": "suscripcion", "categorias": ["interior"]}))
+        manager.broadcast(mensaje)
+        await asyncio.sleep(0.01)
+        manager.disconnect(websocket)
+        return [m for m in websocket.recibidos if "alertas" in m]
+
+    return [a["zona"]["id"] for m in asyncio.run(difundir()) for a in m["alertas"]]
+
+
+def test_alerta_de_zona_sin_puntos_difundidos():
+    # Ningún punto trajo la zona 1 todavía: la categoría sale del registro
+    zonas = [zona(1, "interior"), zona(2, "exterior")]
+    assert alertas_recibidas(zonas, {"puntos": [], "alertas": [alerta(1), alerta(2)]}) == [1]
+
+
+def test_zona_editada_usa_la_categoria_vigente():
+    zonas = [zona(1, "exterior")]
+    assert alertas_recibidas(zonas, {"puntos": [], "alertas": [alerta(1)]}) == []
+
+
+@pytest.mark.parametrize("mensaje", [
+    {"categorias": [["interior"]]},
+    {"categorias": [{"a": 1}]},
+    {"zonas": [{"id": 1}]},
+    {"zonas": [True]},
+])
+def test_elementos_invalidos(mensaje):
+    with pytest.raises(SuscripcionInvalida):
+        Suscripcion.desde_mensaje(mensaje)
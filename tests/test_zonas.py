@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from services.geo import obtener_marco_local
+from services.zonas import IndiceZonas, compilar_zonas, zona_prioritaria_fuerza_bruta
+from tests._referencias import METROS_POR_GRADO_LATITUD, RADAR_LAT, RADAR_LON, puntos_sinteticos, zonas_sinteticas
+
+
+@pytest.fixture(scope="module")
+def marco():
+    return obtener_marco_local(RADAR_LAT, RADAR_LON, METROS_POR_GRADO_LATITUD)
+
+
+def comparar(indice: IndiceZonas, zonas: list, puntos: list, marco):
+    """El índice elige, para cada punto, la misma zona que el recorrido completo."""
+    este, norte = marco.a_local([p[0] for p in puntos], [p[1] for p in puntos])
+    for (latitud, longitud), x_local, y_local in zip(puntos, este.tolist(), norte.tolist()):
+        esperada = zona_prioritaria_fuerza_bruta(latitud, longitud, zonas)
+        obtenida = indice.zona_prioritaria(x_local, y_local)
+        assert (obtenida.documento if obtenida else None) is esperada, (latitud, longitud)
+
+
+@pytest.mark.parametrize("n_zonas", [1, 10, 100, 300])
+def test_indice_igual_a_fuerza_bruta(marco, n_zonas):
+    rng = random.Random(n_zonas)
+    zonas = zonas_sinteticas(n_zonas, 8, rng)
+    comparar(IndiceZonas(compilar_zonas(zonas, marco)), zonas, puntos_sinteticos(2000, rng), marco)
+
+
+def test_indice_en_los_vertices(marco):
+    # Los vértices caen en el borde de la caja envolvente de su zona
+    rng = random.Random(1)
+    zonas = zonas_sinteticas(50, 6, rng)
+    vertices = [tuple(vertice) for zona in zonas for vertice in zona["coordinates"]]
+    comparar(IndiceZonas(compilar_zonas(zonas, marco)), zonas, vertices, marco)
+
+
+def test_indice_actualizado_igual_a_fuerza_bruta(marco):
+    rng = random.Random(2)
+    zonas = zonas_sinteticas(120, 8, rng)
+    compiladas = compilar_zonas(zonas, marco)
+    indice = IndiceZonas(compiladas[:100])
+    # Quita 20 zonas y agrega otras 20, como al editar zonas con el servidor andando
+    indice = indice.actualizado(agregar=compiladas[100:], quitar=compiladas[:20])
+    comparar(indice, zonas[20:], puntos_sinteticos(2000, rng), marco)
+
+
+def test_indice_vacio(marco):
+    indice = IndiceZonas([])
+    assert indice.zona_prioritaria(0.0, 0.0) is None